@@ -2,7 +2,7 @@
 API Brick
 
 PUBLIC CONTRACT:
-- router: Main API router to include in FastAPI app
+- router: Main API router to include in FastAPI app (includes download and experiment job routes)
 
 RESPONSIBILITIES:
 - HTTP endpoint definitions
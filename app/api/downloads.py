@@ -0,0 +1,246 @@
+"""
+Download routes for stored uploads and experiment exports.
+
+Responses never buffer whole objects in memory:
+
+- Local files are served by ZeroCopyFileResponse, which hands the file to
+  the server through the ASGI ``http.response.zerocopysend`` (sendfile)
+  or ``http.response.pathsend`` extensions when the server offers them,
+  and otherwise reads it in large chunks on a worker thread.
+- Objects in a remote backend are streamed from the backend chunk by chunk.
+
+Both paths support HTTP Range requests, strong ETags derived from content
+hashes, and conditional requests (If-None-Match, If-Range).
+
+Users may only download their own uploads and exports of their own
+experiments (admins may download anything); anything else is reported as
+missing.
+"""
+
+import os
+import stat
+from urllib.parse import quote
+
+import anyio
+from fastapi import APIRouter
+from fastapi import Depends
+from fastapi import HTTPException
+from fastapi import Request
+from fastapi import status
+from starlette.datastructures import Headers
+from starlette.datastructures import MutableHeaders
+from starlette.responses import FileResponse
+from starlette.responses import Response
+from starlette.responses import StreamingResponse
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from ..core import AuthenticatedUser
+from ..core import rate_limit
+from ..storage import Download
+from ..storage import get_experiment_owner
+from ..storage import get_export_download
+from ..storage import get_file
+from ..storage import get_file_download
+from ..storage import stream_download
+
+router = APIRouter()
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+
+class ZeroCopyFileResponse(FileResponse):
+    """
+    FileResponse that sends file contents with sendfile when possible.
+
+    Starlette already uses ``http.response.pathsend`` for whole-file
+    responses; when the server offers the ``http.response.zerocopysend``
+    extension, GET requests for the whole file or a single range are handed
+    to it instead. Everything else (HEAD, multiple ranges, servers without
+    the extension) is left to FileResponse, reading in larger chunks.
+    """
+
+    chunk_size = 1024 * 1024
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if ZEROCOPY_EXTENSION not in scope.get("extensions", {}) or scope["method"].upper() != "GET":
+            await super().__call__(scope, receive, send)
+            return
+
+        try:
+            stat_result = self.stat_result or await anyio.to_thread.run_sync(os.stat, self.path)
+        except FileNotFoundError:
+            raise RuntimeError(f"File at path {self.path} does not exist.")
+        if not stat.S_ISREG(stat_result.st_mode):
+            raise RuntimeError(f"File at path {self.path} is not a file.")
+        self.set_stat_headers(stat_result)
+        size = stat_result.st_size
+
+        request_headers = Headers(scope=scope)
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        span = None
+        if range_header and (if_range is None or if_range in (self.headers["etag"], self.headers["last-modified"])):
+            try:
+                span = parse_range(range_header, size)
+            except ValueError:
+                response = Response(status_code=416, headers={"content-range": f"bytes */{size}"})
+                await response(scope, receive, send)
+                return
+
+        headers = MutableHeaders(raw=list(self.raw_headers))
+        status_code, offset, count = self.status_code, 0, size
+        if span is not None:
+            start, end = span
+            status_code, offset, count = 206, start, end + 1 - start
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+            headers["content-length"] = str(count)
+        await send({"type": "http.response.start", "status": status_code, "headers": headers.raw})
+        async with await anyio.open_file(self.path, "rb") as file:
+            await send(
+                {
+                    "type": ZEROCOPY_EXTENSION,
+                    "file": file.wrapped,
+                    "offset": offset,
+                    "count": count,
+                    "more_body": False,
+                }
+            )
+
+        if self.background is not None:
+            await self.background()
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    Parse a Range header into inclusive byte offsets.
+
+    Multi-range and malformed headers return None, meaning the range is
+    ignored and the full object is sent (as RFC 9110 allows).
+
+    Raises:
+        ValueError: If the range can't be satisfied for an object of this size
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_text, _, end_text = spec.strip().partition("-")
+    try:
+        if not start_text:
+            length = int(end_text)
+            if length <= 0:
+                raise ValueError("Empty suffix range")
+            start, end = max(size - length, 0), size - 1
+        else:
+            start = int(start_text)
+            end = min(int(end_text), size - 1) if end_text else size - 1
+    except ValueError:
+        if start_text.isdigit() or end_text.isdigit():
+            raise
+        return None
+    if start >= size or start > end:
+        raise ValueError(f"Range {header!r} not satisfiable for {size} bytes")
+    return start, end
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)."""
+    if if_none_match is None:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def download_response(request: Request, download: Download) -> Response:
+    """
+    Build a response serving a stored object.
+
+    Args:
+        request: Incoming request (Range, If-Range and If-None-Match are honored)
+        download: Object to serve
+
+    Returns:
+        A 200/206 file or streaming response, 304 if the client's copy is current,
+        or 416 for an unsatisfiable range
+    """
+    etag = f'"{download.etag}"'
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"etag": etag})
+
+    media_type = download.content_type or "application/octet-stream"
+    headers = {"etag": etag, "accept-ranges": "bytes", "content-disposition": _content_disposition(download.filename)}
+
+    if download.path is not None:
+        return ZeroCopyFileResponse(download.path, headers=headers, media_type=media_type)
+
+    start, end = 0, None
+    status_code = status.HTTP_200_OK
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range == etag):
+        try:
+            span = parse_range(range_header, download.size)
+        except ValueError:
+            return Response(
+                status_code=416,
+                headers={"content-range": f"bytes */{download.size}"},
+            )
+        if span is not None:
+            start, end = span
+            status_code = status.HTTP_206_PARTIAL_CONTENT
+            headers["content-range"] = f"bytes {start}-{end}/{download.size}"
+
+    headers["content-length"] = str((download.size if end is None else end + 1) - start)
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+    return StreamingResponse(
+        stream_download(download, start, end), status_code=status_code, headers=headers, media_type=media_type
+    )
+
+
+def _may_access(owner_id: str | None, user: AuthenticatedUser) -> bool:
+    return user.is_admin or (owner_id is not None and owner_id == user.user_id)
+
+
+@router.api_route("/files/{file_id}/download", methods=["GET", "HEAD"])
+async def download_file(file_id: str, request: Request, user: AuthenticatedUser = Depends(rate_limit)):
+    """Download an uploaded file (supports Range and conditional requests)."""
+    file_info = await get_file(file_id)
+    if file_info is None or not _may_access(file_info.get("owner_id"), user):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    download = await get_file_download(file_id)
+    if download is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    return download_response(request, download)
+
+
+@router.api_route("/experiments/{experiment_id}/export", methods=["GET", "HEAD"])
+async def download_export(
+    experiment_id: str,
+    request: Request,
+    file: str | None = None,
+    user: AuthenticatedUser = Depends(rate_limit),
+):
+    """
+    Download an experiment's columnar export.
+
+    Arrow and Parquet exports are single files; dependency-free ``.columns``
+    exports are served one column file at a time via ``?file=``.
+    """
+    if not _may_access(await get_experiment_owner(experiment_id), user):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export not found")
+    try:
+        download = await get_export_download(experiment_id, file)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if download is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export not found")
+    return download_response(request, download)
@@ -0,0 +1,393 @@
+"""
+Experiment job routes.
+
+Experiments run as background jobs: submitting returns the job (experiment)
+ID immediately, starting hands the experiment to the engine's scheduler,
+and clients poll its status and progress counters or cancel it. Requests
+never wait for runs to execute.
+
+Parameter sweeps are submitted in one request (``POST /experiments/sweeps``)
+with a base config and a grid of values; the server expands the grid,
+validates the base once and creates (and optionally starts) every
+experiment of the sweep together.
+
+Instead of polling, clients can follow ``/experiments/{id}/events`` as
+Server-Sent Events or over a WebSocket. Each subscriber reads from its own
+bounded buffer (see experiments/events.py): the stream is written only as
+fast as the client reads it, and a client that falls behind gets a
+``lagged`` event instead of growing server memory.
+
+Runs of finished experiments are listed a page at a time from the storage
+run index, with filters and field selection, instead of one response
+holding every run and its full response text.
+
+Job status and run pages carry ETags derived from the experiment's state
+(status, run counters, completion time). Dashboards re-reading an
+unchanged experiment get a 304 without the response being rebuilt. Run
+pages only get an ETag once the experiment's final state has been saved
+to storage, since its run log is immutable from then on. Compression is handled by the core
+middleware.
+"""
+
+import asyncio
+import hashlib
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Any
+
+from fastapi import APIRouter
+from fastapi import Depends
+from fastapi import HTTPException
+from fastapi import Query
+from fastapi import Request
+from fastapi import Response
+from fastapi import WebSocket
+from fastapi import WebSocketDisconnect
+from fastapi import status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from ..core import AuthenticatedUser
+from ..core import QuotaExceededError
+from ..core import authenticate_token
+from ..core import check_rate_limit
+from ..core import json_dumps
+from ..core import rate_limit
+from ..experiments import Experiment
+from ..experiments import ExperimentConfig
+from ..experiments import ExperimentEvent
+from ..experiments import ExperimentProgress
+from ..experiments import ExperimentRun
+from ..experiments import Subscription
+from ..experiments import SweepConfig
+from ..experiments import cancel_experiment
+from ..experiments import create_experiment
+from ..experiments import create_sweep
+from ..experiments import enqueue_experiment
+from ..experiments import get_experiment
+from ..experiments import list_experiments
+from ..experiments import subscribe_experiment
+from ..storage import RunPage
+from ..storage import list_experiment_runs
+from .downloads import etag_matches
+
+router = APIRouter()
+
+# Comment line sent on idle event streams so proxies keep the connection open
+SSE_HEARTBEAT_SECONDS = 15.0
+
+
+class ExperimentJob(BaseModel):
+    """Status of an experiment job."""
+
+    experiment_id: str
+    name: str
+    status: str
+    created_by: str
+    created_at: datetime
+    started_at: datetime | None = None
+    completed_at: datetime | None = None
+    progress: ExperimentProgress
+    error_message: str | None = None
+    sweep_id: str | None = None
+    sweep_params: dict[str, Any] | None = None
+    successful_runs: int | None = None
+    failed_runs: int | None = None
+    avg_duration_ms: float | None = None
+
+    @classmethod
+    def from_experiment(cls, experiment: Experiment) -> "ExperimentJob":
+        result = experiment.result
+        return cls(
+            experiment_id=experiment.experiment_id,
+            name=experiment.config.name,
+            status=experiment.status,
+            created_by=experiment.created_by,
+            created_at=experiment.created_at,
+            started_at=experiment.started_at,
+            completed_at=experiment.completed_at,
+            progress=experiment.progress,
+            error_message=experiment.error_message,
+            sweep_id=experiment.sweep_id,
+            sweep_params=experiment.sweep_params,
+            successful_runs=result.successful_runs if result else None,
+            failed_runs=result.failed_runs if result else None,
+            avg_duration_ms=result.avg_duration_ms if result else None,
+        )
+
+
+class SweepJob(BaseModel):
+    """Experiments created by a sweep submission."""
+
+    sweep_id: str
+    experiments: list[ExperimentJob]
+
+
+def _get_owned_experiment(experiment_id: str, user: AuthenticatedUser) -> Experiment:
+    """Look up an experiment the user may access (others' experiments are reported as missing)."""
+    experiment = get_experiment(experiment_id)
+    if experiment is None or (experiment.created_by != user.user_id and not user.is_admin):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Experiment not found")
+    return experiment
+
+
+def _experiment_etag(experiment: Experiment, *parts: str) -> str:
+    """ETag of an experiment's state (it changes with the status and whenever a run starts or finishes)."""
+    progress = experiment.progress
+    state = [
+        experiment.experiment_id,
+        str(experiment.status),
+        str(progress.started_runs),
+        str(progress.finished_runs),
+        experiment.completed_at.isoformat() if experiment.completed_at else "",
+        *parts,
+    ]
+    return f'"{hashlib.blake2b("|".join(state).encode(), digest_size=12).hexdigest()}"'
+
+
+def _not_modified(request: Request, response: Response, etag: str) -> Response | None:
+    """Return a 304 if the client's copy is current, otherwise tag the response."""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"etag": etag})
+    response.headers["etag"] = etag
+    response.headers["cache-control"] = "private, no-cache"
+    return None
+
+
+@router.post("/experiments", response_model=ExperimentJob, status_code=status.HTTP_202_ACCEPTED)
+async def submit_experiment(
+    config: ExperimentConfig, start: bool = False, user: AuthenticatedUser = Depends(rate_limit)
+):
+    """
+    Submit an experiment; with ``?start=true`` it is also scheduled right away.
+
+    If scheduling would exceed the user's quotas the experiment is still
+    created (pending) and the response is a 429. A dataset must be one of
+    the user's own uploads (404 otherwise).
+    """
+    try:
+        experiment = await create_experiment(config, created_by=user.user_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if start:
+        try:
+            await enqueue_experiment(experiment.experiment_id)
+        except QuotaExceededError as e:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"{e}; experiment {experiment.experiment_id} was created but not started",
+            )
+    return ExperimentJob.from_experiment(experiment)
+
+
+@router.post("/experiments/sweeps", response_model=SweepJob, status_code=status.HTTP_202_ACCEPTED)
+async def submit_sweep(sweep: SweepConfig, start: bool = False, user: AuthenticatedUser = Depends(rate_limit)):
+    """
+    Submit a parameter sweep: one experiment per combination of grid values.
+
+    With ``?start=true`` every experiment is also scheduled. Creation is
+    all or nothing; if starting them all would exceed the user's quotas,
+    nothing is created and the response is a 429.
+    """
+    try:
+        experiments = await create_sweep(sweep, created_by=user.user_id, start=start)
+    except QuotaExceededError as e:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return SweepJob(
+        sweep_id=experiments[0].sweep_id,
+        experiments=[ExperimentJob.from_experiment(experiment) for experiment in experiments],
+    )
+
+
+@router.get("/experiments", response_model=list[ExperimentJob])
+async def list_experiment_jobs(sweep_id: str | None = None, user: AuthenticatedUser = Depends(rate_limit)):
+    """List the user's experiments (optionally of one sweep), newest first."""
+    experiments = list_experiments(created_by=user.user_id)
+    if sweep_id is not None:
+        experiments = [experiment for experiment in experiments if experiment.sweep_id == sweep_id]
+    return [ExperimentJob.from_experiment(experiment) for experiment in experiments]
+
+
+@router.get("/experiments/{experiment_id}", response_model=ExperimentJob)
+async def get_experiment_job(
+    experiment_id: str, request: Request, response: Response, user: AuthenticatedUser = Depends(rate_limit)
+):
+    """Get an experiment's status and progress (supports If-None-Match)."""
+    experiment = _get_owned_experiment(experiment_id, user)
+    not_modified = _not_modified(request, response, _experiment_etag(experiment))
+    if not_modified is not None:
+        return not_modified
+    return ExperimentJob.from_experiment(experiment)
+
+
+@router.post("/experiments/{experiment_id}/start", response_model=ExperimentJob, status_code=status.HTTP_202_ACCEPTED)
+async def start_experiment_job(experiment_id: str, user: AuthenticatedUser = Depends(rate_limit)):
+    """Schedule a pending experiment on the background scheduler (429 if the user is at their quota)."""
+    _get_owned_experiment(experiment_id, user)
+    try:
+        experiment = await enqueue_experiment(experiment_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except QuotaExceededError as e:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
+    return ExperimentJob.from_experiment(experiment)
+
+
+@router.post("/experiments/{experiment_id}/cancel", response_model=ExperimentJob)
+async def cancel_experiment_job(experiment_id: str, user: AuthenticatedUser = Depends(rate_limit)):
+    """Cancel a pending, queued or running experiment."""
+    _get_owned_experiment(experiment_id, user)
+    try:
+        experiment = await cancel_experiment(experiment_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return ExperimentJob.from_experiment(experiment)
+
+
+@router.get("/experiments/{experiment_id}/runs", response_model=RunPage)
+async def list_runs(
+    experiment_id: str,
+    request: Request,
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    fields: str | None = Query(default=None, description="Comma-separated run fields to return (default: all)"),
+    provider: str | None = None,
+    model: str | None = None,
+    run_status: str | None = Query(default=None, alias="status"),
+    min_duration_ms: int | None = Query(default=None, ge=0),
+    max_duration_ms: int | None = Query(default=None, ge=0),
+    user: AuthenticatedUser = Depends(rate_limit),
+):
+    """
+    List an experiment's runs a page at a time.
+
+    Pass the returned ``next_cursor`` as ``cursor`` for the next page. Use
+    ``fields`` to leave out large fields, e.g. ``fields=run_id,status,duration_ms``.
+    Pages of finished experiments support If-None-Match once the experiment is saved.
+    """
+    experiment = _get_owned_experiment(experiment_id, user)
+    selected = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    unknown = set(selected or ()) - set(ExperimentRun.model_fields)
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown run fields: {sorted(unknown)}")
+
+    # Failed and cancelled experiments are saved after completed_at is set, so pages wait for the save
+    if experiment.persisted_at is not None:
+        etag = _experiment_etag(experiment, experiment.persisted_at.isoformat(), request.url.query)
+        not_modified = _not_modified(request, response, etag)
+        if not_modified is not None:
+            return not_modified
+
+    try:
+        return await list_experiment_runs(
+            experiment_id,
+            cursor,
+            limit,
+            fields=selected,
+            provider=provider,
+            model=model,
+            status=run_status,
+            min_duration_ms=min_duration_ms,
+            max_duration_ms=max_duration_ms,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def _format_sse(event: ExperimentEvent) -> bytes:
+    """Encode an event in the text/event-stream format."""
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (event.id, event.type.encode(), json_dumps(event.data))
+
+
+async def _sse_stream(subscription: Subscription) -> AsyncIterator[bytes]:
+    try:
+        while True:
+            try:
+                event = await subscription.get(timeout=SSE_HEARTBEAT_SECONDS)
+            except TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            if event is None:
+                return
+            yield _format_sse(event)
+    finally:
+        subscription.unsubscribe()
+
+
+@router.get("/experiments/{experiment_id}/events")
+async def experiment_events(experiment_id: str, user: AuthenticatedUser = Depends(rate_limit)):
+    """
+    Stream an experiment's live events as Server-Sent Events.
+
+    Events: ``status`` (first a snapshot, then on every change), ``run``
+    (a finished run with the updated progress counters and aggregate
+    stats) and ``lagged`` (events dropped for a slow client). The stream
+    ends after the experiment's final status.
+    """
+    _get_owned_experiment(experiment_id, user)
+    subscription = subscribe_experiment(experiment_id)
+    return StreamingResponse(
+        _sse_stream(subscription),
+        media_type="text/event-stream",
+        headers={"cache-control": "no-cache", "x-accel-buffering": "no"},
+    )
+
+
+@router.websocket("/experiments/{experiment_id}/events")
+async def experiment_events_websocket(websocket: WebSocket, experiment_id: str, token: str | None = None):
+    """
+    Stream an experiment's live events over a WebSocket.
+
+    Browsers can't set headers on WebSockets, so the access token may be
+    passed as ``?token=``. Messages are JSON events with the same types as
+    the SSE stream; the server closes the socket after the final status.
+    Connecting counts against the user's rate limit (closed with 1013 when
+    over it), and the subscription ends as soon as the client disconnects.
+    """
+    authorization = websocket.headers.get("authorization", "")
+    try:
+        user = authenticate_token(token or authorization.removeprefix("Bearer ").strip())
+        await check_rate_limit(user)
+        _get_owned_experiment(experiment_id, user)
+    except HTTPException as e:
+        too_many = e.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER if too_many else status.WS_1008_POLICY_VIOLATION)
+        return
+
+    subscription = subscribe_experiment(experiment_id)
+    receiver = None
+    try:
+        await websocket.accept()
+        # Clients don't send anything; reading notices a disconnect even while no events arrive
+        receiver = asyncio.create_task(_wait_for_disconnect(websocket, subscription))
+        async for event in subscription:
+            if receiver.done():
+                return
+            await websocket.send_text(json_dumps(event).decode())
+        if not receiver.done():
+            await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if receiver is not None:
+            receiver.cancel()
+        subscription.unsubscribe()
+
+
+async def _wait_for_disconnect(websocket: WebSocket, subscription: Subscription) -> None:
+    """Read (and ignore) client messages until it disconnects, then end the subscription."""
+    try:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    except RuntimeError:
+        # The server closed the socket first
+        pass
+    finally:
+        subscription.close()
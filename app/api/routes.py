@@ -10,10 +10,14 @@ from fastapi import Depends
 from pydantic import BaseModel
 
 from ..core import AuthenticatedUser
-from ..core import get_current_user
+from ..core import rate_limit
+from .downloads import router as downloads_router
+from .experiments import router as experiments_router
 
 # Create main API router
 router = APIRouter()
+router.include_router(downloads_router)
+router.include_router(experiments_router)
 
 
 class MessageResponse(BaseModel):
@@ -29,7 +33,7 @@ async def get_status():
 
 
 @router.get("/protected", response_model=MessageResponse)
-async def protected_endpoint(user: AuthenticatedUser = Depends(get_current_user)):
+async def protected_endpoint(user: AuthenticatedUser = Depends(rate_limit)):
     """Example protected endpoint that requires authentication."""
     return MessageResponse(message=f"Hello {user.username}, you are authenticated!")
 
@@ -38,13 +42,7 @@ async def protected_endpoint(user: AuthenticatedUser = Depends(get_current_user)
 # These will be moved to separate router files as functionality is implemented
 
 
-@router.get("/experiments", response_model=MessageResponse)
-async def list_experiments(user: AuthenticatedUser = Depends(get_current_user)):
-    """List experiments - placeholder for experiments brick."""
-    return MessageResponse(message="Experiments functionality will be implemented")
-
-
 @router.get("/providers", response_model=MessageResponse)
-async def list_providers(user: AuthenticatedUser = Depends(get_current_user)):
+async def list_providers(user: AuthenticatedUser = Depends(rate_limit)):
     """List AI providers - placeholder for providers brick."""
     return MessageResponse(message="Providers functionality will be implemented")
@@ -5,9 +5,11 @@ This module handles all configuration through environment variables
 and provides validated settings objects.
 """
 
+import logging
 
 from pydantic import BaseModel
 from pydantic import Field
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 
 
@@ -35,6 +37,9 @@ class Settings(BaseSettings):
     # Security settings
     SECRET_KEY: str = Field(default="dev-secret-key-change-in-production", description="Secret key for JWT tokens")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=30, ge=1)
+    AUTH_TOKEN_CACHE_SIZE: int = Field(
+        default=4096, ge=0, description="Verified tokens cached until expiry (0 disables)"
+    )
 
     # Database settings
     DATABASE_URL: str = Field(default="sqlite+aiosqlite:///./shadow_cauldron.db", description="Database connection URL")
@@ -42,6 +47,71 @@ class Settings(BaseSettings):
     DB_MAX_OVERFLOW: int = Field(default=20, ge=0, le=100)
     DB_ECHO: bool = Field(default=False, description="Enable SQLAlchemy query logging")
 
+    # Logging settings
+    LOG_LEVEL: str = Field(default="INFO", description="Minimum log level (DEBUG, INFO, WARNING, ERROR, CRITICAL)")
+    LOG_FORMAT: str = Field(default="auto", description="Log format: auto (console on a terminal), json or console")
+    LOG_SAMPLE_RATES: dict[str, float] = Field(
+        default={}, description='Fraction of events kept by event name, e.g. {"Request completed": 0.01}'
+    )
+    LOG_QUEUE_SIZE: int = Field(
+        default=10000, ge=0, description="Log lines buffered for the background writer (0 writes synchronously)"
+    )
+
+    # Serialization settings
+    JSON_BACKEND: str = Field(default="auto", description="JSON backend: auto, orjson, msgspec or json")
+
+    # Response settings
+    COMPRESSION_ENABLED: bool = Field(default=True, description="Compress JSON/text responses (brotli or gzip)")
+    COMPRESSION_MINIMUM_SIZE: int = Field(default=1024, ge=0, description="Smallest response body compressed")
+
+    # Metrics
+    METRICS_ENABLED: bool = Field(default=True, description="Serve Prometheus metrics at GET /metrics")
+    METRICS_TOKEN: str | None = Field(
+        default=None, description="Bearer token scrapers send to GET /metrics (default: admin users only)"
+    )
+
+    # Storage settings
+    STORAGE_BACKEND: str = Field(default="local", description="Storage backend: local or s3")
+    STORAGE_ROOT: str = Field(default="./storage", description="Local storage root (objects or cache, index, tmp)")
+    S3_BUCKET: str | None = Field(default=None, description="Bucket for the s3 storage backend")
+    S3_ENDPOINT_URL: str = Field(default="https://s3.amazonaws.com", description="S3-compatible endpoint URL")
+    S3_REGION: str = Field(default="us-east-1")
+    S3_ACCESS_KEY_ID: str | None = Field(default=None)
+    S3_SECRET_ACCESS_KEY: str | None = Field(default=None)
+    S3_PREFIX: str = Field(default="", description="Key prefix inside the bucket")
+    S3_MAX_CONNECTIONS: int = Field(default=32, ge=1, description="S3 connection pool size")
+    STORAGE_MAINTENANCE_INTERVAL_SECONDS: float = Field(
+        default=3600, ge=0, description="Seconds between background maintenance passes (0 disables)"
+    )
+    STORAGE_UPLOAD_RETENTION_DAYS: float | None = Field(default=None, gt=0, description="Delete older uploads")
+    STORAGE_EXPERIMENT_RETENTION_DAYS: float | None = Field(default=None, gt=0, description="Delete older experiments")
+    STORAGE_EXPORT_RETENTION_DAYS: float | None = Field(default=None, gt=0, description="Delete older exports")
+    STORAGE_MAX_BYTES: int | None = Field(default=None, gt=0, description="Evict old exports/experiments above this")
+    STORAGE_COLD_AFTER_DAYS: float | None = Field(default=7, gt=0, description="Recompress finished experiments after")
+
+    # Experiment settings
+    EXPERIMENT_MAX_RUNNING: int = Field(default=4, ge=1, description="Experiments run at once by the scheduler")
+    EXPERIMENT_EVENT_BUFFER_SIZE: int = Field(
+        default=256, ge=1, description="Live events buffered per subscriber before the oldest are dropped"
+    )
+    SWEEP_MAX_EXPERIMENTS: int = Field(default=500, ge=1, description="Most experiments one sweep may expand to")
+
+    # Limits settings (per user; 0 disables a limit)
+    RATE_LIMIT_PER_SECOND: float = Field(default=10, ge=0, description="Sustained API requests per second per user")
+    RATE_LIMIT_BURST: int = Field(default=60, ge=1, description="API requests a user may make in a burst")
+    QUOTA_MAX_ACTIVE_EXPERIMENTS: int = Field(default=100, ge=0, description="Queued or running experiments per user")
+    QUOTA_MAX_QUEUED_RUNS: int = Field(
+        default=10000, ge=0, description="Runs of queued or running experiments per user"
+    )
+    LIMITS_DATABASE_URL: str | None = Field(
+        default=None, description="Database shared by replicas for limits (default: in-memory, per process)"
+    )
+    LIMITS_LEASE_SECONDS: float = Field(
+        default=900,
+        gt=0,
+        description="Seconds until a quota lease not renewed (e.g. crashed replica) expires; running jobs renew theirs",
+    )
+
     # CORS settings
     CORS_ORIGINS: list[str] = Field(default=["http://localhost:3000"])
 
@@ -53,6 +123,15 @@ class Settings(BaseSettings):
         env_prefix = "SC_"  # Shadow Cauldron prefix
         case_sensitive = True
 
+    @field_validator("LOG_LEVEL")
+    @classmethod
+    def _check_log_level(cls, value: str) -> str:
+        """Normalize the log level to upper case and reject unknown names."""
+        level = value.upper()
+        if level not in logging.getLevelNamesMapping():
+            raise ValueError(f"Unknown log level '{value}'. Supported: DEBUG, INFO, WARNING, ERROR, CRITICAL")
+        return level
+
     @property
     def database_config(self) -> DatabaseConfig:
         """Get database configuration."""
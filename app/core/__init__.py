@@ -2,26 +2,79 @@
 Core Brick
 
 PUBLIC CONTRACT:
-- setup_logging(): Initialize structured logging
+- setup_logging(): Initialize structured logging (per-event sampling, background writer)
+- start_log_writer()/stop_log_writer(): Run the background log writer (application lifespan)
 - setup_middleware(app): Configure FastAPI middleware
 - get_current_user(): Authentication dependency
 - AuthenticatedUser: User model for authenticated requests
+- authenticate_token(): Authenticate a raw bearer token (e.g. for WebSockets)
+- invalidate_token()/token_cache_stats(): Token verification cache control and metrics
+- require_metrics_access(): Dependency guarding GET /metrics (SC_METRICS_TOKEN or admin users)
+- rate_limit(): Authentication dependency that also applies the user's rate limit
+- check_rate_limit(): Apply a user's rate limit on routes that authenticate themselves (WebSockets)
+- get_limit_store()/close_limit_store(): Per-user rate limit and quota state (LimitStore)
+- QuotaExceededError: Raised when a quota lease would exceed a user's quota
+- json_dumps()/json_loads(): Fast JSON encode/decode (orjson/msgspec/stdlib)
+- FastJSONResponse: JSON response class using the fast JSON backend
+- counter()/histogram()/register_callback(): Register metrics (per-thread, lock-free updates)
+- render_metrics(): All metrics in the Prometheus text exposition format
 
 RESPONSIBILITIES:
 - Authentication and authorization
 - Request/response middleware
 - Structured logging setup
 - Security utilities
+- Rate limiting and quotas
+- JSON serialization
+- Metrics
 """
 
 from .auth import AuthenticatedUser
+from .auth import authenticate_token
 from .auth import get_current_user
+from .auth import invalidate_token
+from .auth import require_metrics_access
+from .auth import token_cache_stats
+from .limits import LimitStore
+from .limits import QuotaExceededError
+from .limits import check_rate_limit
+from .limits import close_limit_store
+from .limits import get_limit_store
+from .limits import rate_limit
 from .logging import setup_logging
+from .logging import start_log_writer
+from .logging import stop_log_writer
+from .metrics import counter
+from .metrics import histogram
+from .metrics import register_callback
+from .metrics import render_metrics
 from .middleware import setup_middleware
+from .serialization import FastJSONResponse
+from .serialization import json_dumps
+from .serialization import json_loads
 
 __all__ = [
     "setup_logging",
+    "start_log_writer",
+    "stop_log_writer",
     "setup_middleware",
     "get_current_user",
     "AuthenticatedUser",
+    "authenticate_token",
+    "invalidate_token",
+    "token_cache_stats",
+    "require_metrics_access",
+    "rate_limit",
+    "check_rate_limit",
+    "LimitStore",
+    "QuotaExceededError",
+    "get_limit_store",
+    "close_limit_store",
+    "json_dumps",
+    "json_loads",
+    "FastJSONResponse",
+    "counter",
+    "histogram",
+    "register_callback",
+    "render_metrics",
 ]
@@ -2,10 +2,22 @@
 Authentication and authorization for Shadow Cauldron.
 
 Handles JWT tokens, user authentication, and authorization dependencies.
+
+Verified tokens are kept in a bounded LRU cache (keyed by a digest of the
+signing key and token, never the token itself) until they expire, so
+repeat requests with the same token skip signature verification and
+building the user model. Tokens that must not be trusted from the cache
+can be dropped with invalidate_token(), and revocation-sensitive callers
+can force full verification with ``use_cache=False``.
 """
 
+import hashlib
+import hmac
+import time
+from collections import OrderedDict
 from datetime import datetime
 from datetime import timedelta
+from typing import Any
 
 from fastapi import Depends
 from fastapi import HTTPException
@@ -15,21 +27,114 @@ from fastapi.security import HTTPBearer
 from jose import JWTError
 from jose import jwt
 from pydantic import BaseModel
+from pydantic import ConfigDict
 
 from ..config import settings
+from .metrics import register_callback
 
 security = HTTPBearer()
 
+# For endpoints that also accept non-JWT bearer tokens
+_optional_bearer = HTTPBearer(auto_error=False)
+
 
 class AuthenticatedUser(BaseModel):
     """Model for authenticated user data."""
 
+    # Frozen: cached users are shared between requests
+    model_config = ConfigDict(frozen=True)
+
     user_id: str
     username: str
     email: str | None = None
     is_admin: bool = False
 
 
+class _VerifiedToken:
+    __slots__ = ("claims", "expires_at", "user")
+
+    def __init__(self, claims: dict[str, Any], expires_at: float | None):
+        self.claims = claims
+        self.expires_at = expires_at
+        self.user: AuthenticatedUser | None = None
+
+
+class TokenCache:
+    """Bounded LRU cache of verified tokens, each valid until its ``exp`` claim."""
+
+    def __init__(self, max_size: int):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of cached tokens (0 disables caching)
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[bytes, _VerifiedToken] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        # Including the signing key means rotating it invalidates every entry
+        return hashlib.sha256(f"{settings.SECRET_KEY}\0{token}".encode()).digest()
+
+    def get(self, token: str) -> _VerifiedToken | None:
+        """Look up an unexpired verified token."""
+        if not self.max_size:
+            return None
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= time.time():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, token: str, entry: _VerifiedToken) -> None:
+        """Cache a verified token (tokens without an expiry are not cached)."""
+        if not self.max_size or entry.expires_at is None:
+            return
+        self._entries[self._key(token)] = entry
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, token: str) -> bool:
+        """Drop a token from the cache; returns whether it was cached."""
+        return self._entries.pop(self._key(token), None) is not None
+
+    def clear(self) -> None:
+        """Drop all cached tokens."""
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Cache size and hit/miss/eviction counters."""
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+_token_cache = TokenCache(settings.AUTH_TOKEN_CACHE_SIZE)
+
+register_callback(
+    "auth_token_cache_requests",
+    "Verified token cache lookups by result",
+    lambda: {("hit",): _token_cache.hits, ("miss",): _token_cache.misses},
+    labels=("result",),
+    type="counter",
+)
+register_callback("auth_token_cache_entries", "Verified tokens cached", lambda: token_cache_stats()["size"])
+
+
 def create_access_token(data: dict) -> str:
     """
     Create a JWT access token.
@@ -47,12 +152,35 @@ def create_access_token(data: dict) -> str:
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
 
 
-def verify_token(token: str) -> dict:
+def _verify(token: str, use_cache: bool) -> _VerifiedToken:
+    if use_cache:
+        entry = _token_cache.get(token)
+        if entry is not None:
+            return entry
+
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    expires_at = payload.get("exp")
+    entry = _VerifiedToken(payload, float(expires_at) if isinstance(expires_at, int | float) else None)
+    _token_cache.put(token, entry)
+    return entry
+
+
+def verify_token(token: str, use_cache: bool = True) -> dict:
     """
     Verify and decode a JWT token.
 
     Args:
         token: JWT token string
+        use_cache: Accept a previously verified, unexpired token from the
+            cache; pass False to always check the signature and expiry
 
     Returns:
         Decoded token payload
@@ -60,23 +188,34 @@ def verify_token(token: str) -> dict:
     Raises:
         HTTPException: If token is invalid or expired
     """
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-        return payload
-    except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    return dict(_verify(token, use_cache).claims)
 
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> AuthenticatedUser:
+def invalidate_token(token: str) -> bool:
     """
-    Dependency to get the current authenticated user.
+    Drop a token from the verification cache (e.g. after revoking it).
 
-    This is the main authentication dependency that other bricks
-    can use to protect endpoints and get user information.
+    Returns:
+        Whether the token was cached
+    """
+    return _token_cache.invalidate(token)
+
+
+def token_cache_stats() -> dict[str, int]:
+    """Verification cache size and hit/miss/eviction counters."""
+    return _token_cache.stats()
+
+
+def authenticate_token(token: str, use_cache: bool = True) -> AuthenticatedUser:
+    """
+    Authenticate a bearer token.
+
+    Used where the Authorization header isn't available (e.g. WebSocket
+    query parameters); HTTP endpoints use get_current_user().
+
+    Args:
+        token: JWT token string
+        use_cache: Accept a previously verified token from the cache
 
     Returns:
         AuthenticatedUser model with user data
@@ -84,7 +223,10 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     Raises:
         HTTPException: If authentication fails
     """
-    payload = verify_token(credentials.credentials)
+    entry = _verify(token, use_cache)
+    if entry.user is not None:
+        return entry.user
+    payload = entry.claims
 
     # Extract user data from token
     user_id = payload.get("sub")
@@ -96,9 +238,51 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
 
     # In a real implementation, you might fetch user data from database
     # For now, we'll use the data from the token
-    return AuthenticatedUser(
+    entry.user = AuthenticatedUser(
         user_id=user_id,
         username=payload.get("username", "unknown"),
         email=payload.get("email"),
         is_admin=payload.get("is_admin", False),
     )
+    return entry.user
+
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> AuthenticatedUser:
+    """
+    Dependency to get the current authenticated user.
+
+    This is the main authentication dependency that other bricks
+    can use to protect endpoints and get user information.
+
+    Returns:
+        AuthenticatedUser model with user data
+
+    Raises:
+        HTTPException: If authentication fails
+    """
+    return authenticate_token(credentials.credentials)
+
+
+async def require_metrics_access(
+    credentials: HTTPAuthorizationCredentials | None = Depends(_optional_bearer),
+) -> None:
+    """
+    Dependency guarding GET /metrics.
+
+    Scrapers send SC_METRICS_TOKEN as a bearer token; admin users may also
+    read metrics with their own token.
+
+    Raises:
+        HTTPException: 401 without valid credentials, 403 for non-admin users
+    """
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    metrics_token = settings.METRICS_TOKEN
+    if metrics_token and hmac.compare_digest(credentials.credentials.encode(), metrics_token.encode()):
+        return
+    if not authenticate_token(credentials.credentials).is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Metrics require an admin user")
@@ -0,0 +1,200 @@
+"""
+Response compression for Shadow Cauldron.
+
+CompressionMiddleware compresses JSON and text responses with the best
+encoding the client accepts: brotli when the ``brotli`` package is
+installed, gzip otherwise. Small bodies are sent as-is, since compressing
+them costs more than it saves. Whole bodies are compressed in one go, and
+streamed bodies chunk by chunk.
+
+Not compressed:
+- Server-Sent Events, which must reach the client as they're written.
+- Responses that already have a Content-Encoding.
+- Responses serving byte ranges (``Accept-Ranges``). Ranges would refer
+  to the compressed bytes. File downloads are also sent with sendfile.
+
+A compressed response's strong ETag is made weak. It still validates
+conditional requests (If-None-Match uses weak comparison) but no longer
+promises byte-identical content.
+"""
+
+import zlib
+from collections.abc import Callable
+
+from starlette.datastructures import Headers
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "application/problem+json", "text/")
+
+GZIP_LEVEL = 6
+# Brotli quality 4 compresses better than gzip -6 at a similar speed
+BROTLI_QUALITY = 4
+
+
+class _Compressor:
+    """Incremental compressor with ``compress(chunk)`` and ``flush()``."""
+
+    def __init__(self, compress: Callable[[bytes], bytes], flush: Callable[[], bytes]):
+        self.compress = compress
+        self.flush = flush
+
+
+def brotli_available() -> bool:
+    """Check whether the brotli package is installed."""
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _gzip_compressor() -> _Compressor:
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip container
+    return _Compressor(compressor.compress, compressor.flush)
+
+
+def _brotli_compressor() -> _Compressor:
+    import brotli
+
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    return _Compressor(compressor.process, compressor.finish)
+
+
+def negotiate_encoding(accept_encoding: str, brotli_ok: bool) -> str | None:
+    """
+    Pick the response encoding from an Accept-Encoding header.
+
+    Returns:
+        "br", "gzip", or None to send the response uncompressed
+    """
+    accepted: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    for encoding in ("br", "gzip") if brotli_ok else ("gzip",):
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """Compress JSON and text responses (brotli or gzip, by content negotiation)."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: ASGI application
+            minimum_size: Smallest body worth compressing, in bytes
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.brotli_ok = brotli_available()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.brotli_ok)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await self.app(scope, receive, _CompressingSend(send, encoding, self.minimum_size))
+
+
+class _CompressingSend:
+    """``send`` wrapper compressing one response."""
+
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start: Message | None = None
+        self.compressor: _Compressor | None = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            if _should_compress(message):
+                self.start = message
+            else:
+                self.passthrough = True
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body":
+            # Another body transport (e.g. pathsend): send the response as-is
+            self.passthrough = True
+            if self.start is not None:
+                await self.send(self.start)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            start, self.start = self.start, None
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+
+            self.compressor = _brotli_compressor() if self.encoding == "br" else _gzip_compressor()
+            headers = MutableHeaders(scope=start)
+            headers["content-encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag is not None and not etag.startswith("W/"):
+                headers["etag"] = f"W/{etag}"
+            if more_body:
+                del headers["content-length"]
+            else:
+                body = self.compressor.compress(body) + self.compressor.flush()
+                headers["content-length"] = str(len(body))
+                await self.send(start)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            await self.send(start)
+
+        data = self.compressor.compress(body)
+        if not more_body:
+            data += self.compressor.flush()
+        if data or not more_body:
+            await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+
+def _should_compress(start: Message) -> bool:
+    status = start["status"]
+    if status < 200 or status in (204, 206, 304):
+        return False
+    headers = Headers(raw=start["headers"])
+    content_type = headers.get("content-type", "")
+    return (
+        content_type.startswith(COMPRESSIBLE_TYPES)
+        and not content_type.startswith("text/event-stream")
+        and "content-encoding" not in headers
+        and "accept-ranges" not in headers
+    )
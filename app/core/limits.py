@@ -0,0 +1,373 @@
+"""
+Per-user rate limits and quotas for Shadow Cauldron.
+
+Two kinds of limits, both keyed by user ID:
+
+- Request rate: a token bucket per user refilled at
+  SC_RATE_LIMIT_PER_SECOND up to SC_RATE_LIMIT_BURST tokens. Endpoints
+  depend on rate_limit() instead of get_current_user(); requests over the
+  limit get a 429 with Retry-After.
+- Quotas on held resources: leases (for example one per scheduled
+  experiment, weighted by its runs) that count against a user's limits
+  until released. QuotaExceededError is raised when a new lease would go
+  over them. Holders renew their leases while they keep the resource.
+
+State lives in memory by default (MemoryLimitStore), which is exact for
+a single process. With SC_LIMITS_DATABASE_URL set, SQLLimitStore keeps it
+in a shared SQL database instead so limits hold across replicas; its
+quota check is not serialized across replicas, so concurrent starts on
+different replicas may overshoot a quota by a few leases. Leases expire
+after SC_LIMITS_LEASE_SECONDS unless renewed, so a crashed replica's
+leases don't count against a user forever.
+"""
+
+import asyncio
+import math
+import time
+from abc import ABC
+from abc import abstractmethod
+
+import structlog
+from fastapi import Depends
+from fastapi import HTTPException
+from fastapi import status
+from sqlalchemy import Column
+from sqlalchemy import Float
+from sqlalchemy import Integer
+from sqlalchemy import MetaData
+from sqlalchemy import String
+from sqlalchemy import Table
+from sqlalchemy import create_engine
+from sqlalchemy import delete
+from sqlalchemy import func
+from sqlalchemy import insert
+from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from ..config import settings
+from .auth import AuthenticatedUser
+from .auth import get_current_user
+
+logger = structlog.get_logger(__name__)
+
+# Attempts at an optimistic bucket update before letting the request through
+_MAX_ATTEMPTS = 5
+
+# Seconds between sweeps of full (idle) buckets from the in-memory store
+_BUCKET_SWEEP_SECONDS = 60.0
+
+
+class QuotaExceededError(Exception):
+    """Raised when a lease would exceed a user's quota."""
+
+
+class LimitStore(ABC):
+    """Abstract store of token buckets and quota leases."""
+
+    # Whether several API replicas share the limits
+    shared = False
+
+    @abstractmethod
+    async def take(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> float:
+        """
+        Take tokens from a bucket.
+
+        Args:
+            key: Bucket key (e.g. user ID)
+            capacity: Bucket size (the allowed burst)
+            rate: Tokens added per second
+            cost: Tokens to take
+
+        Returns:
+            0 if the tokens were taken, otherwise seconds until enough are available
+        """
+
+    @abstractmethod
+    async def acquire(
+        self, owner: str, lease_id: str, units: int, max_leases: int | None, max_units: int | None, ttl: float
+    ) -> None:
+        """
+        Acquire a quota lease.
+
+        Args:
+            owner: Lease owner (e.g. user ID)
+            lease_id: Unique lease ID (acquiring an existing lease renews it)
+            units: Weight of the lease (e.g. runs)
+            max_leases: Most leases the owner may hold (None for no limit)
+            max_units: Most units the owner may hold in total (None for no limit)
+            ttl: Seconds until the lease expires if not released
+
+        Raises:
+            QuotaExceededError: If the lease would exceed a limit
+        """
+
+    @abstractmethod
+    async def renew(self, lease_id: str, ttl: float) -> bool:
+        """
+        Extend a quota lease without checking quotas again.
+
+        Args:
+            lease_id: Lease to renew
+            ttl: Seconds from now until the lease expires
+
+        Returns:
+            False if the lease no longer exists (released or expired)
+        """
+
+    @abstractmethod
+    async def release(self, lease_id: str) -> None:
+        """Release a quota lease (no-op if it doesn't exist)."""
+
+    @abstractmethod
+    async def usage(self, owner: str) -> tuple[int, int]:
+        """Number of leases and units an owner holds."""
+
+    async def close(self) -> None:  # noqa: B027
+        """Release resources held by the store."""
+
+
+class MemoryLimitStore(LimitStore):
+    """Limits of a single process, kept in memory."""
+
+    def __init__(self):
+        # key -> (tokens, updated_at, time the bucket is full again)
+        self._buckets: dict[str, tuple[float, float, float]] = {}
+        self._leases: dict[str, tuple[str, int, float]] = {}
+        self._next_sweep = time.time() + _BUCKET_SWEEP_SECONDS
+
+    async def take(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> float:
+        now = time.time()
+        if now >= self._next_sweep:
+            self._sweep_buckets(now)
+        tokens, updated_at, _ = self._buckets.get(key, (capacity, now, now))
+        tokens, retry_after = _refill(tokens, updated_at, now, capacity, rate, cost)
+        if not retry_after:
+            full_at = now + (capacity - tokens) / rate if rate > 0 else math.inf
+            self._buckets[key] = (tokens, now, full_at)
+        return retry_after
+
+    def _sweep_buckets(self, now: float) -> None:
+        """Drop buckets that have refilled (a missing bucket starts full, so this changes nothing)."""
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if bucket[2] > now}
+        self._next_sweep = now + _BUCKET_SWEEP_SECONDS
+
+    async def acquire(
+        self, owner: str, lease_id: str, units: int, max_leases: int | None, max_units: int | None, ttl: float
+    ) -> None:
+        now = time.time()
+        self._leases = {key: lease for key, lease in self._leases.items() if lease[2] > now}
+        held = [lease for key, lease in self._leases.items() if lease[0] == owner and key != lease_id]
+        _check_quota(len(held), sum(lease[1] for lease in held), units, max_leases, max_units)
+        self._leases[lease_id] = (owner, units, now + ttl)
+
+    async def renew(self, lease_id: str, ttl: float) -> bool:
+        now = time.time()
+        lease = self._leases.get(lease_id)
+        if lease is None or lease[2] <= now:
+            return False
+        self._leases[lease_id] = (lease[0], lease[1], now + ttl)
+        return True
+
+    async def release(self, lease_id: str) -> None:
+        self._leases.pop(lease_id, None)
+
+    async def usage(self, owner: str) -> tuple[int, int]:
+        now = time.time()
+        held = [lease for lease in self._leases.values() if lease[0] == owner and lease[2] > now]
+        return len(held), sum(lease[1] for lease in held)
+
+
+class SQLLimitStore(LimitStore):
+    """Limit store shared through a SQL database (SQLAlchemy URL, synchronous driver)."""
+
+    shared = True
+
+    def __init__(self, url: str):
+        """
+        Initialize the store, creating its tables if needed.
+
+        Args:
+            url: Database URL (async driver suffixes such as ``+aiosqlite`` are dropped)
+        """
+        self.engine = create_engine(url.replace("+aiosqlite", ""), pool_pre_ping=True)
+        metadata = MetaData()
+        self.buckets = Table(
+            "rate_limit_buckets",
+            metadata,
+            Column("key", String(255), primary_key=True),
+            Column("tokens", Float, nullable=False),
+            Column("updated_at", Float, nullable=False),
+        )
+        self.leases = Table(
+            "quota_leases",
+            metadata,
+            Column("lease_id", String(255), primary_key=True),
+            Column("owner", String(255), nullable=False, index=True),
+            Column("units", Integer, nullable=False),
+            Column("expires_at", Float, nullable=False),
+        )
+        metadata.create_all(self.engine)
+
+    async def take(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> float:
+        return await asyncio.to_thread(self._take, key, capacity, rate, cost)
+
+    def _take(self, key: str, capacity: float, rate: float, cost: float) -> float:
+        buckets = self.buckets.c
+        for _ in range(_MAX_ATTEMPTS):
+            now = time.time()
+            try:
+                with self.engine.begin() as conn:
+                    row = conn.execute(select(buckets.tokens, buckets.updated_at).where(buckets.key == key)).first()
+                    tokens, updated_at = (capacity, now) if row is None else row
+                    tokens, retry_after = _refill(tokens, updated_at, now, capacity, rate, cost)
+                    if retry_after:
+                        return retry_after
+                    if row is None:
+                        conn.execute(insert(self.buckets).values(key=key, tokens=tokens, updated_at=now))
+                        return 0.0
+                    # Optimistic update: only if no other replica took tokens since the read
+                    result = conn.execute(
+                        update(self.buckets)
+                        .where(buckets.key == key, buckets.updated_at == updated_at)
+                        .values(tokens=tokens, updated_at=now)
+                    )
+                    if result.rowcount == 1:
+                        return 0.0
+            except IntegrityError:
+                # Another replica created the bucket first
+                continue
+
+        logger.warning("Rate limit bucket contended, allowing request", key=key)
+        return 0.0
+
+    async def acquire(
+        self, owner: str, lease_id: str, units: int, max_leases: int | None, max_units: int | None, ttl: float
+    ) -> None:
+        await asyncio.to_thread(self._acquire, owner, lease_id, units, max_leases, max_units, ttl)
+
+    def _acquire(
+        self, owner: str, lease_id: str, units: int, max_leases: int | None, max_units: int | None, ttl: float
+    ) -> None:
+        leases = self.leases.c
+        now = time.time()
+        with self.engine.begin() as conn:
+            conn.execute(delete(self.leases).where(leases.expires_at <= now))
+            count, total = conn.execute(
+                select(func.count(), func.coalesce(func.sum(leases.units), 0)).where(
+                    leases.owner == owner, leases.lease_id != lease_id
+                )
+            ).one()
+            _check_quota(count, total, units, max_leases, max_units)
+            conn.execute(delete(self.leases).where(leases.lease_id == lease_id))
+            conn.execute(insert(self.leases).values(lease_id=lease_id, owner=owner, units=units, expires_at=now + ttl))
+
+    async def renew(self, lease_id: str, ttl: float) -> bool:
+        return await asyncio.to_thread(self._renew, lease_id, ttl)
+
+    def _renew(self, lease_id: str, ttl: float) -> bool:
+        leases = self.leases.c
+        now = time.time()
+        with self.engine.begin() as conn:
+            result = conn.execute(
+                update(self.leases)
+                .where(leases.lease_id == lease_id, leases.expires_at > now)
+                .values(expires_at=now + ttl)
+            )
+        return result.rowcount == 1
+
+    async def release(self, lease_id: str) -> None:
+        await asyncio.to_thread(self._release, lease_id)
+
+    def _release(self, lease_id: str) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(delete(self.leases).where(self.leases.c.lease_id == lease_id))
+
+    async def usage(self, owner: str) -> tuple[int, int]:
+        return await asyncio.to_thread(self._usage, owner)
+
+    def _usage(self, owner: str) -> tuple[int, int]:
+        leases = self.leases.c
+        with self.engine.connect() as conn:
+            count, total = conn.execute(
+                select(func.count(), func.coalesce(func.sum(leases.units), 0)).where(
+                    leases.owner == owner, leases.expires_at > time.time()
+                )
+            ).one()
+        return count, total
+
+    async def close(self) -> None:
+        self.engine.dispose()
+
+
+def _refill(
+    tokens: float, updated_at: float, now: float, capacity: float, rate: float, cost: float
+) -> tuple[float, float]:
+    """Refill a bucket and take ``cost`` tokens; returns (tokens left, seconds to wait or 0)."""
+    tokens = min(capacity, tokens + max(0.0, now - updated_at) * rate)
+    if tokens < cost:
+        return tokens, (cost - tokens) / rate if rate > 0 else math.inf
+    return tokens - cost, 0.0
+
+
+def _check_quota(count: int, total: int, units: int, max_leases: int | None, max_units: int | None) -> None:
+    if max_leases is not None and count + 1 > max_leases:
+        raise QuotaExceededError(f"Quota exceeded: at most {max_leases} active experiments")
+    if max_units is not None and total + units > max_units:
+        raise QuotaExceededError(f"Quota exceeded: at most {max_units} queued runs ({total} queued, {units} requested)")
+
+
+_limit_store: LimitStore | None = None
+
+
+def get_limit_store() -> LimitStore:
+    """Get the global limit store, creating it from settings on first use."""
+    global _limit_store
+    if _limit_store is None:
+        url = settings.LIMITS_DATABASE_URL
+        _limit_store = SQLLimitStore(url) if url else MemoryLimitStore()
+    return _limit_store
+
+
+async def close_limit_store() -> None:
+    """Close the global limit store (application shutdown)."""
+    global _limit_store
+    if _limit_store is not None:
+        await _limit_store.close()
+        _limit_store = None
+
+
+async def check_rate_limit(user: AuthenticatedUser) -> None:
+    """
+    Take one request from a user's rate limit (for routes that authenticate themselves, e.g. WebSockets).
+
+    Raises:
+        HTTPException: 429 if the user is over their rate limit
+    """
+    rate = settings.RATE_LIMIT_PER_SECOND
+    if rate <= 0:
+        return
+
+    retry_after = await get_limit_store().take(f"user:{user.user_id}", settings.RATE_LIMIT_BURST, rate)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+async def rate_limit(user: AuthenticatedUser = Depends(get_current_user)) -> AuthenticatedUser:
+    """
+    Dependency authenticating the user and applying their request rate limit.
+
+    Use in place of get_current_user() on endpoints that should be rate limited.
+
+    Returns:
+        AuthenticatedUser model with user data
+
+    Raises:
+        HTTPException: 401 if authentication fails, 429 if the user is over their rate limit
+    """
+    await check_rate_limit(user)
+    return user
@@ -2,38 +2,257 @@
 Logging configuration for Shadow Cauldron.
 
 Sets up structured logging using structlog.
+
+The pipeline is built to stay off the hot path:
+
+- EventSampler drops a configurable fraction of high-volume events (for
+  example ``{"Request completed": 0.01}`` keeps 1%). Kept events carry
+  ``sample_rate`` so counts can be scaled back up. Warnings and errors are
+  never sampled.
+- JSON lines are rendered with the fast JSON backend (orjson/msgspec when
+  installed, see serialization.py) straight to bytes.
+- QueueLogWriter hands rendered lines to a background thread that writes
+  them in batches, so request handlers never block on the log pipe. When
+  the queue is full, lines are dropped and the number of dropped lines is
+  logged instead of stalling the application. The thread is started by
+  start_log_writer() (application startup); lines logged before then are
+  queued.
 """
 
+import atexit
+import logging
+import queue
+import random
 import sys
+import threading
+from collections.abc import Mapping
+from typing import IO
 from typing import Any
 
 import structlog
 
+from ..config import settings
+from .serialization import json_dumps
+
+# Most lines written per batch
+_BATCH_SIZE = 512
+
+_NEVER_SAMPLED = frozenset({"warning", "warn", "error", "err", "exception", "critical", "fatal", "failure"})
+
+
+class EventSampler:
+    """structlog processor keeping a fraction of selected events."""
+
+    def __init__(self, rates: Mapping[str, float]):
+        """
+        Initialize the sampler.
+
+        Args:
+            rates: Fraction of events to keep (0..1) by event name; other events are always kept
+        """
+        self.rates = dict(rates)
+
+    def __call__(self, logger: Any, method_name: str, event_dict: dict[str, Any]) -> dict[str, Any]:
+        rate = self.rates.get(event_dict.get("event"))
+        if rate is None or rate >= 1 or method_name in _NEVER_SAMPLED:
+            return event_dict
+        if rate <= 0 or random.random() >= rate:
+            raise structlog.DropEvent
+        event_dict["sample_rate"] = rate
+        return event_dict
+
+
+def render_json(logger: Any, method_name: str, event_dict: dict[str, Any]) -> bytes:
+    """structlog renderer producing a JSON line with the fast JSON backend."""
+    return json_dumps(event_dict)
+
+
+class QueueLogWriter:
+    """Writes log lines from a background thread."""
+
+    def __init__(self, stream: IO[bytes], max_queued: int = 10000):
+        """
+        Initialize the writer (its thread starts with start()).
+
+        Args:
+            stream: Binary stream to write lines to
+            max_queued: Lines buffered before new lines are dropped
+        """
+        self.stream = stream
+        self.dropped = 0
+        self._queue: queue.Queue[bytes | None] = queue.Queue(max_queued)
+        # Serializes writes to the stream
+        self._lock = threading.Lock()
+        # Guards _closed and dropped: a line is either queued before close() or written synchronously
+        self._state_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+
+    def start(self) -> None:
+        """Start the writer thread (no-op if already started or closed)."""
+        with self._state_lock:
+            if not self._closed and self._thread.ident is None:
+                self._thread.start()
+
+    def write(self, line: bytes | str) -> None:
+        """Queue a log line without blocking."""
+        if isinstance(line, str):
+            line = line.encode()
+        with self._state_lock:
+            if not self._closed:
+                try:
+                    self._queue.put_nowait(line)
+                except queue.Full:
+                    self.dropped += 1
+                return
+        # Loggers cached before a reconfiguration keep working, synchronously
+        with self._lock:
+            self.stream.write(line + b"\n")
+            self.stream.flush()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write the queued lines and stop the thread."""
+        with self._state_lock:
+            if self._closed:
+                return
+            # Lines written from now on bypass the queue, so none land behind the stop marker
+            self._closed = True
+            if self._thread.ident is None:
+                # Never started: run the thread just to drain the queue
+                self._thread.start()
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        reported = 0
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < _BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in batch
+            lines = [line for line in batch if line is not None]
+            with self._state_lock:
+                total_dropped = self.dropped
+            if total_dropped != reported:
+                dropped, reported = total_dropped - reported, total_dropped
+                lines.append(json_dumps({"event": "Log lines dropped", "level": "warning", "count": dropped}))
+
+            if lines:
+                with self._lock:
+                    try:
+                        self.stream.write(b"\n".join(lines) + b"\n")
+                        self.stream.flush()
+                    except (OSError, ValueError):
+                        # Closed or broken stream; nothing sensible left to log to
+                        pass
+            if stop:
+                return
+
+
+class QueueLogger:
+    """structlog logger handing rendered lines to a QueueLogWriter."""
+
+    def __init__(self, writer: QueueLogWriter):
+        self._writer = writer
 
-def setup_logging() -> None:
+    def msg(self, message: bytes | str) -> None:
+        self._writer.write(message)
+
+    log = debug = info = warn = warning = msg
+    fatal = failure = err = error = critical = exception = msg
+
+
+class QueueLoggerFactory:
+    """Creates QueueLoggers sharing one writer."""
+
+    def __init__(self, writer: QueueLogWriter):
+        self.writer = writer
+
+    def __call__(self, *args: Any) -> QueueLogger:
+        return QueueLogger(self.writer)
+
+
+_writer: QueueLogWriter | None = None
+
+
+def _close_writer() -> None:
+    if _writer is not None:
+        _writer.close()
+
+
+atexit.register(_close_writer)
+
+
+def start_log_writer() -> None:
+    """Start the background log writer thread, if queueing is enabled (application startup)."""
+    if _writer is not None:
+        _writer.start()
+
+
+def stop_log_writer() -> None:
+    """Write queued log lines and stop the writer thread (application shutdown)."""
+    _close_writer()
+
+
+def setup_logging(stream: IO[bytes] | None = None) -> None:
     """
     Configure structured logging for the application.
 
     Uses structlog for consistent, structured log output that's
     both human-readable in development and machine-parsable in production.
+    Level, format, sampling and queueing come from the SC_LOG_* settings.
+    With queueing enabled, lines are written once start_log_writer() runs.
+
+    Args:
+        stream: Binary stream to log to (default: stderr)
     """
+    global _writer
+
+    stream = stream or sys.stderr.buffer
+    log_format = settings.LOG_FORMAT
+    if log_format == "auto":
+        log_format = "console" if stream.isatty() else "json"
+
+    processors: list[Any] = [
+        structlog.contextvars.merge_contextvars,
+        EventSampler(settings.LOG_SAMPLE_RATES),
+        structlog.processors.add_log_level,
+        structlog.processors.StackInfoRenderer(),
+        structlog.dev.set_exc_info,
+        structlog.processors.TimeStamper(fmt="iso"),
+    ]
+    if log_format == "console":
+        processors.append(structlog.dev.ConsoleRenderer())
+    else:
+        processors += [structlog.processors.format_exc_info, render_json]
+
+    if settings.LOG_QUEUE_SIZE > 0:
+        previous, _writer = _writer, QueueLogWriter(stream, settings.LOG_QUEUE_SIZE)
+        if previous is not None:
+            previous.close()
+        logger_factory = QueueLoggerFactory(_writer)
+    else:
+        logger_factory = structlog.BytesLoggerFactory(stream)
+        if log_format == "console":
+            processors.append(_encode)
 
     # Configure structlog
     structlog.configure(
-        processors=[
-            structlog.contextvars.merge_contextvars,
-            structlog.processors.add_log_level,
-            structlog.processors.StackInfoRenderer(),
-            structlog.dev.set_exc_info,
-            structlog.processors.TimeStamper(fmt="iso"),
-            structlog.dev.ConsoleRenderer() if sys.stderr.isatty() else structlog.processors.JSONRenderer(),
-        ],
-        wrapper_class=structlog.make_filtering_bound_logger(20),  # INFO level
-        logger_factory=structlog.WriteLoggerFactory(),
+        processors=processors,
+        wrapper_class=structlog.make_filtering_bound_logger(logging.getLevelNamesMapping()[settings.LOG_LEVEL]),
+        logger_factory=logger_factory,
         cache_logger_on_first_use=True,
     )
 
 
+def _encode(logger: Any, method_name: str, line: str) -> bytes:
+    return line.encode()
+
+
 def get_logger(name: str) -> Any:
     """Get a logger instance for a module."""
     return structlog.get_logger(name)
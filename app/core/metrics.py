@@ -0,0 +1,222 @@
+"""
+Metrics for Shadow Cauldron.
+
+A small Prometheus-compatible metrics registry. Bricks create counters
+and histograms at import time and update them on hot paths; GET /metrics
+renders everything in the Prometheus text exposition format.
+
+Updates take no locks: every thread records into its own shard of each
+metric (a plain dict only that thread writes), and scrapes sum the
+shards. An update is a dict lookup and an addition, so instrumenting
+thousands of events per second costs well under a millisecond of CPU.
+Values that already live elsewhere (queue depths, cache statistics) are
+registered as callbacks and read only when scraped.
+"""
+
+import bisect
+import math
+import threading
+from collections.abc import Callable
+from collections.abc import Iterable
+
+# Default latency buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = tuple[str, ...]
+
+
+class Metric:
+    """Base class of metrics with per-thread shards."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, description: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._shards: dict[int, dict] = {}
+
+    def _shard(self) -> dict:
+        """This thread's shard (created on first use)."""
+        ident = threading.get_ident()
+        shard = self._shards.get(ident)
+        if shard is None:
+            shard = self._shards.setdefault(ident, {})
+        return shard
+
+    def _snapshots(self) -> list[dict]:
+        # dict.copy() runs without releasing the GIL, so it is safe against concurrent updates
+        return [shard.copy() for shard in list(self._shards.values())]
+
+    def samples(self) -> Iterable[tuple[str, Labels, float]]:
+        """(sample name suffix, label values, value) for each sample."""
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    type = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Add to the count of a label combination."""
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        """Current count of a label combination."""
+        return sum(shard.get(labels, 0) for shard in self._snapshots())
+
+    def samples(self) -> Iterable[tuple[str, Labels, float]]:
+        totals: dict[Labels, float] = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0) + value
+        for labels, value in sorted(totals.items()):
+            yield "_total", labels, value
+
+
+class Histogram(Metric):
+    """Distribution of observed values in fixed buckets."""
+
+    type = "histogram"
+
+    def __init__(
+        self, name: str, description: str, labels: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record a value for a label combination."""
+        shard = self._shard()
+        counts = shard.get(labels)
+        if counts is None:
+            # One count per bucket plus +Inf, then the sum of values
+            counts = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self) -> Iterable[tuple[str, Labels, float]]:
+        totals: dict[Labels, list[float]] = {}
+        for shard in self._snapshots():
+            for labels, counts in shard.items():
+                counts = list(counts)
+                total = totals.get(labels)
+                if total is None:
+                    totals[labels] = counts
+                else:
+                    totals[labels] = [a + b for a, b in zip(total, counts, strict=True)]
+
+        for labels, counts in sorted(totals.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts, strict=False):
+                cumulative += count
+                yield "_bucket", (*labels, _format_value(bound)), cumulative
+            yield "_sum", labels, counts[-1]
+            yield "_count", labels, cumulative
+
+
+class CallbackMetric(Metric):
+    """Gauge or counter whose values are read from a callback at scrape time."""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        callback: Callable[[], dict[Labels, float] | float],
+        labels: Iterable[str] = (),
+        type: str = "gauge",
+    ):
+        super().__init__(name, description, labels)
+        self.type = type
+        self.callback = callback
+
+    def samples(self) -> Iterable[tuple[str, Labels, float]]:
+        values = self.callback()
+        if not isinstance(values, dict):
+            values = {(): values}
+        suffix = "_total" if self.type == "counter" else ""
+        for labels, value in sorted(values.items()):
+            yield suffix, labels, value
+
+
+class MetricsRegistry:
+    """Named metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """Add a metric; registering a name again returns the existing metric."""
+        return self._metrics.setdefault(metric.name, metric)
+
+    def get(self, name: str) -> Metric | None:
+        """Look up a metric by name."""
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format (0.0.4)."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            label_names = (*metric.labels, "le") if metric.type == "histogram" else metric.labels
+            try:
+                for suffix, labels, value in metric.samples():
+                    names = label_names if suffix == "_bucket" else metric.labels
+                    lines.append(f"{metric.name}{suffix}{_format_labels(names, labels)} {_format_value(value)}")
+            except Exception as e:
+                lines.append(f"# {metric.name} unavailable: {e}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(names: Labels, values: Labels) -> str:
+    if not names:
+        return ""
+    pairs = (f'{name}="{_escape(str(value))}"' for name, value in zip(names, values, strict=False))
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+# Global registry - bricks register their metrics here
+registry = MetricsRegistry()
+
+
+def counter(name: str, description: str, labels: Iterable[str] = ()) -> Counter:
+    """Create (or get) a counter in the global registry."""
+    return registry.register(Counter(name, description, labels))
+
+
+def histogram(
+    name: str, description: str, labels: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS
+) -> Histogram:
+    """Create (or get) a histogram in the global registry."""
+    return registry.register(Histogram(name, description, labels, buckets))
+
+
+def register_callback(
+    name: str,
+    description: str,
+    callback: Callable[[], dict[Labels, float] | float],
+    labels: Iterable[str] = (),
+    type: str = "gauge",
+) -> CallbackMetric:
+    """Register a gauge (or counter) read from a callback when metrics are scraped."""
+    return registry.register(CallbackMetric(name, description, callback, labels, type))
+
+
+def render_metrics() -> str:
+    """Render the global registry in the Prometheus text format."""
+    return registry.render()
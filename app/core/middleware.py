@@ -2,90 +2,153 @@
 Middleware configuration for Shadow Cauldron.
 
 Handles request/response processing, logging, and error handling.
+
+RequestLoggingMiddleware is a pure ASGI middleware rather than a
+BaseHTTPMiddleware (``@app.middleware("http")``): it wraps ``send``
+instead of buffering the response through an extra task and memory
+stream, so streaming bodies (Server-Sent Events, downloads) pass through
+untouched and each request skips the per-request task overhead. It also
+records request counts and latencies by route template for /metrics.
 """
 
 import time
 import uuid
-from collections.abc import Callable
 
 import structlog
 from fastapi import FastAPI
-from fastapi import Request
-from fastapi import Response
 from fastapi.responses import JSONResponse
+from starlette.datastructures import URL
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from ..config import settings
+from .compression import CompressionMiddleware
+from .metrics import counter
+from .metrics import histogram
 
 logger = structlog.get_logger(__name__)
 
+CORRELATION_ID_HEADER = "X-Correlation-ID"
+
+REQUESTS = counter("http_requests", "HTTP requests by method, route and status", ("method", "route", "status"))
+REQUEST_DURATION = histogram(
+    "http_request_duration_seconds", "HTTP request latency (whole body sent) by method and route", ("method", "route")
+)
 
-def setup_middleware(app: FastAPI) -> None:
-    """
-    Configure middleware for the FastAPI application.
 
-    Adds request logging, correlation IDs, and error handling.
+class RequestLoggingMiddleware:
     """
+    Log requests and responses with correlation IDs.
+
+    Adds structured logging for all HTTP requests including timing,
+    status codes, and correlation IDs for tracing. The correlation ID is
+    available as ``request.state.correlation_id`` and returned in the
+    X-Correlation-ID response header. Unhandled errors are logged and
+    answered with a generic 500 response, unless the response has already
+    started.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-    @app.middleware("http")
-    async def request_logging_middleware(request: Request, call_next: Callable) -> Response:
-        """
-        Log requests and responses with correlation IDs.
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        Adds structured logging for all HTTP requests including timing,
-        status codes, and correlation IDs for tracing.
-        """
         # Generate correlation ID for request tracing
         correlation_id = str(uuid.uuid4())
+        scope.setdefault("state", {})["correlation_id"] = correlation_id
 
-        # Add correlation ID to request state
-        request.state.correlation_id = correlation_id
-
-        # Start timer
-        start_time = time.time()
-
-        # Log incoming request
+        start_time = time.perf_counter()
+        client = scope.get("client")
         logger.info(
             "Request started",
             correlation_id=correlation_id,
-            method=request.method,
-            url=str(request.url),
-            client_ip=request.client.host if request.client else None,
+            method=scope["method"],
+            url=str(URL(scope=scope)),
+            client_ip=client[0] if client else None,
         )
 
-        try:
-            # Process request
-            response = await call_next(request)
-
-            # Calculate processing time
-            process_time = time.time() - start_time
-
-            # Add correlation ID to response headers
-            response.headers["X-Correlation-ID"] = correlation_id
-
-            # Log response
-            logger.info(
-                "Request completed",
-                correlation_id=correlation_id,
-                status_code=response.status_code,
-                process_time=round(process_time * 1000, 2),  # milliseconds
-            )
+        status_code = None
 
-            return response
+        async def send_with_correlation_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append(CORRELATION_ID_HEADER, correlation_id)
+            await send(message)
 
+        try:
+            await self.app(scope, receive, send_with_correlation_id)
         except Exception as exc:
-            # Calculate processing time for failed requests
-            process_time = time.time() - start_time
-
-            # Log error
             logger.error(
                 "Request failed",
                 correlation_id=correlation_id,
                 error=str(exc),
-                process_time=round(process_time * 1000, 2),
+                process_time=_elapsed_ms(start_time),
                 exc_info=True,
             )
+            if status_code is not None:
+                # Too late for an error response; let the server drop the connection
+                raise
 
             # Return generic error response
-            return JSONResponse(
+            response = JSONResponse(
                 status_code=500,
                 content={"error": "Internal server error", "correlation_id": correlation_id},
-                headers={"X-Correlation-ID": correlation_id},
+                headers={CORRELATION_ID_HEADER: correlation_id},
             )
+            await response(scope, receive, send)
+            _record(scope, 500, start_time)
+            return
+
+        # Logged once the whole body was sent, so streamed responses are timed in full
+        logger.info(
+            "Request completed",
+            correlation_id=correlation_id,
+            status_code=status_code,
+            process_time=_elapsed_ms(start_time),
+        )
+        _record(scope, status_code, start_time)
+
+
+def _record(scope: Scope, status_code: int | None, start_time: float) -> None:
+    # Label by route template (not raw path) to keep the number of series bounded
+    route = _route_template(scope)
+    method = scope["method"]
+    REQUESTS.inc(method, route, str(status_code or 0))
+    REQUEST_DURATION.observe(time.perf_counter() - start_time, method, route)
+
+
+def _route_template(scope: Scope) -> str:
+    """Path template of the matched route, e.g. "/api/v1/experiments/{experiment_id}"."""
+    template = getattr(scope.get("route"), "path", None)
+    if not template:
+        return "unmatched"
+    # Routes of an included router report their path without the router's
+    # (static) prefix; take the prefix from the leading segments of the request path
+    segments = scope["path"].split("/")
+    prefix = "/".join(segments[: max(1, len(segments) - template.count("/"))])
+    return prefix + template
+
+
+def _elapsed_ms(start_time: float) -> float:
+    return round((time.perf_counter() - start_time) * 1000, 2)
+
+
+def setup_middleware(app: FastAPI) -> None:
+    """
+    Configure middleware for the FastAPI application.
+
+    Adds response compression, request logging, correlation IDs, and
+    error handling.
+    """
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+    # Added last so it is outermost and logs what is actually sent
+    app.add_middleware(RequestLoggingMiddleware)
@@ -0,0 +1,145 @@
+"""
+JSON serialization for Shadow Cauldron.
+
+Provides a single fast JSON encode/decode path used by providers, storage
+and API responses. Uses orjson or msgspec when installed and falls back
+to the standard library json module otherwise.
+"""
+
+import json
+from collections.abc import Callable
+from datetime import date
+from datetime import datetime
+from enum import Enum
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from ..config import settings
+
+
+def _default(obj: Any) -> Any:
+    """Encode types the JSON backends don't handle natively."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, datetime | date):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, set | frozenset | tuple):
+        return list(obj)
+    return str(obj)
+
+
+class JSONBackend:
+    """A named pair of encode/decode functions."""
+
+    def __init__(self, name: str, dumps: Callable[[Any, bool], bytes], loads: Callable[[bytes | str], Any]):
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+
+
+def _stdlib_backend() -> JSONBackend:
+    def dumps(obj: Any, indent: bool) -> bytes:
+        if indent:
+            return json.dumps(obj, default=_default, ensure_ascii=False, indent=2).encode()
+        return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+    return JSONBackend("json", dumps, json.loads)
+
+
+def _orjson_backend() -> JSONBackend:
+    import orjson
+
+    options = orjson.OPT_NON_STR_KEYS
+    indent_options = options | orjson.OPT_INDENT_2
+
+    def dumps(obj: Any, indent: bool) -> bytes:
+        return orjson.dumps(obj, default=_default, option=indent_options if indent else options)
+
+    return JSONBackend("orjson", dumps, orjson.loads)
+
+
+def _msgspec_backend() -> JSONBackend:
+    import msgspec
+
+    encoder = msgspec.json.Encoder(enc_hook=_default)
+    decoder = msgspec.json.Decoder()
+
+    def dumps(obj: Any, indent: bool) -> bytes:
+        data = encoder.encode(obj)
+        return msgspec.json.format(data, indent=2) if indent else data
+
+    return JSONBackend("msgspec", dumps, decoder.decode)
+
+
+_BACKEND_FACTORIES: dict[str, Callable[[], JSONBackend]] = {
+    "orjson": _orjson_backend,
+    "msgspec": _msgspec_backend,
+    "json": _stdlib_backend,
+}
+
+_backend: JSONBackend | None = None
+
+
+def set_json_backend(name: str = "auto") -> str:
+    """
+    Select the JSON backend.
+
+    Args:
+        name: "orjson", "msgspec", "json", or "auto" for the fastest installed backend
+
+    Returns:
+        Name of the selected backend
+
+    Raises:
+        ValueError: If the backend name is unknown
+        ImportError: If an explicitly requested backend is not installed
+    """
+    global _backend
+
+    if name == "auto":
+        for candidate in ("orjson", "msgspec"):
+            try:
+                _backend = _BACKEND_FACTORIES[candidate]()
+                return _backend.name
+            except ImportError:
+                continue
+        name = "json"
+
+    if name not in _BACKEND_FACTORIES:
+        raise ValueError(f"Unknown JSON backend '{name}'. Available: {list(_BACKEND_FACTORIES)}")
+
+    _backend = _BACKEND_FACTORIES[name]()
+    return _backend.name
+
+
+def get_json_backend() -> JSONBackend:
+    """Get the active JSON backend, selecting it from settings on first use."""
+    if _backend is None:
+        set_json_backend(settings.JSON_BACKEND)
+    return _backend
+
+
+def json_dumps(obj: Any, indent: bool = False) -> bytes:
+    """
+    Encode an object to UTF-8 JSON bytes.
+
+    Datetimes, enums and pydantic models are encoded natively; other
+    unknown types fall back to ``str()``.
+    """
+    return get_json_backend().dumps(obj, indent)
+
+
+def json_loads(data: bytes | str) -> Any:
+    """Decode JSON bytes or text."""
+    return get_json_backend().loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with the active fast JSON backend."""
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
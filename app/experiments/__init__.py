@@ -6,7 +6,14 @@ PUBLIC CONTRACT:
 - Experiment: Experiment model
 - ExperimentRun: Individual run model
 - create_experiment(): Factory function
-- run_experiment(): Execution function
+- create_sweep(): Create (and optionally start) the experiments of a parameter sweep (SweepConfig)
+- run_experiment(): Execution function (runs inline)
+- start_experiment(): Schedule an experiment on the background scheduler
+- enqueue_experiment(): Schedule an experiment within its creator's quotas (QuotaExceededError)
+- cancel_experiment(): Cancel a pending, queued or running experiment
+- get_experiment()/list_experiments(): Look up experiments and their progress
+- subscribe_experiment(): Subscribe to an experiment's live events (Subscription, ExperimentEvent)
+- shutdown_experiments(): Cancel scheduled experiments (application shutdown)
 
 RESPONSIBILITIES:
 - Experiment design and configuration
@@ -16,9 +23,43 @@ RESPONSIBILITIES:
 """
 
 from .engine import ExperimentEngine
+from .engine import cancel_experiment
 from .engine import create_experiment
+from .engine import create_sweep
+from .engine import enqueue_experiment
+from .engine import get_experiment
+from .engine import list_experiments
 from .engine import run_experiment
+from .engine import shutdown_experiments
+from .engine import start_experiment
+from .engine import subscribe_experiment
+from .events import ExperimentEvent
+from .events import Subscription
 from .models import Experiment
+from .models import ExperimentConfig
+from .models import ExperimentProgress
 from .models import ExperimentRun
+from .models import ExperimentStatus
+from .models import SweepConfig
 
-__all__ = ["ExperimentEngine", "Experiment", "ExperimentRun", "create_experiment", "run_experiment"]
+__all__ = [
+    "ExperimentEngine",
+    "Experiment",
+    "ExperimentConfig",
+    "ExperimentProgress",
+    "ExperimentRun",
+    "ExperimentStatus",
+    "SweepConfig",
+    "ExperimentEvent",
+    "Subscription",
+    "create_experiment",
+    "create_sweep",
+    "run_experiment",
+    "start_experiment",
+    "enqueue_experiment",
+    "cancel_experiment",
+    "get_experiment",
+    "list_experiments",
+    "subscribe_experiment",
+    "shutdown_experiments",
+]
@@ -2,25 +2,94 @@
 Experiment execution engine.
 
 Orchestrates the execution of experiments across multiple providers.
+
+Experiments can be run inline (``run_experiment``) or handed to the
+engine's background scheduler (``start_experiment``), which runs at most
+``max_running`` experiments at once as asyncio tasks, queues the rest,
+and supports cancellation. Progress counters on the experiment are
+updated as runs finish, and finished experiments are persisted to storage.
+
+Scheduled experiments append finished runs to their storage run log in
+batches and drop them, so memory stays flat however many rows a dataset
+has; their runs are read back a page at a time. Inline runs keep their
+runs on the result.
+
+Status changes and finished runs are published to ``engine.events``
+(see events.py) for live progress streams.
 """
 
 import asyncio
+import contextlib
+import time
 import uuid
+from collections.abc import AsyncIterator
 from datetime import datetime
 from typing import Any
 
 import structlog
 
+from ..config import settings
+from ..core import counter
+from ..core import get_limit_store
+from ..core import histogram
+from ..core import register_callback
+from ..providers import ProviderUnavailableError
 from ..providers import get_provider
+from ..providers import is_retryable_error
 from ..providers.base import CompletionRequest
+from ..providers.base import CompletionResponse
+from ..storage import append_experiment_runs
+from ..storage import count_dataset_rows
+from ..storage import get_file
+from ..storage import iter_dataset
+from ..storage import register_file_user
+from ..storage import save_experiment_data
+from ..storage import seal_experiment_runs
+from .events import EventBroker
+from .events import Subscription
 from .models import Experiment
 from .models import ExperimentConfig
+from .models import ExperimentProgress
 from .models import ExperimentResult
 from .models import ExperimentRun
 from .models import ExperimentStatus
+from .models import SweepConfig
 
 logger = structlog.get_logger(__name__)
 
+FINISHED_STATUSES = (ExperimentStatus.COMPLETED, ExperimentStatus.FAILED, ExperimentStatus.CANCELLED)
+
+# Run fields sent in live events (responses are fetched separately)
+RUN_EVENT_FIELDS = {
+    "run_id",
+    "provider",
+    "model",
+    "test_case_index",
+    "status",
+    "duration_ms",
+    "prompt_tokens_estimate",
+    "error_message",
+    "served_by",
+    "attempts",
+}
+
+# Finished runs appended to the run log at a time by scheduled experiments
+RUN_APPEND_BATCH_SIZE = 100
+
+RUNS = counter("experiment_runs", "Finished experiment runs by status", ("status",))
+PROVIDER_REQUESTS = counter(
+    "provider_requests", "Provider completion requests by provider and outcome", ("provider", "outcome")
+)
+PROVIDER_LATENCY = histogram("provider_request_duration_seconds", "Provider completion latency", ("provider",))
+PROVIDER_ERRORS = counter(
+    "provider_errors", "Failed provider requests by provider and error type", ("provider", "error")
+)
+PROVIDER_RETRIES = counter(
+    "provider_retries",
+    "Runs retried on the next fallback target after a retryable error, by failed provider",
+    ("provider",),
+)
+
 
 class ExperimentEngine:
     """
@@ -30,8 +99,26 @@ class ExperimentEngine:
     of experiments that compare AI providers and models.
     """
 
-    def __init__(self):
+    def __init__(self, max_running: int | None = None):
+        """
+        Initialize the engine.
+
+        Args:
+            max_running: Experiments the scheduler runs at once (defaults to SC_EXPERIMENT_MAX_RUNNING)
+        """
         self.active_experiments: dict[str, Experiment] = {}
+        self.max_running = max_running or settings.EXPERIMENT_MAX_RUNNING
+
+        # Background scheduler state
+        self._slots = asyncio.Semaphore(self.max_running)
+        self._jobs: dict[str, asyncio.Task] = {}
+        # Experiments holding a quota lease in the limit store
+        self._leases: set[str] = set()
+        # Runs currently executing, across all experiments
+        self.runs_in_flight = 0
+
+        # Live status and run events
+        self.events = EventBroker(settings.EXPERIMENT_EVENT_BUFFER_SIZE)
 
     async def create_experiment(self, config: ExperimentConfig, created_by: str) -> Experiment:
         """
@@ -43,27 +130,103 @@ class ExperimentEngine:
 
         Returns:
             Created experiment instance
-        """
-        experiment_id = str(uuid.uuid4())
 
-        experiment = Experiment(
-            experiment_id=experiment_id,
-            created_by=created_by,
-            created_at=datetime.utcnow(),
-            config=config,
-        )
-
-        self.active_experiments[experiment_id] = experiment
+        Raises:
+            FileNotFoundError: If the config's dataset doesn't exist or belongs to another user
+            ValueError: If the dataset is not a supported format
+        """
+        experiment = self._new_experiment(config, created_by, await self._dataset_rows(config, created_by))
+        self.active_experiments[experiment.experiment_id] = experiment
 
         logger.info(
             "Experiment created",
-            experiment_id=experiment_id,
+            experiment_id=experiment.experiment_id,
             providers=config.providers,
             test_cases=len(config.test_cases),
+            dataset=config.dataset.file_id if config.dataset else None,
         )
 
         return experiment
 
+    async def create_sweep(self, sweep: SweepConfig, created_by: str, start: bool = False) -> list[Experiment]:
+        """
+        Create the experiments of a parameter sweep.
+
+        The sweep's base config was validated once; each experiment shares
+        it with only the swept fields replaced. Creation is all or
+        nothing: with ``start``, quota leases for every experiment are
+        taken first, and if any would exceed the creator's quota none of
+        the experiments are created.
+
+        Args:
+            sweep: Base config and parameter grid
+            created_by: User ID who created the sweep
+            start: Also schedule every experiment on the background scheduler
+
+        Returns:
+            The sweep's experiments, in grid order
+
+        Raises:
+            QuotaExceededError: If starting the sweep would exceed the creator's quotas
+            FileNotFoundError: If the base config's dataset doesn't exist or belongs to another user
+            ValueError: If the dataset is not a supported format
+        """
+        sweep_id = str(uuid.uuid4())
+        # The dataset isn't sweepable, so every experiment reads the same rows
+        dataset_rows = await self._dataset_rows(sweep.base, created_by)
+        experiments = [
+            self._new_experiment(config, created_by, dataset_rows, sweep_id=sweep_id, sweep_params=params)
+            for params, config in sweep.expand()
+        ]
+        if start:
+            await self._acquire_leases(experiments)
+
+        for experiment in experiments:
+            self.active_experiments[experiment.experiment_id] = experiment
+        if start:
+            for experiment in experiments:
+                self._schedule(experiment)
+
+        logger.info(
+            "Sweep created",
+            sweep_id=sweep_id,
+            experiments=len(experiments),
+            grid={field: len(values) for field, values in sweep.grid.items()},
+            started=start,
+        )
+        return experiments
+
+    async def _dataset_rows(self, config: ExperimentConfig, created_by: str) -> int:
+        """Check the creator may read the config's dataset and count the test cases it yields."""
+        dataset = config.dataset
+        if dataset is None:
+            return 0
+        file_info = await get_file(dataset.file_id)
+        if file_info is None or file_info.get("owner_id") != created_by:
+            # Other users' files are reported as missing
+            raise FileNotFoundError(f"Dataset file {dataset.file_id} not found")
+        return await count_dataset_rows(
+            dataset.file_id, dataset.row_start, dataset.row_end, dataset.sample_rate, dataset.seed
+        )
+
+    def _new_experiment(
+        self,
+        config: ExperimentConfig,
+        created_by: str,
+        dataset_rows: int = 0,
+        sweep_id: str | None = None,
+        sweep_params: dict[str, Any] | None = None,
+    ) -> Experiment:
+        return Experiment(
+            experiment_id=str(uuid.uuid4()),
+            created_by=created_by,
+            created_at=datetime.utcnow(),
+            config=config,
+            sweep_id=sweep_id,
+            sweep_params=sweep_params,
+            progress=ExperimentProgress(total_runs=_count_runs(config, dataset_rows)),
+        )
+
     async def run_experiment(self, experiment_id: str) -> ExperimentResult:
         """
         Execute an experiment.
@@ -85,29 +248,44 @@ class ExperimentEngine:
         if experiment.status != ExperimentStatus.PENDING:
             raise ValueError(f"Experiment {experiment_id} is not pending (status: {experiment.status})")
 
-        # Update experiment status
+        return await self._run(experiment)
+
+    async def _run(self, experiment: Experiment, persist: bool = False) -> ExperimentResult:
+        """
+        Execute an experiment, recording its outcome on the experiment.
+
+        With ``persist``, a successful experiment is saved to storage before
+        it is reported completed, so its runs can be listed as soon as it is.
+        """
+        experiment_id = experiment.experiment_id
         experiment.status = ExperimentStatus.RUNNING
         experiment.started_at = datetime.utcnow()
+        self._publish_status(experiment)
 
         logger.info("Starting experiment execution", experiment_id=experiment_id)
 
+        # Persisted experiments stream finished runs to storage instead of holding them
+        collector = _RunCollector(experiment_id, keep_runs=not persist, batch_size=RUN_APPEND_BATCH_SIZE)
         try:
-            # Generate all run configurations
-            runs = self._generate_runs(experiment.config)
+            # Open connections before any run is timed
+            warmup_ms = await self._warmup_providers(experiment.config)
 
-            # Execute runs
-            if experiment.config.parallel:
-                completed_runs = await self._execute_parallel(runs)
-            else:
-                completed_runs = await self._execute_sequential(runs)
+            # Generate runs lazily and execute them as they are produced
+            runs = self._generate_runs(experiment.config)
+            await self._execute_runs(runs, experiment.config, collector, experiment)
+            await collector.flush()
 
             # Create result
-            result = self._create_result(experiment_id, completed_runs)
+            result = collector.result()
+            result.warmup_ms = warmup_ms
 
             # Update experiment
-            experiment.status = ExperimentStatus.COMPLETED
             experiment.completed_at = datetime.utcnow()
             experiment.result = result
+            if persist:
+                await self._persist(experiment, ExperimentStatus.COMPLETED)
+            experiment.status = ExperimentStatus.COMPLETED
+            self._publish_status(experiment)
 
             logger.info(
                 "Experiment completed",
@@ -118,22 +296,335 @@ class ExperimentEngine:
 
             return result
 
+        except asyncio.CancelledError:
+            await self._save_partial_runs(experiment_id, collector)
+            self._cancelled(experiment)
+            raise
+
         except Exception as e:
+            await self._save_partial_runs(experiment_id, collector)
             experiment.status = ExperimentStatus.FAILED
             experiment.completed_at = datetime.utcnow()
+            experiment.error_message = str(e)
+            self._publish_status(experiment)
             logger.error("Experiment failed", experiment_id=experiment_id, error=str(e))
             raise
 
-    def _generate_runs(self, config: ExperimentConfig) -> list[ExperimentRun]:
-        """Generate all run configurations for the experiment."""
-        runs = []
+    async def _save_partial_runs(self, experiment_id: str, collector: "_RunCollector") -> None:
+        """Append the runs a failed or cancelled experiment finished but hasn't written yet."""
+        try:
+            await collector.flush()
+        except Exception as e:
+            logger.error("Failed to save finished runs", experiment_id=experiment_id, error=str(e))
+
+    def get_experiment(self, experiment_id: str) -> Experiment | None:
+        """Get an experiment by ID."""
+        return self.active_experiments.get(experiment_id)
+
+    def list_experiments(self, created_by: str | None = None) -> list[Experiment]:
+        """List experiments, newest first, optionally only those created by one user."""
+        experiments = [
+            experiment
+            for experiment in self.active_experiments.values()
+            if created_by is None or experiment.created_by == created_by
+        ]
+        return sorted(experiments, key=lambda experiment: experiment.created_at, reverse=True)
+
+    def start_experiment(self, experiment_id: str) -> Experiment:
+        """
+        Schedule an experiment to run in the background.
 
+        Returns immediately; the experiment is queued until one of the
+        scheduler's ``max_running`` slots is free. Must be called from a
+        running event loop.
+
+        Returns:
+            The experiment (status ``queued``)
+
+        Raises:
+            KeyError: If experiment not found
+            ValueError: If experiment is not in pending status
+        """
+        experiment = self.active_experiments.get(experiment_id)
+        if not experiment:
+            raise KeyError(f"Experiment {experiment_id} not found")
+
+        if experiment.status != ExperimentStatus.PENDING:
+            raise ValueError(f"Experiment {experiment_id} is not pending (status: {experiment.status})")
+
+        self._schedule(experiment)
+        return experiment
+
+    def _schedule(self, experiment: Experiment) -> None:
+        experiment_id = experiment.experiment_id
+        experiment.status = ExperimentStatus.QUEUED
+        self._publish_status(experiment)
+        self._jobs[experiment_id] = asyncio.create_task(self._run_job(experiment), name=f"experiment-{experiment_id}")
+
+        logger.info("Experiment queued", experiment_id=experiment_id, running=self.running_count)
+
+    async def enqueue_experiment(self, experiment_id: str) -> Experiment:
+        """
+        Schedule an experiment within its creator's quotas.
+
+        Like start_experiment(), but the experiment first takes a lease on
+        the creator's quotas of queued or running experiments and of their
+        runs (SC_QUOTA_*). The lease is released when the job ends.
+
+        Returns:
+            The experiment (status ``queued``)
+
+        Raises:
+            KeyError: If experiment not found
+            ValueError: If experiment is not in pending status
+            QuotaExceededError: If the creator is at their quota
+        """
+        experiment = self.active_experiments.get(experiment_id)
+        if not experiment:
+            raise KeyError(f"Experiment {experiment_id} not found")
+        if experiment.status != ExperimentStatus.PENDING:
+            raise ValueError(f"Experiment {experiment_id} is not pending (status: {experiment.status})")
+
+        await self._acquire_leases([experiment])
+        try:
+            return self.start_experiment(experiment_id)
+        except Exception:
+            if experiment_id in self._leases:
+                self._leases.discard(experiment_id)
+                await self._release_lease(experiment_id)
+            raise
+
+    async def _acquire_leases(self, experiments: list[Experiment]) -> None:
+        """Take quota leases for experiments about to be scheduled (all or none)."""
+        max_experiments = settings.QUOTA_MAX_ACTIVE_EXPERIMENTS or None
+        max_runs = settings.QUOTA_MAX_QUEUED_RUNS or None
+        if max_experiments is None and max_runs is None:
+            return
+
+        store = get_limit_store()
+        acquired: list[str] = []
+        try:
+            for experiment in experiments:
+                await store.acquire(
+                    experiment.created_by,
+                    _lease_id(experiment.experiment_id),
+                    experiment.progress.total_runs or 0,
+                    max_experiments,
+                    max_runs,
+                    settings.LIMITS_LEASE_SECONDS,
+                )
+                acquired.append(experiment.experiment_id)
+        except Exception:
+            for experiment_id in acquired:
+                await self._release_lease(experiment_id)
+            raise
+        self._leases.update(acquired)
+
+    async def cancel_experiment(self, experiment_id: str) -> Experiment:
+        """
+        Cancel a pending, queued or running experiment.
+
+        Runs in flight are cancelled; their partial progress stays on the experiment.
+
+        Raises:
+            KeyError: If experiment not found
+            ValueError: If the experiment has already finished
+        """
+        experiment = self.active_experiments.get(experiment_id)
+        if not experiment:
+            raise KeyError(f"Experiment {experiment_id} not found")
+
+        if experiment.status in FINISHED_STATUSES:
+            raise ValueError(f"Experiment {experiment_id} has already finished (status: {experiment.status})")
+
+        task = self._jobs.get(experiment_id)
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        else:
+            self._cancelled(experiment)
+        return experiment
+
+    def subscribe(self, experiment_id: str) -> Subscription:
+        """
+        Subscribe to an experiment's live events.
+
+        The first event is a ``status`` snapshot; the subscription ends after
+        the experiment's final status event.
+
+        Raises:
+            KeyError: If experiment not found
+        """
+        experiment = self.active_experiments.get(experiment_id)
+        if not experiment:
+            raise KeyError(f"Experiment {experiment_id} not found")
+
+        subscription = self.events.subscribe(experiment_id)
+        subscription.push(self.events.event(experiment_id, "status", _status_data(experiment)))
+        if experiment.status in FINISHED_STATUSES:
+            subscription.close()
+            subscription.unsubscribe()
+        return subscription
+
+    def _publish_status(self, experiment: Experiment) -> None:
+        """Publish an experiment's status (the final one closes its subscriptions)."""
+        self.events.publish(
+            experiment.experiment_id,
+            "status",
+            _status_data(experiment),
+            final=experiment.status in FINISHED_STATUSES,
+        )
+
+    def _cancelled(self, experiment: Experiment) -> None:
+        experiment.status = ExperimentStatus.CANCELLED
+        experiment.completed_at = datetime.utcnow()
+        self._publish_status(experiment)
+        logger.info("Experiment cancelled", experiment_id=experiment.experiment_id)
+
+    def _run_finished(self, experiment: Experiment, run: ExperimentRun) -> None:
+        """Count a finished run and publish it with the updated progress."""
+        experiment.progress.record(run)
+        self.events.publish(
+            experiment.experiment_id,
+            "run",
+            {
+                "run": run.model_dump(mode="json", include=RUN_EVENT_FIELDS),
+                "progress": experiment.progress.model_dump(),
+            },
+        )
+
+    @property
+    def running_count(self) -> int:
+        """Experiments currently running on the scheduler."""
+        return sum(
+            1 for experiment in self.active_experiments.values() if experiment.status == ExperimentStatus.RUNNING
+        )
+
+    async def _run_job(self, experiment: Experiment) -> None:
+        """Scheduler task: wait for a slot, run the experiment, and persist it."""
+        renewal = None
+        if experiment.experiment_id in self._leases:
+            renewal = asyncio.create_task(self._renew_lease(experiment.experiment_id))
+        try:
+            async with self._slots:
+                await self._run(experiment, persist=True)
+        except asyncio.CancelledError:
+            # Cancelled while still queued
+            if experiment.status == ExperimentStatus.QUEUED:
+                self._cancelled(experiment)
+        except Exception:
+            # Already recorded on the experiment and logged by _run
+            pass
+        finally:
+            if renewal is not None:
+                renewal.cancel()
+            if experiment.status != ExperimentStatus.COMPLETED:
+                await self._persist(experiment)
+            if experiment.experiment_id in self._leases:
+                self._leases.discard(experiment.experiment_id)
+                await self._release_lease(experiment.experiment_id)
+            self._jobs.pop(experiment.experiment_id, None)
+
+    async def _renew_lease(self, experiment_id: str) -> None:
+        """Keep a job's quota lease from expiring while it is queued or running."""
+        ttl = settings.LIMITS_LEASE_SECONDS
+        while True:
+            await asyncio.sleep(ttl / 3)
+            try:
+                if not await get_limit_store().renew(_lease_id(experiment_id), ttl):
+                    logger.warning("Quota lease expired before it was renewed", experiment_id=experiment_id)
+                    return
+            except Exception as e:
+                # Retried on the next tick, while the lease is still valid
+                logger.error("Failed to renew quota lease", experiment_id=experiment_id, error=str(e))
+
+    async def _release_lease(self, experiment_id: str) -> None:
+        try:
+            await get_limit_store().release(_lease_id(experiment_id))
+        except Exception as e:
+            # No longer renewed, so the lease expires on its own (SC_LIMITS_LEASE_SECONDS)
+            logger.error("Failed to release quota lease", experiment_id=experiment_id, error=str(e))
+
+    async def _persist(self, experiment: Experiment, status: ExperimentStatus | None = None) -> None:
+        """
+        Save a finished experiment's summary and runs to storage (optionally with its final status).
+
+        The run log is sealed and published, so other replicas can read the runs.
+        """
+        summary = experiment.model_dump(mode="json", exclude={"result": {"runs"}})
+        if status is not None:
+            summary["status"] = status.value
+        summary["runs"] = [run.model_dump(mode="json") for run in experiment.result.runs] if experiment.result else []
+        try:
+            await save_experiment_data(experiment.experiment_id, summary)
+            await seal_experiment_runs(experiment.experiment_id)
+            experiment.persisted_at = datetime.utcnow()
+        except Exception as e:
+            logger.error("Failed to persist experiment", experiment_id=experiment.experiment_id, error=str(e))
+
+    async def shutdown(self) -> None:
+        """Cancel all scheduled experiments and wait for them to stop."""
+        tasks = list(self._jobs.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _warmup_providers(self, config: ExperimentConfig) -> dict[str, float]:
+        """
+        Warm up every provider used by the experiment.
+
+        Runs concurrently across providers. Failures are logged and ignored,
+        since the runs themselves will surface real provider errors.
+
+        Returns:
+            Warmup time in milliseconds per provider
+        """
+        if not config.warmup_connections and not config.warmup_probe:
+            return {}
+
+        async def warm(provider_name: str) -> tuple[str, float | None]:
+            provider = get_provider(provider_name)
+            if not provider:
+                return provider_name, None
+
+            models = config.models.get(provider_name, [])
+            probe_model = models[0] if config.warmup_probe and models else None
+            start_time = time.perf_counter()
+            try:
+                await provider.warmup(config.warmup_connections, probe_model)
+            except Exception as e:
+                logger.warning("Provider warmup failed", provider=provider_name, error=str(e))
+            return provider_name, (time.perf_counter() - start_time) * 1000
+
+        results = await asyncio.gather(*(warm(name) for name in dict.fromkeys(config.providers)))
+        warmup_ms = {name: round(elapsed, 2) for name, elapsed in results if elapsed is not None}
+
+        logger.info("Providers warmed up", warmup_ms=warmup_ms)
+        return warmup_ms
+
+    async def _iter_test_cases(self, config: ExperimentConfig) -> AsyncIterator[tuple[int, dict[str, Any]]]:
+        """Yield (test_case_index, test_case_data) from inline test cases, then the dataset."""
         for test_case_index, test_case_data in enumerate(config.test_cases):
+            yield test_case_index, test_case_data
+
+        if config.dataset:
+            dataset = config.dataset
+            async for row_index, row in iter_dataset(
+                dataset.file_id, dataset.row_start, dataset.row_end, dataset.sample_rate, dataset.seed
+            ):
+                # Dataset rows keep their file position so shards stay comparable
+                yield len(config.test_cases) + row_index, row
+
+    async def _generate_runs(self, config: ExperimentConfig) -> AsyncIterator[ExperimentRun]:
+        """Generate run configurations as test cases are read."""
+        async for test_case_index, test_case_data in self._iter_test_cases(config):
             for provider_name in config.providers:
                 models = config.models.get(provider_name, [])
                 for model in models:
                     run_id = str(uuid.uuid4())
-                    run = ExperimentRun(
+                    # Built from already-validated config, so skip pydantic validation
+                    yield ExperimentRun.model_construct(
                         run_id=run_id,
                         provider=provider_name,
                         model=model,
@@ -141,51 +632,116 @@ class ExperimentEngine:
                         test_case_data=test_case_data,
                         status=ExperimentStatus.PENDING,
                     )
-                    runs.append(run)
 
-        return runs
-
-    async def _execute_parallel(self, runs: list[ExperimentRun]) -> list[ExperimentRun]:
-        """Execute runs in parallel."""
-        tasks = [self._execute_run(run) for run in runs]
-        return await asyncio.gather(*tasks, return_exceptions=False)
+    async def _execute_runs(
+        self,
+        runs: AsyncIterator[ExperimentRun],
+        config: ExperimentConfig,
+        collector: "_RunCollector",
+        experiment: Experiment | None = None,
+    ) -> None:
+        """
+        Execute runs as they are generated, handing finished runs to the collector.
 
-    async def _execute_sequential(self, runs: list[ExperimentRun]) -> list[ExperimentRun]:
-        """Execute runs sequentially."""
-        completed_runs = []
-        for run in runs:
-            completed_run = await self._execute_run(run)
-            completed_runs.append(completed_run)
-        return completed_runs
+        Parallel experiments keep at most ``config.max_concurrency`` runs in
+        flight; generation pauses until a slot frees up, and only in-flight
+        tasks are held. When an experiment is given, its progress is updated
+        and published as runs finish.
+        """
 
-    async def _execute_run(self, run: ExperimentRun) -> ExperimentRun:
-        """Execute a single experimental run."""
-        run.status = ExperimentStatus.RUNNING
-        run.started_at = datetime.utcnow()
+        async def execute_tracked(run: ExperimentRun) -> None:
+            self.runs_in_flight += 1
+            try:
+                if experiment is not None:
+                    experiment.progress.started_runs += 1
+                run = await self._execute_run(run, config)
+                if experiment is not None:
+                    self._run_finished(experiment, run)
+            finally:
+                self.runs_in_flight -= 1
+            await collector.finished(run)
+
+        if not config.parallel:
+            async for run in runs:
+                collector.started(run)
+                await execute_tracked(run)
+            return
+
+        semaphore = asyncio.Semaphore(config.max_concurrency)
+        tasks: set[asyncio.Task[None]] = set()
+        errors: list[BaseException] = []
+
+        async def execute(run: ExperimentRun) -> None:
+            try:
+                await execute_tracked(run)
+            finally:
+                semaphore.release()
+
+        def task_done(task: asyncio.Task[None]) -> None:
+            tasks.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                errors.append(task.exception())
 
         try:
-            # Get provider
-            provider = get_provider(run.provider)
-            if not provider:
-                raise ValueError(f"Provider {run.provider} not available")
+            async for run in runs:
+                await semaphore.acquire()
+                if errors:
+                    semaphore.release()
+                    break
+                collector.started(run)
+                task = asyncio.create_task(execute(run))
+                tasks.add(task)
+                task.add_done_callback(task_done)
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        if errors:
+            raise errors[0]
 
-            # Format prompt with test case data
-            prompt = self._format_prompt(run.test_case_data)
+    async def _execute_run(self, run: ExperimentRun, config: ExperimentConfig) -> ExperimentRun:
+        """
+        Execute a single experimental run.
 
-            # Create completion request
-            request = CompletionRequest(
-                prompt=prompt,
-                model=run.model,
-            )
+        The run's own provider/model is tried first. On retryable failures
+        (throttling, outages, timeouts) the configured fallback chain is
+        walked in order until one target succeeds.
+        """
+        run.status = ExperimentStatus.RUNNING
 
-            # Execute completion
-            response = await provider.complete(request)
+        # Format prompt with test case data
+        prompt = self._format_prompt(config.prompt_template, run.test_case_data)
+
+        targets = [(run.provider, run.model)]
+        targets.extend((target.provider, target.model) for target in config.fallback_chain(run.provider, run.model))
 
-            # Record success
-            run.status = ExperimentStatus.COMPLETED
-            run.response_text = response.text
-            run.usage_stats = response.usage
-            run.metadata = response.metadata
+        try:
+            for provider_name, model in targets:
+                run.attempts += 1
+                try:
+                    response = await self._complete(run, provider_name, model, prompt, config)
+                except Exception as e:
+                    PROVIDER_ERRORS.inc(provider_name, type(e).__name__)
+                    if is_retryable_error(e) and run.attempts < len(targets):
+                        PROVIDER_RETRIES.inc(provider_name)
+                        logger.warning(
+                            "Run target failed, falling back",
+                            run_id=run.run_id,
+                            provider=provider_name,
+                            model=model,
+                            error=str(e),
+                        )
+                        continue
+                    raise
+
+                # Record success
+                run.status = ExperimentStatus.COMPLETED
+                run.response_text = response.text
+                run.usage_stats = response.usage
+                run.metadata = response.metadata
+                run.served_by = f"{provider_name}/{model}"
+                break
 
         except Exception as e:
             # Record failure
@@ -193,47 +749,180 @@ class ExperimentEngine:
             run.error_message = str(e)
             logger.error("Run failed", run_id=run.run_id, provider=run.provider, model=run.model, error=str(e))
 
+        except asyncio.CancelledError:
+            run.status = ExperimentStatus.CANCELLED
+            raise
+
         finally:
             run.completed_at = datetime.utcnow()
             if run.started_at:
                 duration = run.completed_at - run.started_at
                 run.duration_ms = int(duration.total_seconds() * 1000)
+            RUNS.inc(run.status.value)
 
         return run
 
-    def _format_prompt(self, test_case_data: dict[str, Any]) -> str:
+    async def _complete(
+        self, run: ExperimentRun, provider_name: str, model: str, prompt: str, config: ExperimentConfig
+    ) -> CompletionResponse:
+        """Send a completion request to one provider/model target."""
+        provider = get_provider(provider_name)
+        if not provider:
+            raise ProviderUnavailableError(f"Provider {provider_name} not available")
+
+        request = CompletionRequest(
+            prompt=prompt,
+            model=model,
+            max_tokens=config.max_tokens,
+            temperature=config.temperature,
+            system_prompt=config.system_prompt,
+        )
+
+        # Enforce tokens-per-minute limits before the call is made
+        prompt_tokens = provider.count_tokens(request)
+        run.prompt_tokens_estimate = prompt_tokens
+        await provider.acquire_token_budget(prompt_tokens + (config.max_tokens or 0))
+
+        # Timed from the first request sent, so waiting for the budget isn't counted
+        if run.started_at is None:
+            run.started_at = datetime.utcnow()
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await provider.complete(request)
+            outcome = "ok"
+            return response
+        finally:
+            PROVIDER_LATENCY.observe(time.perf_counter() - start, provider_name)
+            PROVIDER_REQUESTS.inc(provider_name, outcome)
+
+    def _format_prompt(self, prompt_template: str, test_case_data: dict[str, Any]) -> str:
         """Format prompt template with test case variables."""
         # Simple template substitution - could be enhanced with Jinja2
-        prompt = self.config.prompt_template
+        prompt = prompt_template
         for key, value in test_case_data.items():
             prompt = prompt.replace(f"{{{key}}}", str(value))
         return prompt
 
-    def _create_result(self, experiment_id: str, runs: list[ExperimentRun]) -> ExperimentResult:
-        """Create aggregated result from completed runs."""
-        successful_runs = [r for r in runs if r.status == ExperimentStatus.COMPLETED]
-        failed_runs = [r for r in runs if r.status == ExperimentStatus.FAILED]
 
-        # Calculate average duration
-        durations = [r.duration_ms for r in successful_runs if r.duration_ms]
-        avg_duration = sum(durations) / len(durations) if durations else None
-        total_duration = sum(durations) if durations else None
+class _RunCollector:
+    """
+    Aggregates finished runs into an experiment result.
+
+    With ``keep_runs`` the runs end up on the result, in the order they were
+    generated. Otherwise finished runs are appended to the experiment's run
+    log ``batch_size`` at a time and dropped.
+    """
 
+    def __init__(self, experiment_id: str, keep_runs: bool = True, batch_size: int = RUN_APPEND_BATCH_SIZE):
+        self.experiment_id = experiment_id
+        self.keep_runs = keep_runs
+        self.batch_size = batch_size
+        self.runs: list[ExperimentRun] = []
+        self.total_runs = 0
+        self.successful_runs = 0
+        self.failed_runs = 0
+        self._total_duration_ms = 0
+        self._timed_runs = 0
+        self._prompt_tokens: int | None = None
+        self._unsaved: list[ExperimentRun] = []
+
+    def started(self, run: ExperimentRun) -> None:
+        """Note a run about to execute (kept runs are listed in this order)."""
+        if self.keep_runs:
+            self.runs.append(run)
+
+    async def finished(self, run: ExperimentRun) -> None:
+        """Count a finished run, writing a batch to storage when one is full."""
+        self.total_runs += 1
+        if run.status == ExperimentStatus.COMPLETED:
+            self.successful_runs += 1
+            if run.duration_ms:
+                self._total_duration_ms += run.duration_ms
+                self._timed_runs += 1
+        elif run.status == ExperimentStatus.FAILED:
+            self.failed_runs += 1
+        if run.prompt_tokens_estimate is not None:
+            self._prompt_tokens = (self._prompt_tokens or 0) + run.prompt_tokens_estimate
+
+        if not self.keep_runs:
+            self._unsaved.append(run)
+            if len(self._unsaved) >= self.batch_size:
+                await self.flush()
+
+    async def flush(self) -> None:
+        """Append finished runs not yet written to the run log."""
+        if self.keep_runs or not self._unsaved:
+            return
+        batch, self._unsaved = self._unsaved, []
+        await append_experiment_runs(self.experiment_id, [run.model_dump(mode="json") for run in batch])
+
+    def result(self) -> ExperimentResult:
+        """Aggregated result of the runs so far."""
         return ExperimentResult(
-            experiment_id=experiment_id,
-            total_runs=len(runs),
-            successful_runs=len(successful_runs),
-            failed_runs=len(failed_runs),
-            avg_duration_ms=avg_duration,
-            total_duration_ms=total_duration,
-            runs=runs,
+            experiment_id=self.experiment_id,
+            total_runs=self.total_runs,
+            successful_runs=self.successful_runs,
+            failed_runs=self.failed_runs,
+            avg_duration_ms=self._total_duration_ms / self._timed_runs if self._timed_runs else None,
+            total_duration_ms=self._total_duration_ms if self._timed_runs else None,
+            estimated_prompt_tokens=self._prompt_tokens,
+            runs=self.runs,
         )
 
 
+def _status_data(experiment: Experiment) -> dict[str, Any]:
+    """Payload of a status event."""
+    return {
+        "status": ExperimentStatus(experiment.status).value,
+        "started_at": experiment.started_at.isoformat() if experiment.started_at else None,
+        "completed_at": experiment.completed_at.isoformat() if experiment.completed_at else None,
+        "error_message": experiment.error_message,
+        "progress": experiment.progress.model_dump(),
+    }
+
+
+def _lease_id(experiment_id: str) -> str:
+    return f"experiment:{experiment_id}"
+
+
+def _count_runs(config: ExperimentConfig, dataset_rows: int = 0) -> int:
+    """Number of runs an experiment will execute, given the rows its dataset yields."""
+    models = sum(len(config.models.get(provider_name, [])) for provider_name in config.providers)
+    return (len(config.test_cases) + dataset_rows) * models
+
+
 # Global engine instance
 _engine = ExperimentEngine()
 
 
+def _experiments_by_status() -> dict[tuple[str, ...], int]:
+    counts = {(status.value,): 0 for status in (ExperimentStatus.QUEUED, ExperimentStatus.RUNNING)}
+    for experiment in list(_engine.active_experiments.values()):
+        key = (experiment.status.value,)
+        if key in counts:
+            counts[key] += 1
+    return counts
+
+
+register_callback(
+    "experiments_active", "Experiments queued or running on the scheduler", _experiments_by_status, labels=("status",)
+)
+register_callback("experiment_runs_in_flight", "Runs currently executing", lambda: _engine.runs_in_flight)
+
+
+def _datasets_in_use() -> set[str]:
+    """Dataset uploads of experiments that haven't finished, so storage maintenance keeps them."""
+    return {
+        experiment.config.dataset.file_id
+        for experiment in list(_engine.active_experiments.values())
+        if experiment.config.dataset is not None and experiment.status not in FINISHED_STATUSES
+    }
+
+
+register_file_user(_datasets_in_use)
+
+
 async def create_experiment(config: ExperimentConfig, created_by: str) -> Experiment:
     """Create a new experiment using the global engine."""
     return await _engine.create_experiment(config, created_by)
@@ -242,3 +931,43 @@ async def create_experiment(config: ExperimentConfig, created_by: str) -> Experi
 async def run_experiment(experiment_id: str) -> ExperimentResult:
     """Run an experiment using the global engine."""
     return await _engine.run_experiment(experiment_id)
+
+
+def get_experiment(experiment_id: str) -> Experiment | None:
+    """Get an experiment from the global engine."""
+    return _engine.get_experiment(experiment_id)
+
+
+def list_experiments(created_by: str | None = None) -> list[Experiment]:
+    """List experiments of the global engine."""
+    return _engine.list_experiments(created_by)
+
+
+def start_experiment(experiment_id: str) -> Experiment:
+    """Schedule an experiment on the global engine's background scheduler."""
+    return _engine.start_experiment(experiment_id)
+
+
+async def enqueue_experiment(experiment_id: str) -> Experiment:
+    """Schedule an experiment on the global engine within its creator's quotas."""
+    return await _engine.enqueue_experiment(experiment_id)
+
+
+async def create_sweep(sweep: SweepConfig, created_by: str, start: bool = False) -> list[Experiment]:
+    """Create (and optionally start) the experiments of a parameter sweep on the global engine."""
+    return await _engine.create_sweep(sweep, created_by, start)
+
+
+async def cancel_experiment(experiment_id: str) -> Experiment:
+    """Cancel an experiment on the global engine."""
+    return await _engine.cancel_experiment(experiment_id)
+
+
+async def shutdown_experiments() -> None:
+    """Cancel all experiments scheduled on the global engine."""
+    await _engine.shutdown()
+
+
+def subscribe_experiment(experiment_id: str) -> Subscription:
+    """Subscribe to live events of an experiment on the global engine."""
+    return _engine.subscribe(experiment_id)
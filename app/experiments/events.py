@@ -0,0 +1,145 @@
+"""
+Live experiment events.
+
+The engine publishes events (status changes, finished runs with progress
+counters and running aggregate stats) to an EventBroker; API streams
+subscribe to one experiment's events.
+
+Publishing never blocks the engine. Each subscriber has a bounded buffer:
+when a slow subscriber's buffer is full the oldest events are dropped and
+the subscriber receives a ``lagged`` event with the number of events it
+missed. Every run event carries cumulative progress, so a lagging client
+resynchronizes with the next event it does get.
+"""
+
+import asyncio
+import itertools
+from collections import deque
+from collections.abc import AsyncIterator
+from typing import Any
+
+from pydantic import BaseModel
+
+DEFAULT_BUFFER_SIZE = 256
+
+
+class ExperimentEvent(BaseModel):
+    """Event published while an experiment runs."""
+
+    id: int
+    experiment_id: str
+    type: str
+    data: dict[str, Any]
+
+
+class Subscription:
+    """One subscriber's bounded event buffer."""
+
+    def __init__(self, broker: "EventBroker", experiment_id: str, buffer_size: int):
+        self.experiment_id = experiment_id
+        self.dropped = 0
+        self._broker = broker
+        self._buffer: deque[ExperimentEvent] = deque()
+        self._buffer_size = buffer_size
+        self._ready = asyncio.Event()
+        self._closed = False
+
+    def push(self, event: ExperimentEvent) -> None:
+        """Buffer an event, dropping the oldest one if the buffer is full."""
+        if len(self._buffer) >= self._buffer_size:
+            self._buffer.popleft()
+            self.dropped += 1
+        self._buffer.append(event)
+        self._ready.set()
+
+    def close(self) -> None:
+        """End the subscription once buffered events are consumed."""
+        self._closed = True
+        self._ready.set()
+
+    async def get(self, timeout: float | None = None) -> ExperimentEvent | None:
+        """
+        Wait for the next event.
+
+        Returns:
+            The next event, or None once the subscription is closed and drained
+
+        Raises:
+            TimeoutError: If no event arrives within the timeout
+        """
+        while not self._buffer and not self._closed:
+            self._ready.clear()
+            await asyncio.wait_for(self._ready.wait(), timeout)
+
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            return ExperimentEvent(id=0, experiment_id=self.experiment_id, type="lagged", data={"dropped": dropped})
+        if self._buffer:
+            return self._buffer.popleft()
+        return None
+
+    async def __aiter__(self) -> AsyncIterator[ExperimentEvent]:
+        while (event := await self.get()) is not None:
+            yield event
+
+    def unsubscribe(self) -> None:
+        """Stop receiving events."""
+        self._broker.unsubscribe(self)
+
+
+class EventBroker:
+    """Fans experiment events out to subscribers."""
+
+    def __init__(self, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        """
+        Initialize the broker.
+
+        Args:
+            buffer_size: Events buffered per subscriber before the oldest are dropped
+        """
+        self.buffer_size = buffer_size
+        self._subscribers: dict[str, set[Subscription]] = {}
+        self._ids = itertools.count(1)
+
+    def subscribe(self, experiment_id: str) -> Subscription:
+        """Subscribe to an experiment's events (must be unsubscribed when done)."""
+        subscription = Subscription(self, experiment_id, self.buffer_size)
+        self._subscribers.setdefault(experiment_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscription."""
+        subscribers = self._subscribers.get(subscription.experiment_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.experiment_id]
+
+    def subscriber_count(self, experiment_id: str) -> int:
+        """Number of subscribers to an experiment."""
+        return len(self._subscribers.get(experiment_id, ()))
+
+    def event(self, experiment_id: str, type: str, data: dict[str, Any]) -> ExperimentEvent:
+        """Create an event with the next sequence ID."""
+        return ExperimentEvent(id=next(self._ids), experiment_id=experiment_id, type=type, data=data)
+
+    def publish(self, experiment_id: str, type: str, data: dict[str, Any], final: bool = False) -> None:
+        """
+        Publish an event to an experiment's subscribers.
+
+        Args:
+            experiment_id: Experiment the event belongs to
+            type: Event type (``status``, ``run``)
+            data: Event payload
+            final: Close the experiment's subscriptions after this event
+        """
+        subscribers = self._subscribers.get(experiment_id)
+        if not subscribers:
+            return
+        event = self.event(experiment_id, type, data)
+        for subscription in subscribers:
+            subscription.push(event)
+            if final:
+                subscription.close()
+        if final:
+            del self._subscribers[experiment_id]
@@ -4,24 +4,52 @@ Experiment data models.
 Defines the structure for experiments, runs, and results.
 """
 
+import functools
+import itertools
+import math
 from datetime import datetime
 from enum import Enum
+from typing import Annotated
 from typing import Any
 
 from pydantic import BaseModel
 from pydantic import Field
+from pydantic import PrivateAttr
+from pydantic import TypeAdapter
+from pydantic import ValidationError
+from pydantic import model_validator
+
+from ..config import settings
 
 
 class ExperimentStatus(str, Enum):
     """Experiment execution status."""
 
     PENDING = "pending"
+    QUEUED = "queued"
     RUNNING = "running"
     COMPLETED = "completed"
     FAILED = "failed"
     CANCELLED = "cancelled"
 
 
+class FallbackTarget(BaseModel):
+    """Alternative provider/model to try when a run's target fails."""
+
+    provider: str = Field(description="Provider name (e.g. a secondary instance)")
+    model: str = Field(description="Model name on that provider")
+
+
+class DatasetSource(BaseModel):
+    """Uploaded CSV/JSONL file to stream test cases from."""
+
+    file_id: str = Field(description="ID of an uploaded dataset file")
+    row_start: int = Field(default=0, ge=0, description="First row to use (for sharding)")
+    row_end: int | None = Field(default=None, ge=0, description="Row to stop before (for sharding)")
+    sample_rate: float | None = Field(default=None, gt=0.0, le=1.0, description="Fraction of rows to sample")
+    seed: int | None = Field(default=None, description="Seed for deterministic sampling")
+
+
 class ExperimentConfig(BaseModel):
     """Configuration for an experiment."""
 
@@ -42,11 +70,104 @@ class ExperimentConfig(BaseModel):
     max_tokens: int | None = Field(default=None, ge=1)
 
     # Test data
-    test_cases: list[dict[str, Any]] = Field(description="Test case variables")
+    test_cases: list[dict[str, Any]] = Field(default_factory=list, description="Test case variables")
+    dataset: DatasetSource | None = Field(default=None, description="Uploaded dataset to stream test cases from")
 
     # Execution configuration
     parallel: bool = Field(default=True, description="Run providers in parallel")
+    max_concurrency: int = Field(default=64, ge=1, description="Max runs in flight when running in parallel")
     max_retries: int = Field(default=3, ge=0, description="Max retries per request")
+    warmup_connections: int = Field(default=0, ge=0, description="Connections to pre-open per provider")
+    warmup_probe: bool = Field(default=False, description="Send a one-token probe per provider before runs")
+    fallbacks: dict[str, list[FallbackTarget]] = Field(
+        default_factory=dict,
+        description="Fallback chains keyed by 'provider/model' or 'provider', tried in order on retryable failures",
+    )
+
+    @model_validator(mode="after")
+    def check_test_data(self) -> "ExperimentConfig":
+        """Require inline test cases or a dataset."""
+        if not self.test_cases and self.dataset is None:
+            raise ValueError("Either test_cases or dataset must be provided")
+        return self
+
+    def fallback_chain(self, provider: str, model: str) -> list[FallbackTarget]:
+        """Get the fallback chain for a provider/model, preferring model-specific chains."""
+        chain = self.fallbacks.get(f"{provider}/{model}")
+        if chain is None:
+            chain = self.fallbacks.get(provider, [])
+        return chain
+
+
+# ExperimentConfig fields a sweep grid may vary
+SWEEP_FIELDS = ("prompt_template", "system_prompt", "providers", "models", "temperature", "max_tokens")
+
+
+class SweepConfig(BaseModel):
+    """
+    Parameter sweep: a base experiment config and a grid of values to vary.
+
+    Every combination of grid values becomes one experiment: the base
+    config with those fields replaced. When ``models`` is varied without
+    ``providers``, each experiment uses the providers of its model set.
+    """
+
+    base: ExperimentConfig = Field(description="Config shared by every experiment of the sweep")
+    grid: dict[str, list[Any]] = Field(description=f"Values per varied field (one of {', '.join(SWEEP_FIELDS)})")
+
+    @model_validator(mode="after")
+    def check_grid(self) -> "SweepConfig":
+        """Validate each grid value once against its config field, and bound the sweep size."""
+        if not self.grid:
+            raise ValueError("Sweep grid must vary at least one field")
+        for field, values in self.grid.items():
+            if field not in SWEEP_FIELDS:
+                raise ValueError(f"Field '{field}' can't be swept (sweepable: {', '.join(SWEEP_FIELDS)})")
+            if not values:
+                raise ValueError(f"Sweep grid for '{field}' has no values")
+            adapter = _field_adapter(field)
+            try:
+                self.grid[field] = [adapter.validate_python(value) for value in values]
+            except ValidationError as e:
+                raise ValueError(f"Invalid sweep value for '{field}': {e.errors()[0]['msg']}")
+
+        size = self.size
+        if size > settings.SWEEP_MAX_EXPERIMENTS:
+            raise ValueError(f"Sweep has {size} experiments (at most {settings.SWEEP_MAX_EXPERIMENTS})")
+        return self
+
+    @property
+    def size(self) -> int:
+        """Number of experiments in the sweep."""
+        return math.prod(len(values) for values in self.grid.values())
+
+    def expand(self) -> list[tuple[dict[str, Any], ExperimentConfig]]:
+        """
+        Expand the sweep into experiment configs.
+
+        Configs share the base's unvaried values (test cases are not
+        copied), so expansion doesn't re-validate or duplicate them.
+
+        Returns:
+            (grid parameters, config) per experiment, in grid order
+        """
+        fields = list(self.grid)
+        size = self.size
+        expanded = []
+        for index, values in enumerate(itertools.product(*self.grid.values()), 1):
+            params = dict(zip(fields, values, strict=True))
+            update = {**params, "name": f"{self.base.name} [{index}/{size}]"}
+            if "models" in params and "providers" not in params:
+                update["providers"] = list(params["models"])
+            expanded.append((params, self.base.model_copy(update=update)))
+        return expanded
+
+
+@functools.cache
+def _field_adapter(field: str) -> TypeAdapter:
+    """Validator of one ExperimentConfig field (type and constraints)."""
+    info = ExperimentConfig.model_fields[field]
+    return TypeAdapter(Annotated[info.annotation, info])
 
 
 class ExperimentRun(BaseModel):
@@ -63,6 +184,7 @@ class ExperimentRun(BaseModel):
     started_at: datetime | None = None
     completed_at: datetime | None = None
     duration_ms: int | None = None
+    prompt_tokens_estimate: int | None = None
 
     # Results
     response_text: str | None = None
@@ -70,6 +192,10 @@ class ExperimentRun(BaseModel):
     usage_stats: dict[str, Any] | None = None
     metadata: dict[str, Any] | None = None
 
+    # Fallback tracking
+    served_by: str | None = Field(default=None, description="'provider/model' that produced the response")
+    attempts: int = 0
+
 
 class ExperimentResult(BaseModel):
     """Aggregated results from an experiment."""
@@ -82,14 +208,47 @@ class ExperimentResult(BaseModel):
     # Performance metrics
     avg_duration_ms: float | None = None
     total_duration_ms: int | None = None
+    estimated_prompt_tokens: int | None = None
+    warmup_ms: dict[str, float] = Field(default_factory=dict, description="Warmup time per provider (not in run stats)")
 
     # Provider comparison
     provider_stats: dict[str, dict[str, Any]] = Field(default_factory=dict)
 
-    # All individual runs
+    # All individual runs (empty for scheduled experiments, whose runs are streamed to storage)
     runs: list[ExperimentRun] = Field(default_factory=list)
 
 
+class ExperimentProgress(BaseModel):
+    """Run counters and running aggregate stats of an experiment, updated as runs finish."""
+
+    total_runs: int | None = Field(
+        default=None, description="Expected runs (an estimate for datasets sampled without a seed)"
+    )
+    started_runs: int = 0
+    completed_runs: int = 0
+    failed_runs: int = 0
+    avg_duration_ms: float | None = Field(default=None, description="Mean duration of successful runs so far")
+    estimated_prompt_tokens: int = 0
+
+    _timed_runs: int = PrivateAttr(default=0)
+
+    @property
+    def finished_runs(self) -> int:
+        return self.completed_runs + self.failed_runs
+
+    def record(self, run: ExperimentRun) -> None:
+        """Count a finished run."""
+        if run.status == ExperimentStatus.COMPLETED:
+            self.completed_runs += 1
+            if run.duration_ms:
+                self._timed_runs += 1
+                previous = self.avg_duration_ms or 0.0
+                self.avg_duration_ms = previous + (run.duration_ms - previous) / self._timed_runs
+        else:
+            self.failed_runs += 1
+        self.estimated_prompt_tokens += run.prompt_tokens_estimate or 0
+
+
 class Experiment(BaseModel):
     """Complete experiment definition and state."""
 
@@ -100,11 +259,18 @@ class Experiment(BaseModel):
 
     # Configuration
     config: ExperimentConfig
+    sweep_id: str | None = None
+    sweep_params: dict[str, Any] | None = Field(default=None, description="Grid values of a sweep experiment")
 
     # Execution state
     status: ExperimentStatus = ExperimentStatus.PENDING
     started_at: datetime | None = None
     completed_at: datetime | None = None
+    progress: ExperimentProgress = Field(default_factory=ExperimentProgress)
+    error_message: str | None = None
+    persisted_at: datetime | None = Field(
+        default=None, exclude=True, description="When the experiment's final state was saved to storage"
+    )
 
     # Results
     result: ExperimentResult | None = None
@@ -5,13 +5,51 @@ This is the entry point that assembles all the modular bricks.
 Each brick provides its contract through well-defined interfaces.
 """
 
+from contextlib import asynccontextmanager
+
+from fastapi import Depends
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from .api import router as api_router
 from .config import settings
+from .core import FastJSONResponse
+from .core import close_limit_store
+from .core import render_metrics
+from .core import require_metrics_access
 from .core import setup_logging
 from .core import setup_middleware
+from .core import start_log_writer
+from .core import stop_log_writer
+from .experiments import shutdown_experiments
+from .providers import close_providers
+from .providers import load_default_tokenizer
+from .storage import close_storage_manager
+from .storage import get_storage_manager
+from .storage import start_maintenance
+from .storage import stop_maintenance
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the log writer, storage (and its maintenance) and the tokenizer for the application's lifetime."""
+    start_log_writer()
+    get_storage_manager()
+    start_maintenance()
+    await load_default_tokenizer()
+    yield
+    await shutdown_experiments()
+    await close_providers()
+    await stop_maintenance()
+    await close_storage_manager()
+    await close_limit_store()
+    stop_log_writer()
+
+
+async def metrics() -> PlainTextResponse:
+    """Application metrics in the Prometheus text exposition format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 
 def create_app() -> FastAPI:
@@ -33,6 +71,8 @@ def create_app() -> FastAPI:
         version="0.1.0",
         docs_url="/docs" if settings.DEBUG else None,
         redoc_url="/redoc" if settings.DEBUG else None,
+        default_response_class=FastJSONResponse,
+        lifespan=lifespan,
     )
 
     # Add CORS middleware
@@ -50,6 +90,15 @@ def create_app() -> FastAPI:
     # Include API routes from api brick
     app.include_router(api_router, prefix="/api/v1")
 
+    if settings.METRICS_ENABLED:
+        app.add_api_route(
+            "/metrics",
+            metrics,
+            methods=["GET"],
+            dependencies=[Depends(require_metrics_access)],
+            include_in_schema=False,
+        )
+
     return app
 
 
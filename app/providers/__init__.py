@@ -4,19 +4,50 @@ Providers Brick
 PUBLIC CONTRACT:
 - ProviderRegistry: Central registry for AI providers
 - BaseProvider: Abstract base class for all providers
+- ProviderError, RateLimitError, ProviderUnavailableError: Provider failures
+- is_retryable_error(error): Classify failures that allow retry/fallback
+- Tokenizer, HeuristicTokenizer, set_tokenizer(): Local token estimation
+- load_default_tokenizer(): Load the offline tokenizer off the event loop (application startup)
 - get_provider(name): Factory function to get provider instances
 - list_providers(): List all available providers
+- get_registry(): Access the global registry (lazy registration, import report)
+- close_providers(): Close providers' pooled connections (application shutdown)
 
 RESPONSIBILITIES:
 - AI provider abstraction and plugin system
-- Provider registration and discovery
+- Provider registration and discovery (including entry point plugins)
 - Common interface for different AI services
 - Provider-specific configuration and authentication
 """
 
 from .base import BaseProvider
+from .base import ProviderError
+from .base import ProviderUnavailableError
+from .base import RateLimitError
+from .base import is_retryable_error
 from .registry import ProviderRegistry
+from .registry import close_providers
 from .registry import get_provider
+from .registry import get_registry
 from .registry import list_providers
+from .tokens import HeuristicTokenizer
+from .tokens import Tokenizer
+from .tokens import load_default_tokenizer
+from .tokens import set_tokenizer
 
-__all__ = ["ProviderRegistry", "BaseProvider", "get_provider", "list_providers"]
+__all__ = [
+    "ProviderRegistry",
+    "BaseProvider",
+    "ProviderError",
+    "RateLimitError",
+    "ProviderUnavailableError",
+    "is_retryable_error",
+    "get_provider",
+    "get_registry",
+    "list_providers",
+    "close_providers",
+    "Tokenizer",
+    "HeuristicTokenizer",
+    "set_tokenizer",
+    "load_default_tokenizer",
+]
@@ -4,12 +4,19 @@ Base provider interface for AI services.
 Defines the common contract that all AI providers must implement.
 """
 
+import asyncio
 from abc import ABC
 from abc import abstractmethod
 from typing import Any
 
+import httpx
 from pydantic import BaseModel
 
+from ..core import json_loads
+from .tokens import TokenCounter
+from .tokens import TokenRateLimiter
+from .tokens import get_token_counter
+
 
 class ProviderConfig(BaseModel):
     """Base configuration for AI providers."""
@@ -20,6 +27,8 @@ class ProviderConfig(BaseModel):
     base_url: str | None = None
     timeout: int = 30
     max_retries: int = 3
+    tokens_per_minute: int | None = None
+    max_connections: int = 20
 
 
 class CompletionRequest(BaseModel):
@@ -42,6 +51,55 @@ class CompletionResponse(BaseModel):
     metadata: dict[str, Any] | None = None
 
 
+class ProviderError(Exception):
+    """
+    Error raised by providers for failed completions.
+
+    Retryable errors (throttling, outages, timeouts) allow callers to
+    retry the request or fall back to another provider/model.
+    """
+
+    retryable: bool = False
+
+    def __init__(self, message: str, retryable: bool | None = None):
+        super().__init__(message)
+        if retryable is not None:
+            self.retryable = retryable
+
+
+class RateLimitError(ProviderError):
+    """Provider throttled the request."""
+
+    retryable = True
+
+
+class ProviderUnavailableError(ProviderError):
+    """Provider is down or not reachable."""
+
+    retryable = True
+
+
+# HTTP statuses of throttled requests and gateway/upstream outages
+RETRYABLE_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """
+    Check whether a failed completion may succeed on another attempt or target.
+
+    Retryable: ProviderErrors flagged as such, timeouts and network failures
+    (built-in or from httpx), and HTTP responses with a status in
+    RETRYABLE_STATUS_CODES (raised by ``response.raise_for_status()``).
+    """
+    if isinstance(error, ProviderError):
+        return error.retryable
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(
+        error, TimeoutError | ConnectionError | httpx.TimeoutException | httpx.NetworkError | httpx.RemoteProtocolError
+    )
+
+
 class BaseProvider(ABC):
     """
     Abstract base class for all AI providers.
@@ -50,9 +108,14 @@ class BaseProvider(ABC):
     enabling the plugin system to work with different AI services uniformly.
     """
 
+    # Override with a provider-specific TokenCounter for exact counts
+    token_counter: TokenCounter | None = None
+
     def __init__(self, config: ProviderConfig):
         self.config = config
         self.name = config.name
+        self._rate_limiter = TokenRateLimiter(config.tokens_per_minute) if config.tokens_per_minute else None
+        self._http_client: httpx.AsyncClient | None = None
 
     @abstractmethod
     async def complete(self, request: CompletionRequest) -> CompletionResponse:
@@ -87,6 +150,103 @@ class BaseProvider(ABC):
         """
         pass
 
+    def get_http_client(self) -> httpx.AsyncClient:
+        """
+        Get the provider's pooled HTTP client, creating it on first use.
+
+        Providers should send their API calls through this client so that
+        connections opened during warmup are reused by real requests.
+        """
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                base_url=self.config.base_url or "",
+                timeout=self.config.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.config.max_connections,
+                    max_keepalive_connections=self.config.max_connections,
+                ),
+            )
+        return self._http_client
+
+    async def close(self) -> None:
+        """Close pooled connections."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    async def warmup(self, connections: int = 1, probe_model: str | None = None) -> None:
+        """
+        Pre-open pooled connections and optionally send a tiny probe request.
+
+        Pays DNS, TLS and connection setup up front so it doesn't show up in
+        the latency of the first real requests.
+
+        Args:
+            connections: Number of pooled connections to open
+            probe_model: Model for a one-token probe completion, or None to skip it
+        """
+        if connections > 0 and self.config.base_url:
+            client = self.get_http_client()
+            count = min(connections, self.config.max_connections)
+            # Concurrent requests force the pool to open separate connections;
+            # the responses themselves don't matter
+            await asyncio.gather(*(client.head("/") for _ in range(count)), return_exceptions=True)
+
+        if probe_model:
+            # The probe counts against the tokens-per-minute budget like any request
+            request = CompletionRequest(prompt="ping", model=probe_model, max_tokens=1)
+            await self.acquire_token_budget(self.count_tokens(request) + 1)
+            await self.complete(request)
+
+    def count_tokens(self, request: CompletionRequest) -> int:
+        """
+        Estimate the prompt tokens of a request before sending it.
+
+        Counts are cached per rendered prompt text.
+
+        Args:
+            request: Completion request to estimate
+
+        Returns:
+            Estimated number of input tokens
+        """
+        counter = self.token_counter or get_token_counter()
+        tokens = counter.count(request.prompt)
+        if request.system_prompt:
+            tokens += counter.count(request.system_prompt)
+        return tokens
+
+    async def acquire_token_budget(self, tokens: int) -> None:
+        """Wait for tokens-per-minute budget; no-op when no limit is configured."""
+        if self._rate_limiter is not None:
+            await self._rate_limiter.acquire(tokens)
+
+    @staticmethod
+    def decode_json(payload: bytes | str) -> Any:
+        """Decode a raw API response body with the fast JSON backend."""
+        return json_loads(payload)
+
+    def build_response(
+        self,
+        text: str,
+        model: str,
+        usage: dict[str, Any] | None = None,
+        metadata: dict[str, Any] | None = None,
+    ) -> CompletionResponse:
+        """
+        Build a completion response without pydantic validation.
+
+        Only use with values already extracted into the right types;
+        untrusted payloads should go through CompletionResponse(...) instead.
+        """
+        return CompletionResponse.model_construct(
+            text=text,
+            model=model,
+            provider=self.name,
+            usage=usage,
+            metadata=metadata,
+        )
+
     def is_enabled(self) -> bool:
         """Check if this provider is enabled."""
         return self.config.enabled
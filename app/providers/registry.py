@@ -2,8 +2,19 @@
 Provider registry for managing AI service providers.
 
 Central registry that handles provider discovery, instantiation, and management.
+
+Providers can be registered directly with a class, or lazily with an import
+target ("package.module:ClassName"). Installed packages may also advertise
+providers through the ``shadow_cauldron.providers`` entry point group. Lazy
+providers are only imported the first time they are actually requested, so
+vendor SDKs don't slow down application startup. A lazy provider that fails
+to import (e.g. its SDK isn't installed) is reported by import_report() and
+treated as unavailable by get_provider().
 """
 
+import importlib
+import time
+from importlib.metadata import entry_points
 
 import structlog
 
@@ -12,6 +23,9 @@ from .base import ProviderConfig
 
 logger = structlog.get_logger(__name__)
 
+# Entry point group scanned for provider plugins
+ENTRY_POINT_GROUP = "shadow_cauldron.providers"
+
 
 class ProviderRegistry:
     """
@@ -21,10 +35,18 @@ class ProviderRegistry:
     Supports plugin-style architecture where providers can be added dynamically.
     """
 
-    def __init__(self):
+    def __init__(self, entry_point_group: str | None = ENTRY_POINT_GROUP):
         self._provider_classes: dict[str, type[BaseProvider]] = {}
         self._provider_instances: dict[str, BaseProvider] = {}
 
+        # Lazy providers: name -> "module:attr" import target (not yet imported)
+        self._lazy_targets: dict[str, str] = {}
+        self._import_times: dict[str, float] = {}
+        # Lazy providers whose import failed: name -> error
+        self._import_errors: dict[str, str] = {}
+        self._entry_point_group = entry_point_group
+        self._discovered = entry_point_group is None
+
     def register_provider(self, provider_class: type[BaseProvider]) -> None:
         """
         Register a provider class.
@@ -36,8 +58,88 @@ class ProviderRegistry:
         provider_name = getattr(provider_class, "PROVIDER_NAME", provider_class.__name__.lower())
 
         self._provider_classes[provider_name] = provider_class
+        self._lazy_targets.pop(provider_name, None)
         logger.info("Provider registered", provider=provider_name)
 
+    def register_lazy_provider(self, name: str, target: str) -> None:
+        """
+        Register a provider by import target without importing it.
+
+        Args:
+            name: Provider name
+            target: Import target in "package.module:ClassName" form
+        """
+        if ":" not in target:
+            raise ValueError(f"Invalid provider target '{target}', expected 'module:ClassName'")
+
+        if name in self._provider_classes:
+            return
+
+        self._lazy_targets[name] = target
+        logger.debug("Lazy provider registered", provider=name, target=target)
+
+    def discover_providers(self) -> list[str]:
+        """
+        Discover providers advertised through entry points.
+
+        Only entry point metadata is read; provider modules are not imported.
+
+        Returns:
+            Names of newly discovered providers
+        """
+        self._discovered = True
+        if self._entry_point_group is None:
+            return []
+
+        discovered = []
+        for entry_point in entry_points(group=self._entry_point_group):
+            if entry_point.name in self._provider_classes or entry_point.name in self._lazy_targets:
+                continue
+            self._lazy_targets[entry_point.name] = entry_point.value
+            discovered.append(entry_point.name)
+
+        if discovered:
+            logger.info("Providers discovered", providers=discovered, group=self._entry_point_group)
+        return discovered
+
+    def _ensure_discovered(self) -> None:
+        """Run entry point discovery once, on first lookup."""
+        if not self._discovered:
+            self.discover_providers()
+
+    def _resolve_class(self, name: str) -> type[BaseProvider] | None:
+        """Get a provider class, importing a lazy provider on first use."""
+        provider_class = self._provider_classes.get(name)
+        if provider_class is not None:
+            return provider_class
+
+        self._ensure_discovered()
+        target = self._lazy_targets.get(name)
+        if target is None:
+            return None
+
+        module_name, _, attr = target.partition(":")
+        start_time = time.perf_counter()
+        try:
+            provider_class = importlib.import_module(module_name)
+            for part in attr.split("."):
+                provider_class = getattr(provider_class, part)
+            if not (isinstance(provider_class, type) and issubclass(provider_class, BaseProvider)):
+                raise TypeError(f"Provider target '{target}' is not a BaseProvider subclass")
+        except (ImportError, AttributeError, TypeError) as e:
+            self._import_errors[name] = f"{type(e).__name__}: {e}"
+            logger.error("Provider import failed", provider=name, target=target, error=str(e))
+            raise ImportError(f"Failed to import provider '{name}' from '{target}': {e}") from e
+        import_ms = (time.perf_counter() - start_time) * 1000
+
+        self._provider_classes[name] = provider_class
+        self._import_times[name] = import_ms
+        self._import_errors.pop(name, None)
+        del self._lazy_targets[name]
+
+        logger.info("Provider imported", provider=name, target=target, import_ms=round(import_ms, 2))
+        return provider_class
+
     def create_provider(self, name: str, config: ProviderConfig) -> BaseProvider:
         """
         Create a provider instance.
@@ -51,12 +153,13 @@ class ProviderRegistry:
 
         Raises:
             KeyError: If provider is not registered
+            ImportError: If a lazily registered provider fails to import
         """
-        if name not in self._provider_classes:
-            available = list(self._provider_classes.keys())
+        provider_class = self._resolve_class(name)
+        if provider_class is None:
+            available = self.list_providers()
             raise KeyError(f"Provider '{name}' not found. Available: {available}")
 
-        provider_class = self._provider_classes[name]
         instance = provider_class(config)
 
         # Store instance for reuse
@@ -69,20 +172,33 @@ class ProviderRegistry:
         """
         Get a provider instance by name.
 
+        Lazily registered providers that have no instance yet are imported
+        and created with a default configuration. A failed import is recorded
+        (see import_report()) and not retried here.
+
         Args:
             name: Provider name
 
         Returns:
-            Provider instance if found and enabled, None otherwise
+            Provider instance if found, imported and enabled, None otherwise
         """
         instance = self._provider_instances.get(name)
+        if instance is None and name not in self._provider_classes and name not in self._import_errors:
+            self._ensure_discovered()
+            if name in self._lazy_targets:
+                try:
+                    instance = self.create_provider(name, ProviderConfig(name=name))
+                except ImportError:
+                    return None
+
         if instance and instance.is_enabled():
             return instance
         return None
 
     def list_providers(self) -> list[str]:
-        """List all registered provider names."""
-        return list(self._provider_classes.keys())
+        """List all registered provider names, including ones not imported yet."""
+        self._ensure_discovered()
+        return list(self._provider_classes.keys()) + list(self._lazy_targets.keys())
 
     def list_enabled_providers(self) -> list[str]:
         """List names of enabled provider instances."""
@@ -92,6 +208,47 @@ class ProviderRegistry:
                 enabled.append(name)
         return enabled
 
+    async def close(self) -> None:
+        """Close every provider instance's pooled connections (application shutdown)."""
+        for name, instance in self._provider_instances.items():
+            try:
+                await instance.close()
+            except Exception as e:
+                logger.error("Failed to close provider", provider=name, error=str(e))
+
+    def import_report(self) -> list[dict[str, object]]:
+        """
+        Report provider import state and cost.
+
+        Returns:
+            One entry per provider with its import target, whether it has been
+            imported, the time spent importing it in milliseconds, and the
+            error if its import failed
+        """
+        self._ensure_discovered()
+        report: list[dict[str, object]] = []
+        for name, provider_class in self._provider_classes.items():
+            report.append(
+                {
+                    "provider": name,
+                    "target": f"{provider_class.__module__}:{provider_class.__qualname__}",
+                    "imported": True,
+                    "import_ms": round(self._import_times[name], 2) if name in self._import_times else None,
+                    "error": None,
+                }
+            )
+        for name, target in self._lazy_targets.items():
+            report.append(
+                {
+                    "provider": name,
+                    "target": target,
+                    "imported": False,
+                    "import_ms": None,
+                    "error": self._import_errors.get(name),
+                }
+            )
+        return report
+
 
 # Global registry instance
 _registry = ProviderRegistry()
@@ -110,3 +267,8 @@ def get_provider(name: str) -> BaseProvider | None:
 def list_providers() -> list[str]:
     """List all registered providers from the global registry."""
     return _registry.list_providers()
+
+
+async def close_providers() -> None:
+    """Close the global registry's provider instances (application shutdown)."""
+    await _registry.close()
@@ -0,0 +1,177 @@
+"""
+Token estimation for AI providers.
+
+Counts prompt tokens locally before a request is sent, so budgets, batching
+and tokens-per-minute limits can be enforced up front. Uses an offline
+tokenizer when one is installed (tiktoken) and a fast heuristic otherwise.
+Counts are cached per rendered prompt.
+
+Loading a tiktoken encoding can read or download files, so the offline
+tokenizer is loaded in a thread at application startup
+(``load_default_tokenizer()``); until then counts use the heuristic.
+"""
+
+import asyncio
+import hashlib
+import math
+import re
+import time
+from abc import ABC
+from abc import abstractmethod
+from collections import OrderedDict
+
+from ..core import register_callback
+
+# Rough word/punctuation split used by the heuristic tokenizer
+_WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+class Tokenizer(ABC):
+    """Base tokenizer interface."""
+
+    name = "base"
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        """Count tokens in a piece of text."""
+        pass
+
+
+class HeuristicTokenizer(Tokenizer):
+    """
+    Fast tokenizer-free estimate.
+
+    BPE tokenizers average roughly 4 characters or 0.75 words per token on
+    English text; the larger of the two estimates is used so the count errs
+    on the high side for budgeting.
+    """
+
+    name = "heuristic"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        words = len(_WORD_PATTERN.findall(text))
+        return max(math.ceil(len(text) / 4), math.ceil(words * 4 / 3))
+
+
+class TiktokenTokenizer(Tokenizer):
+    """Exact BPE counts using tiktoken (optional dependency)."""
+
+    def __init__(self, encoding: str = "cl100k_base"):
+        import tiktoken
+
+        self._encoding = tiktoken.get_encoding(encoding)
+        self.name = f"tiktoken:{encoding}"
+
+    def count(self, text: str) -> int:
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+class TokenCounter:
+    """
+    Caching token counter.
+
+    Counts are keyed by a digest of the text, so a prompt rendered once and
+    sent to several providers/models is only tokenized once.
+    """
+
+    def __init__(self, tokenizer: Tokenizer, max_entries: int = 10_000):
+        self.tokenizer = tokenizer
+        self.max_entries = max_entries
+        self._cache: OrderedDict[bytes, int] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def count(self, text: str) -> int:
+        """Count tokens in text, using the cache when possible."""
+        key = hashlib.blake2b(text.encode(), digest_size=16).digest()
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        tokens = self.tokenizer.count(text)
+        self._cache[key] = tokens
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return tokens
+
+
+class TokenRateLimiter:
+    """
+    Token bucket enforcing a tokens-per-minute limit.
+
+    Requests larger than the whole budget are clamped to it, so they wait
+    for a full bucket instead of blocking forever.
+    """
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait until the requested number of tokens is available."""
+        needed = min(float(tokens), self.capacity)
+        async with self._lock:
+            self._refill()
+            while self._tokens < needed:
+                await asyncio.sleep((needed - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= needed
+
+
+def _default_tokenizer() -> Tokenizer:
+    try:
+        return TiktokenTokenizer()
+    except Exception:
+        # tiktoken missing, or its encoding files are not available offline
+        return HeuristicTokenizer()
+
+
+_token_counter: TokenCounter | None = None
+
+
+def get_token_counter() -> TokenCounter:
+    """Get the shared token counter (heuristic until load_default_tokenizer() has run)."""
+    global _token_counter
+    if _token_counter is None:
+        _token_counter = TokenCounter(HeuristicTokenizer())
+    return _token_counter
+
+
+async def load_default_tokenizer() -> None:
+    """Load the offline tokenizer in a thread and make it the shared one (application startup)."""
+    set_tokenizer(await asyncio.to_thread(_default_tokenizer))
+
+
+def _cache_requests() -> dict[tuple[str, ...], int]:
+    counter = _token_counter
+    if counter is None:
+        return {}
+    return {("hit",): counter.hits, ("miss",): counter.misses}
+
+
+register_callback(
+    "token_count_cache_requests",
+    "Prompt token count cache lookups by result",
+    _cache_requests,
+    labels=("result",),
+    type="counter",
+)
+
+
+def set_tokenizer(tokenizer: Tokenizer) -> None:
+    """Replace the shared tokenizer (clears cached counts)."""
+    global _token_counter
+    _token_counter = TokenCounter(tokenizer)
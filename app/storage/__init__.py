@@ -3,9 +3,25 @@ Storage Brick
 
 PUBLIC CONTRACT:
 - StorageManager: File and data storage management
+- get_storage_manager(): Global manager, created from SC_STORAGE_* settings on first use
+- close_storage_manager(): Close the global manager (application shutdown)
+- StorageBackend: Object storage backend interface (LocalBackend, S3Backend)
+- StorageError: Raised when a backend operation fails
 - upload_file(): Upload file to storage
 - get_file(): Retrieve file from storage
 - delete_file(): Delete file from storage
+- save_experiment_data(): Persist an experiment summary and append its runs
+- append_experiment_runs(): Append finished runs to an experiment's run log (streamed as they finish)
+- seal_experiment_runs(): Seal a finished experiment's run log and publish it to a remote backend
+- list_experiment_runs(): Cursor-paginated, filtered, projected run listing (RunPage)
+- iter_dataset(): Stream test-case rows from an uploaded CSV/JSONL file
+- count_dataset_rows(): Number of rows iter_dataset() yields (sizes dataset experiments)
+- get_file_download()/get_export_download(): Describe an upload or export for serving (Download)
+- get_experiment_owner(): Creator of a stored experiment (for access checks)
+- register_file_user(): Register a callback naming uploads still in use (maintenance won't expire them)
+- stream_download(): Stream a download, or a byte range of it, from the backend
+- StorageMaintenance: Incremental retention, cold recompression, orphan cleanup and per-user usage
+- start_maintenance()/stop_maintenance(): Run maintenance in the background (SC_STORAGE_* settings)
 
 RESPONSIBILITIES:
 - File upload and management
@@ -14,9 +30,64 @@ RESPONSIBILITIES:
 - Storage backend abstraction (local, S3, etc.)
 """
 
+from .backends import LocalBackend
+from .backends import StorageBackend
+from .backends import StorageError
+from .maintenance import MaintenanceReport
+from .maintenance import RetentionPolicy
+from .maintenance import StorageMaintenance
+from .maintenance import UsageStats
+from .maintenance import start_maintenance
+from .maintenance import stop_maintenance
+from .manager import Download
+from .manager import RunPage
 from .manager import StorageManager
+from .manager import append_experiment_runs
+from .manager import close_storage_manager
+from .manager import count_dataset_rows
 from .manager import delete_file
+from .manager import get_experiment_owner
+from .manager import get_export_download
 from .manager import get_file
+from .manager import get_file_download
+from .manager import get_storage_manager
+from .manager import iter_dataset
+from .manager import list_experiment_runs
+from .manager import register_file_user
+from .manager import save_experiment_data
+from .manager import seal_experiment_runs
+from .manager import stream_download
 from .manager import upload_file
+from .s3 import S3Backend
 
-__all__ = ["StorageManager", "upload_file", "get_file", "delete_file"]
+__all__ = [
+    "StorageManager",
+    "get_storage_manager",
+    "close_storage_manager",
+    "StorageBackend",
+    "StorageError",
+    "LocalBackend",
+    "S3Backend",
+    "upload_file",
+    "get_file",
+    "delete_file",
+    "iter_dataset",
+    "count_dataset_rows",
+    "save_experiment_data",
+    "append_experiment_runs",
+    "seal_experiment_runs",
+    "list_experiment_runs",
+    "register_file_user",
+    "RunPage",
+    "Download",
+    "get_file_download",
+    "get_export_download",
+    "get_experiment_owner",
+    "stream_download",
+    "StorageMaintenance",
+    "RetentionPolicy",
+    "MaintenanceReport",
+    "UsageStats",
+    "start_maintenance",
+    "stop_maintenance",
+]
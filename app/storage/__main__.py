@@ -0,0 +1,45 @@
+"""
+Storage maintenance commands.
+
+Usage:
+    python -m app.storage rebuild-index [--storage-root DIR]
+    python -m app.storage maintain [--storage-root DIR]
+"""
+
+import argparse
+import asyncio
+
+from ..config import settings
+from .maintenance import RetentionPolicy
+from .maintenance import StorageMaintenance
+from .manager import StorageManager
+
+
+def main() -> None:
+    """Run a storage maintenance command."""
+    parser = argparse.ArgumentParser(prog="python -m app.storage", description="Storage maintenance commands")
+    parser.add_argument("--storage-root", help="Storage root directory (defaults to SC_STORAGE_ROOT)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("rebuild-index", help="Rebuild the file index from metadata in the storage backend")
+    subparsers.add_parser("maintain", help="Run one retention, recompression and cleanup pass")
+
+    args = parser.parse_args()
+    asyncio.run(_run(args))
+
+
+async def _run(args: argparse.Namespace) -> None:
+    manager = StorageManager.from_settings(settings, args.storage_root)
+    try:
+        if args.command == "rebuild-index":
+            count = await manager.rebuild_index()
+            print(f"Indexed {count} files")
+        elif args.command == "maintain":
+            maintenance = StorageMaintenance(manager, RetentionPolicy.from_settings(settings), pause=0)
+            report = await maintenance.run_once()
+            print(report.model_dump_json(indent=2))
+    finally:
+        await manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,426 @@
+"""
+Storage backends.
+
+A backend stores opaque objects under slash-separated keys
+("blobs/ab/cd/<hash>", "uploads/<file_id>.meta", ...). StorageManager
+builds uploads, experiment data and exports on top of this interface, so
+the same code runs against the local filesystem or shared object storage.
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+from abc import ABC
+from abc import abstractmethod
+from collections.abc import AsyncIterable
+from collections.abc import AsyncIterator
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+from typing import BinaryIO
+from typing import TypeVar
+
+from pydantic import BaseModel
+
+from ..core import counter
+from ..core import histogram
+
+T = TypeVar("T")
+
+
+class StorageError(Exception):
+    """Raised when a storage backend operation fails."""
+
+
+# Default chunk size for streaming reads and writes
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+STORAGE_LATENCY = histogram(
+    "storage_operation_duration_seconds", "Storage backend operation latency", ("backend", "operation")
+)
+STORAGE_BYTES = counter("storage_bytes", "Bytes read from and written to the storage backend", ("backend", "direction"))
+
+
+class ObjectInfo(BaseModel):
+    """Metadata about a stored object."""
+
+    key: str
+    size: int
+    etag: str | None = None
+    modified_at: datetime | None = None
+
+
+class StorageBackend(ABC):
+    """
+    Abstract object storage backend.
+
+    Keys are relative, slash-separated paths. Ranges are inclusive byte
+    offsets, matching HTTP Range semantics.
+    """
+
+    name = "base"
+
+    # Whether several API replicas see the same objects. Shared backends
+    # can't rely on process-local reference counts for garbage collection.
+    shared = False
+
+    @abstractmethod
+    async def put(self, key: str, data: bytes) -> None:
+        """Store an object from bytes."""
+
+    @abstractmethod
+    async def put_file(self, key: str, path: Path, move: bool = False) -> int:
+        """
+        Store an object from a local file.
+
+        Args:
+            key: Object key
+            path: Local file to store
+            move: Whether the local file may be consumed (moved) by the backend
+
+        Returns:
+            Number of bytes stored
+        """
+
+    @abstractmethod
+    async def put_stream(self, key: str, chunks: AsyncIterable[bytes]) -> int:
+        """
+        Store an object from a stream of chunks.
+
+        Returns:
+            Number of bytes stored
+        """
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None:
+        """Read a whole object, or None if it doesn't exist."""
+
+    @abstractmethod
+    async def get_range(self, key: str, start: int, end: int) -> bytes:
+        """Read bytes ``start..end`` (inclusive) of an object."""
+
+    @abstractmethod
+    def stream(
+        self, key: str, start: int = 0, end: int | None = None, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        """Stream an object (or an inclusive byte range of it) in chunks."""
+
+    @abstractmethod
+    async def stat(self, key: str) -> ObjectInfo | None:
+        """Get object metadata, or None if it doesn't exist."""
+
+    async def exists(self, key: str) -> bool:
+        """Check whether an object exists."""
+        return await self.stat(key) is not None
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Delete an object (no error if it doesn't exist)."""
+
+    @abstractmethod
+    def list_objects(self, prefix: str = "") -> AsyncIterator[ObjectInfo]:
+        """List objects whose keys start with a prefix."""
+
+    def local_path(self, key: str) -> Path | None:
+        """Local filesystem path of an object, for backends that have one."""
+        return None
+
+    def use_executor(self, executor: ThreadPoolExecutor) -> None:  # noqa: B027 - optional hook
+        """Run blocking file operations on a thread pool, unless the backend was given one."""
+
+    async def close(self) -> None:  # noqa: B027 - optional hook
+        """Release connections and other resources."""
+
+
+class LocalBackend(StorageBackend):
+    """Filesystem backend rooted at a directory."""
+
+    name = "local"
+
+    def __init__(self, root: Path, executor: ThreadPoolExecutor | None = None, shared: bool = False):
+        """
+        Initialize the backend.
+
+        Args:
+            root: Directory objects are stored under
+            executor: Thread pool for blocking file operations (default loop executor if None)
+            shared: Set when the root is a network mount shared by several replicas
+        """
+        self.root = Path(root)
+        self._executor = executor
+        self.shared = shared
+
+    def _path(self, key: str) -> Path:
+        parts = key.split("/")
+        if not key or key.startswith("/") or any(part in ("", ".", "..") for part in parts):
+            raise ValueError(f"Invalid storage key '{key}'")
+        return self.root.joinpath(*parts)
+
+    def local_path(self, key: str) -> Path | None:
+        return self._path(key)
+
+    def use_executor(self, executor: ThreadPoolExecutor) -> None:
+        self._executor = self._executor or executor
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def put(self, key: str, data: bytes) -> None:
+        await self._run(_write_atomic, self._path(key), data)
+
+    async def put_file(self, key: str, path: Path, move: bool = False) -> int:
+        return await self._run(_place_file, path, self._path(key), move)
+
+    async def put_stream(self, key: str, chunks: AsyncIterable[bytes]) -> int:
+        target = self._path(key)
+        size = 0
+        f, temp_path = await self._run(_open_temp, target)
+        try:
+            async for chunk in chunks:
+                await self._run(f.write, chunk)
+                size += len(chunk)
+        except BaseException:
+            await self._run(f.close)
+            temp_path.unlink(missing_ok=True)
+            raise
+        await self._run(f.close)
+        await self._run(os.replace, temp_path, target)
+        return size
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._run(_read_or_none, self._path(key))
+
+    async def get_range(self, key: str, start: int, end: int) -> bytes:
+        return await self._run(_read_range, self._path(key), start, end)
+
+    async def stream(
+        self, key: str, start: int = 0, end: int | None = None, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        f = await self._run(open, self._path(key), "rb")
+        try:
+            await self._run(f.seek, start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                size = chunk_size if remaining is None else min(chunk_size, remaining)
+                chunk = await self._run(f.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            await self._run(f.close)
+
+    async def stat(self, key: str) -> ObjectInfo | None:
+        return await self._run(_stat_or_none, key, self._path(key))
+
+    async def delete(self, key: str) -> None:
+        await self._run(self._path(key).unlink, True)
+
+    async def list_objects(self, prefix: str = "") -> AsyncIterator[ObjectInfo]:
+        infos = await self._run(self._list_sync, prefix)
+        for info in infos:
+            yield info
+
+    def _list_sync(self, prefix: str) -> list[ObjectInfo]:
+        # Walk only the directory the prefix points into
+        base_key = prefix.rsplit("/", 1)[0] if "/" in prefix else ""
+        base = self._path(base_key) if base_key else self.root
+        infos = []
+        if not base.is_dir():
+            return infos
+        for dirpath, _dirnames, filenames in os.walk(base):
+            for filename in filenames:
+                path = Path(dirpath) / filename
+                key = path.relative_to(self.root).as_posix()
+                if key.startswith(prefix) and not filename.startswith("."):
+                    info = _stat_or_none(key, path)
+                    if info is not None:
+                        infos.append(info)
+        return sorted(infos, key=lambda info: info.key)
+
+
+def _open_temp(target: Path) -> tuple[BinaryIO, Path]:
+    """Create a hidden temporary file next to ``target``, unique so concurrent writes of a key don't collide."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".part")
+    return os.fdopen(fd, "wb"), Path(name)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    f, temp_path = _open_temp(path)
+    try:
+        with f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def _place_file(source: Path, target: Path, move: bool) -> int:
+    """Move or copy a file into place; returns its size."""
+    if move:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        size = source.stat().st_size
+        os.replace(source, target)
+        return size
+    size = 0
+    dst, temp_path = _open_temp(target)
+    try:
+        with dst, open(source, "rb") as src:
+            while chunk := src.read(STREAM_CHUNK_SIZE):
+                dst.write(chunk)
+                size += len(chunk)
+        os.replace(temp_path, target)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    return size
+
+
+def _read_or_none(path: Path) -> bytes | None:
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def _read_range(path: Path, start: int, end: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(start)
+        return f.read(end - start + 1)
+
+
+def _stat_or_none(key: str, path: Path) -> ObjectInfo | None:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return ObjectInfo(
+        key=key,
+        size=stat.st_size,
+        etag=f"{stat.st_mtime_ns:x}-{stat.st_size:x}",
+        modified_at=datetime.fromtimestamp(stat.st_mtime, tz=UTC),
+    )
+
+
+class InstrumentedBackend(StorageBackend):
+    """
+    Backend wrapper recording operation latency and bytes transferred.
+
+    Behaves exactly like the wrapped backend (same name, sharing and local
+    paths); StorageManager wraps whichever backend it is given.
+    """
+
+    def __init__(self, backend: StorageBackend):
+        self.inner = backend
+        self.name = backend.name
+        self.shared = backend.shared
+        # Operations in flight, so background work can tell when storage is busy
+        self.pending = 0
+
+    def _begin(self) -> float:
+        self.pending += 1
+        return time.perf_counter()
+
+    def _observe(self, operation: str, start: float) -> None:
+        self.pending -= 1
+        STORAGE_LATENCY.observe(time.perf_counter() - start, self.name, operation)
+
+    async def put(self, key: str, data: bytes) -> None:
+        start = self._begin()
+        try:
+            await self.inner.put(key, data)
+        finally:
+            self._observe("put", start)
+        STORAGE_BYTES.inc(self.name, "write", amount=len(data))
+
+    async def put_file(self, key: str, path: Path, move: bool = False) -> int:
+        start = self._begin()
+        try:
+            size = await self.inner.put_file(key, path, move)
+        finally:
+            self._observe("put_file", start)
+        STORAGE_BYTES.inc(self.name, "write", amount=size)
+        return size
+
+    async def put_stream(self, key: str, chunks: AsyncIterable[bytes]) -> int:
+        start = self._begin()
+        try:
+            size = await self.inner.put_stream(key, chunks)
+        finally:
+            self._observe("put_stream", start)
+        STORAGE_BYTES.inc(self.name, "write", amount=size)
+        return size
+
+    async def get(self, key: str) -> bytes | None:
+        start = self._begin()
+        try:
+            data = await self.inner.get(key)
+        finally:
+            self._observe("get", start)
+        if data is not None:
+            STORAGE_BYTES.inc(self.name, "read", amount=len(data))
+        return data
+
+    async def get_range(self, key: str, start: int, end: int) -> bytes:
+        started = self._begin()
+        try:
+            data = await self.inner.get_range(key, start, end)
+        finally:
+            self._observe("get_range", started)
+        STORAGE_BYTES.inc(self.name, "read", amount=len(data))
+        return data
+
+    async def stream(
+        self, key: str, start: int = 0, end: int | None = None, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        # Timed until the stream is exhausted or closed, so it includes the consumer's pace
+        started = self._begin()
+        size = 0
+        try:
+            async for chunk in self.inner.stream(key, start, end, chunk_size):
+                size += len(chunk)
+                yield chunk
+        finally:
+            self._observe("stream", started)
+            STORAGE_BYTES.inc(self.name, "read", amount=size)
+
+    async def stat(self, key: str) -> ObjectInfo | None:
+        start = self._begin()
+        try:
+            return await self.inner.stat(key)
+        finally:
+            self._observe("stat", start)
+
+    async def exists(self, key: str) -> bool:
+        start = self._begin()
+        try:
+            return await self.inner.exists(key)
+        finally:
+            self._observe("exists", start)
+
+    async def delete(self, key: str) -> None:
+        start = self._begin()
+        try:
+            await self.inner.delete(key)
+        finally:
+            self._observe("delete", start)
+
+    def list_objects(self, prefix: str = "") -> AsyncIterator[ObjectInfo]:
+        return self.inner.list_objects(prefix)
+
+    def local_path(self, key: str) -> Path | None:
+        return self.inner.local_path(key)
+
+    def use_executor(self, executor: ThreadPoolExecutor) -> None:
+        self.inner.use_executor(executor)
+
+    async def close(self) -> None:
+        await self.inner.close()
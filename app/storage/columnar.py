@@ -0,0 +1,319 @@
+"""
+Columnar export of experiment runs for analytics.
+
+Writes typed columns (provider, model, test_case_index, status, duration_ms
+and token usage) that load into dataframes without re-parsing nested JSON.
+
+Two formats are supported:
+
+- Arrow IPC (``.arrow``) when pyarrow is installed; Parquet on request.
+- A dependency-free fallback (``.columns`` directory): one raw fixed-width
+  file per column plus a JSON manifest recording the byte order.
+  Low-cardinality strings are dictionary-encoded; other strings use
+  Arrow-style offsets + UTF-8 data.
+
+Both formats are read through memory maps, so opening a multi-GB export
+costs almost nothing until columns are touched.
+"""
+
+import mmap
+import sys
+from array import array
+from collections.abc import Iterable
+from contextlib import ExitStack
+from contextlib import suppress
+from pathlib import Path
+from typing import Any
+
+from ..core import json_dumps
+from ..core import json_loads
+
+FORMAT_NAME = "sc-columnar"
+FORMAT_VERSION = 1
+
+# Integer columns use -1 for missing values in the fallback format
+NULL_INT = -1
+
+INT_COLUMNS = ["test_case_index", "duration_ms", "prompt_tokens", "completion_tokens", "total_tokens"]
+DICTIONARY_COLUMNS = ["provider", "model", "status"]
+STRING_COLUMNS = ["run_id"]
+
+
+def _get(run: Any, name: str) -> Any:
+    return run.get(name) if isinstance(run, dict) else getattr(run, name, None)
+
+
+def _row(run: Any) -> dict[str, Any]:
+    """Flatten a run (dict or ExperimentRun) into export columns."""
+    usage = _get(run, "usage_stats") or {}
+    status = _get(run, "status")
+    prompt_tokens = usage.get("prompt_tokens", usage.get("input_tokens"))
+    completion_tokens = usage.get("completion_tokens", usage.get("output_tokens"))
+    total_tokens = usage.get("total_tokens")
+    if total_tokens is None and prompt_tokens is not None and completion_tokens is not None:
+        total_tokens = prompt_tokens + completion_tokens
+    return {
+        "run_id": _get(run, "run_id"),
+        "provider": _get(run, "provider"),
+        "model": _get(run, "model"),
+        "status": getattr(status, "value", status),
+        "test_case_index": _get(run, "test_case_index"),
+        "duration_ms": _get(run, "duration_ms"),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": total_tokens,
+    }
+
+
+def arrow_available() -> bool:
+    """Check whether pyarrow is installed."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def write_columnar(runs: Iterable[Any], path: Path, format: str = "auto", batch_size: int = 10_000) -> Path:
+    """
+    Export runs to a columnar file.
+
+    Args:
+        runs: Runs as dicts or ExperimentRun models (consumed in batches)
+        path: Output path without extension
+        format: "arrow", "parquet", "columns" (fallback), or "auto"
+        batch_size: Rows converted per batch
+
+    Returns:
+        Path of the written export
+    """
+    if format == "auto":
+        format = "arrow" if arrow_available() else "columns"
+
+    if format in ("arrow", "parquet"):
+        return _write_arrow(runs, path, format, batch_size)
+    if format == "columns":
+        return _write_fallback(runs, path.with_suffix(".columns"), batch_size)
+    raise ValueError(f"Unknown columnar format '{format}'")
+
+
+def _write_arrow(runs: Iterable[Any], path: Path, format: str, batch_size: int) -> Path:
+    import pyarrow as pa
+
+    schema = pa.schema(
+        [("run_id", pa.string())]
+        + [(name, pa.dictionary(pa.int32(), pa.string())) for name in DICTIONARY_COLUMNS]
+        + [(name, pa.int64()) for name in INT_COLUMNS]
+    )
+
+    def batches():
+        rows: list[dict[str, Any]] = []
+        for run in runs:
+            rows.append(_row(run))
+            if len(rows) >= batch_size:
+                yield pa.RecordBatch.from_pylist(rows, schema=schema)
+                rows = []
+        if rows:
+            yield pa.RecordBatch.from_pylist(rows, schema=schema)
+
+    if format == "parquet":
+        import pyarrow.parquet as pq
+
+        target = path.with_suffix(".parquet")
+        with pq.ParquetWriter(target, schema) as writer:
+            for batch in batches():
+                writer.write_batch(batch)
+        return target
+
+    # Uncompressed IPC so readers can memory-map it without copying
+    target = path.with_suffix(".arrow")
+    with pa.OSFile(str(target), "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+        for batch in batches():
+            writer.write_batch(batch)
+    return target
+
+
+def _write_fallback(runs: Iterable[Any], directory: Path, batch_size: int) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    dictionaries: dict[str, dict[str, int]] = {name: {} for name in DICTIONARY_COLUMNS}
+    filenames = {name: f"{name}.i64" for name in INT_COLUMNS}
+    filenames.update({name: f"{name}.i32" for name in DICTIONARY_COLUMNS})
+    for name in STRING_COLUMNS:
+        filenames[f"{name}.offsets"] = f"{name}.offsets"
+        filenames[f"{name}.utf8"] = f"{name}.utf8"
+
+    num_rows = 0
+    string_offsets = dict.fromkeys(STRING_COLUMNS, 0)
+
+    def new_buffers() -> dict[str, Any]:
+        buffers: dict[str, Any] = {name: array("q") for name in INT_COLUMNS}
+        buffers.update({name: array("i") for name in DICTIONARY_COLUMNS})
+        for name in STRING_COLUMNS:
+            buffers[f"{name}.offsets"] = array("q")
+            buffers[f"{name}.utf8"] = bytearray()
+        return buffers
+
+    def flush(buffers: dict[str, Any]) -> None:
+        for key, buffer in buffers.items():
+            files[key].write(buffer if isinstance(buffer, bytearray) else buffer.tobytes())
+
+    with ExitStack() as stack:
+        files = {key: stack.enter_context(open(directory / filename, "wb")) for key, filename in filenames.items()}
+        for name in STRING_COLUMNS:
+            files[f"{name}.offsets"].write(array("q", [0]).tobytes())
+
+        buffers = new_buffers()
+        for run in runs:
+            row = _row(run)
+            for name in INT_COLUMNS:
+                value = row[name]
+                buffers[name].append(NULL_INT if value is None else int(value))
+            for name in DICTIONARY_COLUMNS:
+                value = row[name]
+                code = -1 if value is None else dictionaries[name].setdefault(value, len(dictionaries[name]))
+                buffers[name].append(code)
+            for name in STRING_COLUMNS:
+                data = (row[name] or "").encode()
+                buffers[f"{name}.utf8"] += data
+                string_offsets[name] += len(data)
+                buffers[f"{name}.offsets"].append(string_offsets[name])
+
+            num_rows += 1
+            if num_rows % batch_size == 0:
+                flush(buffers)
+                buffers = new_buffers()
+        flush(buffers)
+
+    columns: dict[str, dict[str, Any]] = {name: {"type": "int64"} for name in INT_COLUMNS}
+    columns.update(
+        {name: {"type": "dictionary", "dictionary": list(dictionaries[name])} for name in DICTIONARY_COLUMNS}
+    )
+    columns.update({name: {"type": "utf8"} for name in STRING_COLUMNS})
+    manifest = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "byteorder": sys.byteorder,
+        "num_rows": num_rows,
+        "columns": columns,
+    }
+    (directory / "manifest.json").write_bytes(json_dumps(manifest, indent=True))
+    return directory
+
+
+class DictionaryColumn:
+    """Dictionary-encoded string column backed by memory-mapped codes."""
+
+    def __init__(self, codes: Any, dictionary: list[str]):
+        self.codes = codes
+        self.dictionary = dictionary
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index: int) -> str | None:
+        code = self.codes[index]
+        return None if code < 0 else self.dictionary[code]
+
+    def to_list(self) -> list[str | None]:
+        return [None if code < 0 else self.dictionary[code] for code in self.codes]
+
+
+class StringColumn:
+    """Variable-length string column backed by memory-mapped offsets and data."""
+
+    def __init__(self, offsets: Any, data: Any):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return bytes(self.data[self.offsets[index] : self.offsets[index + 1]]).decode()
+
+    def to_list(self) -> list[str]:
+        return [self[i] for i in range(len(self))]
+
+
+class ColumnarTable:
+    """
+    Memory-mapped reader for the fallback columnar format.
+
+    Integer columns are returned as zero-copy memoryviews; with NumPy
+    installed, ``numpy.frombuffer(table["duration_ms"], dtype="<i8")``
+    gives an array view over the same pages.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        manifest = json_loads((directory / "manifest.json").read_bytes())
+        if manifest.get("format") != FORMAT_NAME:
+            raise ValueError(f"{directory} is not a {FORMAT_NAME} export")
+        self.num_rows: int = manifest["num_rows"]
+        self.schema: dict[str, dict[str, Any]] = manifest["columns"]
+        self._swap = manifest["byteorder"] != sys.byteorder
+        self._maps: list[mmap.mmap] = []
+
+    @property
+    def column_names(self) -> list[str]:
+        return list(self.schema)
+
+    def _map(self, filename: str, typecode: str) -> Any:
+        with open(self.directory / filename, "rb") as f:
+            if f.seek(0, 2) == 0:
+                return memoryview(b"").cast(typecode)
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        if typecode == "B":
+            return memoryview(mapped)
+        if self._swap:
+            values = array(typecode, mapped)
+            values.byteswap()
+            return memoryview(values)
+        return memoryview(mapped).cast(typecode)
+
+    def __getitem__(self, name: str) -> Any:
+        column = self.schema[name]
+        if column["type"] == "int64":
+            return self._map(f"{name}.i64", "q")
+        if column["type"] == "dictionary":
+            return DictionaryColumn(self._map(f"{name}.i32", "i"), column["dictionary"])
+        return StringColumn(self._map(f"{name}.offsets", "q"), self._map(f"{name}.utf8", "B"))
+
+    def to_pydict(self) -> dict[str, list[Any]]:
+        """Decode all columns into Python lists (nulls as None)."""
+        result: dict[str, list[Any]] = {}
+        for name, column in self.schema.items():
+            values = self[name]
+            if column["type"] == "int64":
+                result[name] = [None if value == NULL_INT else value for value in values]
+            else:
+                result[name] = values.to_list()
+        return result
+
+    def close(self) -> None:
+        """Unmap column files. Columns obtained from this table become invalid."""
+        for mapped in self._maps:
+            # A memoryview may still reference the map; it is then released with it
+            with suppress(BufferError):
+                mapped.close()
+        self._maps.clear()
+
+
+def open_columnar(path: Path) -> Any:
+    """
+    Open a columnar export with memory-mapped reads.
+
+    Returns:
+        A pyarrow Table for ``.arrow``/``.parquet`` exports, or a
+        ColumnarTable for the fallback format
+    """
+    if path.suffix == ".arrow":
+        import pyarrow as pa
+
+        return pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path, memory_map=True)
+    return ColumnarTable(path)
@@ -0,0 +1,89 @@
+"""
+Incremental readers for uploaded test-case datasets.
+
+Rows are parsed one at a time from CSV or JSONL files, so datasets of any
+size can feed experiment run generation without being loaded into memory.
+"""
+
+import csv
+import io
+import random
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from ..core import json_loads
+
+DATASET_FORMATS = ("csv", "jsonl")
+
+
+def detect_format(filename: str, content_type: str | None = None) -> str:
+    """
+    Detect a dataset's format from its filename or content type.
+
+    Raises:
+        ValueError: If the format is not a supported dataset format
+    """
+    suffix = Path(filename).suffix.lower()
+    if suffix == ".csv" or content_type == "text/csv":
+        return "csv"
+    if suffix in (".jsonl", ".ndjson") or content_type in ("application/jsonl", "application/x-ndjson"):
+        return "jsonl"
+    raise ValueError(f"Unsupported dataset format for '{filename}'. Supported: {DATASET_FORMATS}")
+
+
+def _iter_csv(f: io.TextIOBase) -> Iterator[dict[str, Any]]:
+    yield from csv.DictReader(f)
+
+
+def _iter_jsonl(f: io.TextIOBase) -> Iterator[dict[str, Any]]:
+    for line_number, line in enumerate(f, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json_loads(line)
+        except Exception as e:
+            raise ValueError(f"Invalid JSON on line {line_number}: {e}")
+        if not isinstance(row, dict):
+            raise ValueError(f"Line {line_number} is not a JSON object")
+        yield row
+
+
+def iter_rows(
+    path: Path,
+    format: str,
+    row_start: int = 0,
+    row_end: int | None = None,
+    sample_rate: float | None = None,
+    seed: int | None = None,
+) -> Iterator[tuple[int, dict[str, Any]]]:
+    """
+    Stream rows from a dataset file.
+
+    Args:
+        path: Dataset file path
+        format: "csv" or "jsonl"
+        row_start: First row index to include (for sharding)
+        row_end: Row index to stop before (None for end of file)
+        sample_rate: Fraction of rows to keep (None keeps all); sampling is
+            deterministic for a given seed
+        seed: Random seed for sampling
+
+    Yields:
+        (row_index, row) tuples, where row_index is the row's position in the file
+    """
+    readers = {"csv": _iter_csv, "jsonl": _iter_jsonl}
+    if format not in readers:
+        raise ValueError(f"Unsupported dataset format '{format}'. Supported: {DATASET_FORMATS}")
+
+    rng = random.Random(seed) if sample_rate is not None else None
+
+    with open(path, encoding="utf-8", newline="") as f:
+        for row_index, row in enumerate(readers[format](f)):
+            if row_end is not None and row_index >= row_end:
+                break
+            if row_index < row_start:
+                continue
+            if rng is not None and rng.random() >= sample_rate:
+                continue
+            yield row_index, row
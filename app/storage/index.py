@@ -0,0 +1,161 @@
+"""
+Persistent file metadata index.
+
+Maps file IDs to stored file information in a small local SQLite
+database, so lookups are a primary-key read instead of a directory scan
+or a round trip to the storage backend. It also keeps reference counts
+for content-addressed blobs. The ``.meta`` objects in the storage backend
+remain the source of truth; the index can always be rebuilt from them.
+"""
+
+import sqlite3
+import threading
+from collections import Counter
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+import structlog
+
+from ..core import json_dumps
+from ..core import json_loads
+
+logger = structlog.get_logger(__name__)
+
+
+class FileIndex:
+    """SQLite-backed file_id -> file information index with blob refcounts."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS files (file_id TEXT PRIMARY KEY, file_info BLOB NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS blobs (content_hash TEXT PRIMARY KEY, refcount INTEGER NOT NULL)"
+        )
+
+    def get(self, file_id: str) -> dict[str, Any] | None:
+        """Look up file information by ID."""
+        with self._lock:
+            row = self._conn.execute("SELECT file_info FROM files WHERE file_id = ?", (file_id,)).fetchone()
+        return json_loads(row[0]) if row else None
+
+    def put(self, file_info: dict[str, Any]) -> int:
+        """
+        Insert a file entry, taking a reference on its blob.
+
+        Inserting a file that is already indexed is a no-op, so entries read
+        back from the storage backend can be cached without double counting.
+
+        Returns:
+            Blob reference count after the insert (0 for files without a content hash)
+        """
+        content_hash = file_info.get("content_hash")
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                inserted = self._conn.execute(
+                    "INSERT INTO files (file_id, file_info) VALUES (?, ?) ON CONFLICT(file_id) DO NOTHING",
+                    (file_info["file_id"], json_dumps(file_info)),
+                ).rowcount
+                refcount = 0
+                if content_hash:
+                    if inserted:
+                        self._conn.execute(
+                            "INSERT INTO blobs (content_hash, refcount) VALUES (?, 1) "
+                            "ON CONFLICT(content_hash) DO UPDATE SET refcount = refcount + 1",
+                            (content_hash,),
+                        )
+                    refcount = self._refcount(content_hash)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return refcount
+
+    def delete(self, file_id: str) -> tuple[str | None, int]:
+        """
+        Remove a file entry, releasing its blob reference.
+
+        Returns:
+            The file's content hash (if any) and the blob's remaining reference count
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT file_info FROM files WHERE file_id = ?", (file_id,)).fetchone()
+                content_hash = json_loads(row[0]).get("content_hash") if row else None
+                self._conn.execute("DELETE FROM files WHERE file_id = ?", (file_id,))
+                refcount = 0
+                if content_hash:
+                    self._conn.execute(
+                        "UPDATE blobs SET refcount = refcount - 1 WHERE content_hash = ?",
+                        (content_hash,),
+                    )
+                    refcount = self._refcount(content_hash)
+                    if refcount <= 0:
+                        self._conn.execute("DELETE FROM blobs WHERE content_hash = ?", (content_hash,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return content_hash, max(refcount, 0)
+
+    def refcount(self, content_hash: str) -> int:
+        """Number of uploads referencing a blob."""
+        with self._lock:
+            return self._refcount(content_hash)
+
+    def _refcount(self, content_hash: str) -> int:
+        row = self._conn.execute("SELECT refcount FROM blobs WHERE content_hash = ?", (content_hash,)).fetchone()
+        return row[0] if row else 0
+
+    def count(self) -> int:
+        """Number of indexed files."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def rebuild(self, file_infos: Iterable[dict[str, Any]]) -> int:
+        """
+        Replace the index and blob refcounts with the given upload metadata.
+
+        Args:
+            file_infos: Metadata of every stored upload (from the ``.meta`` objects)
+
+        Returns:
+            Number of files indexed
+        """
+        entries = []
+        refcounts: Counter[str] = Counter()
+        for file_info in file_infos:
+            entries.append((file_info["file_id"], json_dumps(file_info)))
+            if file_info.get("content_hash"):
+                refcounts[file_info["content_hash"]] += 1
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM files")
+                self._conn.execute("DELETE FROM blobs")
+                self._conn.executemany("INSERT OR REPLACE INTO files (file_id, file_info) VALUES (?, ?)", entries)
+                self._conn.executemany("INSERT INTO blobs (content_hash, refcount) VALUES (?, ?)", refcounts.items())
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        logger.info("File index rebuilt", files=len(entries), blobs=len(refcounts), db_path=str(self.db_path))
+        return len(entries)
+
+    def discard(self, file_id: str) -> None:
+        """Drop a cached entry without touching blob refcounts (e.g. deleted by another replica)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM files WHERE file_id = ?", (file_id,))
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,559 @@
+"""
+Background storage maintenance.
+
+A maintenance pass walks the storage backend and:
+
+- expires uploads, experiments and exports by age (RetentionPolicy),
+- evicts the oldest exports, then experiments, while total usage is above
+  the size cap (uploads are never evicted for size),
+- never removes experiments that haven't finished, or uploads a queued or
+  running experiment reads as its dataset (see ``register_file_user``),
+- recompresses cold experiment run logs into lzma frames,
+- removes orphaned ``.meta`` objects (blob missing) and blobs no upload
+  references (after a grace period, so in-flight uploads are safe),
+- accounts storage usage per user.
+
+Passes are incremental: ``step()`` processes a small batch of objects and
+returns, the background loop pauses between batches and waits while
+foreground storage operations are in flight. The last completed report
+is stored in the backend under ``maintenance/report.json``.
+"""
+
+import asyncio
+import contextlib
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+from typing import Any
+
+import structlog
+from pydantic import BaseModel
+from pydantic import Field
+
+from ..config import settings
+from ..core import json_dumps
+from ..core import json_loads
+from .backends import ObjectInfo
+from .manager import EXPORT_CONTENT_TYPES
+from .manager import StorageManager
+from .manager import files_in_use
+from .manager import get_storage_manager
+
+logger = structlog.get_logger(__name__)
+
+REPORT_KEY = "maintenance/report.json"
+
+# Experiment states whose data no longer changes
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+UNKNOWN_OWNER = "unknown"
+
+
+class RetentionPolicy(BaseModel):
+    """What maintenance keeps, compresses and removes. ``None`` disables a rule."""
+
+    upload_max_age_days: float | None = None
+    experiment_max_age_days: float | None = None
+    export_max_age_days: float | None = None
+    max_total_bytes: int | None = None
+    cold_after_days: float | None = 7
+    orphan_grace_seconds: float = 3600
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> "RetentionPolicy":
+        """Create a policy from application settings (SC_STORAGE_* variables)."""
+        return cls(
+            upload_max_age_days=settings.STORAGE_UPLOAD_RETENTION_DAYS,
+            experiment_max_age_days=settings.STORAGE_EXPERIMENT_RETENTION_DAYS,
+            export_max_age_days=settings.STORAGE_EXPORT_RETENTION_DAYS,
+            max_total_bytes=settings.STORAGE_MAX_BYTES,
+            cold_after_days=settings.STORAGE_COLD_AFTER_DAYS,
+        )
+
+
+class UsageStats(BaseModel):
+    """Storage used by one user."""
+
+    uploads: int = 0
+    upload_bytes: int = 0
+    experiments: int = 0
+    experiment_bytes: int = 0
+    export_bytes: int = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self.upload_bytes + self.experiment_bytes + self.export_bytes
+
+
+class MaintenanceReport(BaseModel):
+    """Outcome of one maintenance pass."""
+
+    started_at: datetime
+    completed_at: datetime | None = None
+    objects_scanned: int = 0
+    uploads_expired: int = 0
+    experiments_expired: int = 0
+    exports_expired: int = 0
+    experiments_evicted: int = 0
+    exports_evicted: int = 0
+    experiments_recompressed: int = 0
+    orphan_metadata_removed: int = 0
+    orphan_blobs_removed: int = 0
+    bytes_freed: int = 0
+    total_bytes: int = 0
+    usage: dict[str, UsageStats] = Field(default_factory=dict)
+
+
+class _Candidate(BaseModel):
+    """Experiment or export that size-based eviction may remove."""
+
+    experiment_id: str
+    modified_at: datetime
+    size: int
+
+
+class _ExperimentInfo(BaseModel):
+    """What maintenance needs from an experiment summary."""
+
+    summary_key: str | None
+    owner: str
+    finished: bool
+    cold: bool
+    updated_at: datetime | None
+
+
+class StorageMaintenance:
+    """Incremental retention, compaction and cleanup for a StorageManager."""
+
+    def __init__(
+        self,
+        storage: StorageManager,
+        policy: RetentionPolicy | None = None,
+        batch_size: int = 50,
+        pause: float = 0.1,
+        max_backoff: float = 5.0,
+        cache_size: int = 10_000,
+    ):
+        """
+        Initialize maintenance.
+
+        Args:
+            storage: Storage manager to maintain
+            policy: Retention policy (defaults keep everything and only recompress/clean up)
+            batch_size: Objects processed per step
+            pause: Seconds to sleep between steps in the background loop
+            max_backoff: Longest wait for foreground I/O to go idle before a step
+            cache_size: Most experiment summaries kept between passes
+        """
+        self.storage = storage
+        self.policy = policy or RetentionPolicy()
+        self.batch_size = batch_size
+        self.pause = pause
+        self.max_backoff = max_backoff
+        self.cache_size = cache_size
+
+        self.report: MaintenanceReport | None = None
+        self.last_report: MaintenanceReport | None = None
+        self._pass: AsyncIterator[None] | None = None
+        self._task: asyncio.Task | None = None
+
+        # Summaries of finished experiments don't change, so they're read once
+        # (least recently seen dropped first; experiments gone from storage are
+        # dropped at the end of each pass)
+        self._experiments: OrderedDict[str, _ExperimentInfo] = OrderedDict()
+
+    # -- Driving ---------------------------------------------------------
+
+    async def step(self) -> bool:
+        """
+        Process one batch of objects.
+
+        Returns:
+            True if this step completed a pass
+        """
+        if self._pass is None:
+            self.report = MaintenanceReport(started_at=datetime.now(UTC))
+            self._pass = self._run_pass(self.report)
+
+        for _ in range(self.batch_size):
+            try:
+                await anext(self._pass)
+            except StopAsyncIteration:
+                await self._finish_pass()
+                return True
+        return False
+
+    async def run_once(self) -> MaintenanceReport:
+        """Run a complete pass (continuing one in progress), pausing between steps."""
+        while not await self.step():
+            await self._wait_for_quiet()
+        return self.last_report
+
+    async def _wait_for_quiet(self) -> None:
+        """Sleep between steps, longer while foreground storage operations are in flight."""
+        await asyncio.sleep(self.pause)
+        waited = 0.0
+        while self.storage.io_pending and waited < self.max_backoff:
+            await asyncio.sleep(self.pause)
+            waited += self.pause
+
+    def start(self, interval: float) -> None:
+        """
+        Run passes in the background.
+
+        Args:
+            interval: Seconds between the end of one pass and the start of the next
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(interval), name="storage-maintenance")
+
+    async def stop(self) -> None:
+        """Stop the background loop (an interrupted pass resumes on the next start)."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _loop(self, interval: float) -> None:
+        while True:
+            try:
+                if await self.step():
+                    await asyncio.sleep(interval)
+                else:
+                    await self._wait_for_quiet()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Start over on the next pass rather than stopping maintenance
+                logger.error("Storage maintenance step failed", error=str(e))
+                self._pass = None
+                await asyncio.sleep(interval)
+
+    async def _finish_pass(self) -> None:
+        report = self.report
+        report.completed_at = datetime.now(UTC)
+        await self.storage.backend.put(REPORT_KEY, json_dumps(report.model_dump(mode="json")))
+        self.last_report = report
+        self._pass = None
+        logger.info(
+            "Storage maintenance pass completed",
+            objects_scanned=report.objects_scanned,
+            bytes_freed=report.bytes_freed,
+            total_bytes=report.total_bytes,
+        )
+
+    async def load_report(self) -> MaintenanceReport | None:
+        """Latest completed report (possibly written by another replica)."""
+        data = await self.storage.backend.get(REPORT_KEY)
+        return MaintenanceReport.model_validate(json_loads(data)) if data is not None else None
+
+    # -- Pass ------------------------------------------------------------
+
+    def _expired(self, modified_at: datetime | None, max_age_days: float | None) -> bool:
+        if max_age_days is None or modified_at is None:
+            return False
+        return modified_at < self.report.started_at - timedelta(days=max_age_days)
+
+    def _owner(self, experiment_id: str) -> str | None:
+        experiment = self._experiments.get(experiment_id)
+        return experiment.owner if experiment else None
+
+    def _usage(self, owner: str | None) -> UsageStats:
+        return self.report.usage.setdefault(owner or UNKNOWN_OWNER, UsageStats())
+
+    async def _run_pass(self, report: MaintenanceReport) -> AsyncIterator[None]:
+        """The whole pass as a generator; each ``yield`` ends one unit of work."""
+        referenced: set[str] = set()
+        async for _ in self._scan_uploads(report, referenced):
+            yield
+        async for _ in self._scan_blobs(report, referenced):
+            yield
+
+        candidates: list[_Candidate] = []
+        async for _ in self._scan_experiments(report, candidates):
+            yield
+        exports: list[_Candidate] = []
+        async for _ in self._scan_exports(report, exports):
+            yield
+
+        async for _ in self._enforce_size_cap(report, exports, candidates):
+            yield
+
+    async def _scan_uploads(self, report: MaintenanceReport, referenced: set[str]) -> AsyncIterator[None]:
+        """Expire old uploads, drop metadata whose blob is gone, and collect referenced blobs."""
+        storage = self.storage
+        # Looked up once per pass; expired uploads are rechecked a batch at a time before deletion
+        in_use = files_in_use()
+        expired: list[dict[str, Any]] = []
+        async for info in storage.backend.list_objects("uploads/"):
+            if not info.key.endswith(".meta"):
+                continue
+            report.objects_scanned += 1
+            data = await storage.backend.get(info.key)
+            if data is None:
+                yield
+                continue
+            file_info = json_loads(data)
+            content_hash = file_info.get("content_hash")
+
+            uploaded_at = _parse_time(file_info.get("uploaded_at")) or info.modified_at
+            if self._expired(uploaded_at, self.policy.upload_max_age_days) and file_info["file_id"] not in in_use:
+                expired.append(file_info)
+                if len(expired) >= self.batch_size:
+                    await self._expire_uploads(report, expired, referenced)
+                    expired = []
+                yield
+                continue
+
+            if content_hash and not await storage.backend.exists(storage.blob_key(content_hash)):
+                await storage.discard_file_metadata(file_info)
+                report.orphan_metadata_removed += 1
+                logger.warning("Removed upload metadata without content", file_id=file_info["file_id"])
+                yield
+                continue
+
+            self._count_upload(file_info, referenced)
+            yield
+
+        if expired:
+            await self._expire_uploads(report, expired, referenced)
+
+    async def _expire_uploads(
+        self, report: MaintenanceReport, expired: list[dict[str, Any]], referenced: set[str]
+    ) -> None:
+        """Delete expired uploads, unless an experiment started reading one since the pass began."""
+        in_use = files_in_use()
+        for file_info in expired:
+            if file_info["file_id"] in in_use:
+                self._count_upload(file_info, referenced)
+            elif await self.storage.delete_file(file_info["file_id"]):
+                report.uploads_expired += 1
+                report.bytes_freed += file_info.get("size_bytes", 0)
+
+    def _count_upload(self, file_info: dict[str, Any], referenced: set[str]) -> None:
+        """Record a kept upload's blob as referenced and tally it against its owner."""
+        if file_info.get("content_hash"):
+            referenced.add(file_info["content_hash"])
+        usage = self._usage(file_info.get("owner_id") or file_info.get("metadata", {}).get("user_id"))
+        usage.uploads += 1
+        usage.upload_bytes += file_info.get("size_bytes", 0)
+
+    async def _scan_blobs(self, report: MaintenanceReport, referenced: set[str]) -> AsyncIterator[None]:
+        """Delete blobs no upload references, once they are older than the grace period."""
+        backend = self.storage.backend
+        grace_cutoff = report.started_at - timedelta(seconds=self.policy.orphan_grace_seconds)
+        orphans: list[ObjectInfo] = []
+        async for info in backend.list_objects("blobs/"):
+            report.objects_scanned += 1
+            content_hash = info.key.rsplit("/", 1)[1]
+            if content_hash in referenced:
+                report.total_bytes += info.size
+            elif info.modified_at is not None and info.modified_at < grace_cutoff:
+                orphans.append(info)
+            yield
+
+        if not orphans:
+            return
+
+        # Uploads that deduplicated against an orphan since the scan started re-reference it
+        async for info in backend.list_objects("uploads/"):
+            if info.key.endswith(".meta") and info.modified_at is not None and info.modified_at >= report.started_at:
+                data = await backend.get(info.key)
+                if data is not None:
+                    referenced.add(json_loads(data).get("content_hash"))
+            yield
+
+        for info in orphans:
+            content_hash = info.key.rsplit("/", 1)[1]
+            if content_hash not in referenced and await self.storage.delete_unreferenced_blob(content_hash):
+                report.orphan_blobs_removed += 1
+                report.bytes_freed += info.size
+            yield
+
+    async def _scan_experiments(self, report: MaintenanceReport, candidates: list[_Candidate]) -> AsyncIterator[None]:
+        """Expire and recompress experiments, accounting their size to their owners."""
+        experiments: dict[str, list[ObjectInfo]] = {}
+        async for info in self.storage.backend.list_objects("experiments/"):
+            experiments.setdefault(_experiment_id(info.key), []).append(info)
+            yield
+
+        for experiment_id, objects in experiments.items():
+            report.objects_scanned += len(objects)
+            size = sum(info.size for info in objects)
+            modified_at = max((info.modified_at for info in objects if info.modified_at), default=None)
+            experiment = self._experiments.get(experiment_id)
+            if experiment is None or not experiment.finished:
+                experiment = await self._read_experiment(objects, modified_at)
+            self._cache(experiment_id, experiment)
+            # Recompression rewrites objects, so age is taken from the summary when known
+            updated_at = experiment.updated_at or modified_at
+
+            # Queued or running experiments (no summary yet, or a non-final status) are left alone
+            if experiment.finished and self._expired(updated_at, self.policy.experiment_max_age_days):
+                report.bytes_freed += await self.storage.delete_experiment_data(experiment_id)
+                report.experiments_expired += 1
+                self._experiments.pop(experiment_id, None)
+                yield
+                continue
+
+            if experiment.finished and not experiment.cold and self._expired(updated_at, self.policy.cold_after_days):
+                await self._recompress(experiment_id, experiment)
+                report.experiments_recompressed += 1
+                size = 0
+                async for info in self.storage.backend.list_objects(f"experiments/{experiment_id}/"):
+                    size += info.size
+
+            usage = self._usage(experiment.owner)
+            usage.experiments += 1
+            usage.experiment_bytes += size
+            report.total_bytes += size
+            if experiment.finished and updated_at is not None:
+                candidates.append(_Candidate(experiment_id=experiment_id, modified_at=updated_at, size=size))
+            yield
+
+        for experiment_id in [experiment_id for experiment_id in self._experiments if experiment_id not in experiments]:
+            del self._experiments[experiment_id]
+
+    def _cache(self, experiment_id: str, experiment: _ExperimentInfo) -> None:
+        self._experiments[experiment_id] = experiment
+        self._experiments.move_to_end(experiment_id)
+        while len(self._experiments) > self.cache_size:
+            self._experiments.popitem(last=False)
+
+    async def _read_experiment(self, objects: list[ObjectInfo], modified_at: datetime | None) -> _ExperimentInfo:
+        summary_info = next((info for info in objects if _is_summary(info.key)), None)
+        data = await self.storage.backend.get(summary_info.key) if summary_info else None
+        summary = json_loads(data) if data is not None else {}
+        return _ExperimentInfo(
+            summary_key=summary_info.key if summary_info else None,
+            owner=summary.get("created_by") or UNKNOWN_OWNER,
+            finished=summary.get("status") in FINISHED_STATUSES,
+            cold=summary.get("storage_tier") == "cold",
+            updated_at=_parse_time(summary.get("completed_at") or summary.get("created_at")),
+        )
+
+    async def _recompress(self, experiment_id: str, experiment: _ExperimentInfo) -> None:
+        """Merge a finished experiment's run log into lzma frames and mark it cold."""
+        await self.storage.compact_experiment_data(experiment_id, force=True)
+        if experiment.summary_key is not None and experiment.summary_key.endswith("/experiment.json"):
+            data = await self.storage.backend.get(experiment.summary_key)
+            if data is not None:
+                summary = json_loads(data)
+                summary["storage_tier"] = "cold"
+                await self.storage.backend.put(experiment.summary_key, json_dumps(summary))
+        experiment.cold = True
+        logger.info("Experiment recompressed for cold storage", experiment_id=experiment_id)
+
+    async def _scan_exports(self, report: MaintenanceReport, exports: list[_Candidate]) -> AsyncIterator[None]:
+        """Expire old exports, accounting them to the experiment's owner."""
+        sizes: dict[str, int] = {}
+        modified: dict[str, datetime] = {}
+        async for info in self.storage.backend.list_objects("results/"):
+            report.objects_scanned += 1
+            experiment_id = _export_experiment_id(info.key)
+            sizes[experiment_id] = sizes.get(experiment_id, 0) + info.size
+            if info.modified_at is not None:
+                modified[experiment_id] = max(modified.get(experiment_id, info.modified_at), info.modified_at)
+            yield
+
+        for experiment_id, size in sizes.items():
+            if self._expired(modified.get(experiment_id), self.policy.export_max_age_days):
+                report.bytes_freed += await self.storage.delete_experiment_export(experiment_id)
+                report.exports_expired += 1
+                yield
+                continue
+
+            self._usage(self._owner(experiment_id)).export_bytes += size
+            report.total_bytes += size
+            if experiment_id in modified:
+                exports.append(_Candidate(experiment_id=experiment_id, modified_at=modified[experiment_id], size=size))
+            yield
+
+    async def _enforce_size_cap(
+        self, report: MaintenanceReport, exports: list[_Candidate], experiments: list[_Candidate]
+    ) -> AsyncIterator[None]:
+        """Evict the oldest exports, then experiments, until usage is under the cap."""
+        cap = self.policy.max_total_bytes
+        if cap is None or report.total_bytes <= cap:
+            return
+
+        for candidate in sorted(exports, key=lambda c: c.modified_at):
+            if report.total_bytes <= cap:
+                return
+            freed = await self.storage.delete_experiment_export(candidate.experiment_id)
+            self._evicted(report, candidate.experiment_id, freed, "export_bytes")
+            report.exports_evicted += 1
+            yield
+
+        for candidate in sorted(experiments, key=lambda c: c.modified_at):
+            if report.total_bytes <= cap:
+                return
+            # Exports were already evicted above, so this frees the run log and summary
+            freed = await self.storage.delete_experiment_data(candidate.experiment_id)
+            self._evicted(report, candidate.experiment_id, freed, "experiment_bytes")
+            usage = self._usage(self._owner(candidate.experiment_id))
+            self._experiments.pop(candidate.experiment_id, None)
+            usage.experiments -= 1
+            report.experiments_evicted += 1
+            yield
+
+    def _evicted(self, report: MaintenanceReport, experiment_id: str, freed: int, field: str) -> None:
+        report.total_bytes -= freed
+        report.bytes_freed += freed
+        usage = self._usage(self._owner(experiment_id))
+        setattr(usage, field, max(getattr(usage, field) - freed, 0))
+
+
+def _experiment_id(key: str) -> str:
+    """Experiment ID of an object under ``experiments/``."""
+    name = key.split("/", 2)[1]
+    return name.removesuffix(".json") if key.count("/") == 1 else name
+
+
+def _is_summary(key: str) -> bool:
+    """Whether a key is an experiment summary (current or legacy layout)."""
+    return key.endswith("/experiment.json") or key.count("/") == 1
+
+
+def _export_experiment_id(key: str) -> str:
+    """Experiment ID of an object under ``results/``."""
+    name = key.split("/", 2)[1]
+    for suffix in (*EXPORT_CONTENT_TYPES, ".digests.json"):
+        if name.endswith(suffix):
+            return name.removesuffix(suffix)
+    return name
+
+
+def _parse_time(value: str | None) -> datetime | None:
+    """Parse a stored ISO timestamp (naive values are UTC)."""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=UTC)
+
+
+# Background maintenance for the global storage manager
+_maintenance: StorageMaintenance | None = None
+
+
+def start_maintenance() -> StorageMaintenance | None:
+    """Start background maintenance of the global storage manager (if enabled in settings)."""
+    global _maintenance
+    interval = settings.STORAGE_MAINTENANCE_INTERVAL_SECONDS
+    if not interval:
+        return None
+    if _maintenance is None:
+        _maintenance = StorageMaintenance(get_storage_manager(), RetentionPolicy.from_settings(settings))
+    _maintenance.start(interval)
+    return _maintenance
+
+
+async def stop_maintenance() -> None:
+    """Stop background maintenance."""
+    global _maintenance
+    if _maintenance is not None:
+        maintenance, _maintenance = _maintenance, None
+        await maintenance.stop()
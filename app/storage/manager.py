@@ -2,20 +2,107 @@
 Storage management for Shadow Cauldron.
 
 Handles file uploads, experiment data persistence, and result archiving.
+
+Objects (upload blobs and metadata, experiment summaries, exports) live in
+a pluggable StorageBackend: the local filesystem by default, or an
+S3-compatible service shared by several API replicas (see backends.py and
+s3.py). Local working state stays under ``storage_root``: the file index,
+temporary upload files, active run log segments and a download cache.
+
+Blocking disk I/O runs on a bounded thread pool so the event loop never
+blocks on the filesystem; uploads are streamed in chunks.
+
+Experiment runs are persisted incrementally to a compressed append-only
+run log per experiment (see runlog.py), and indexed by provider, model,
+status and duration for paginated listings (see runindex.py).
+
+Uploaded content is deduplicated: each upload is hashed while it streams
+to a temporary file and stored once under its SHA-256 in a sharded
+``blobs/ab/cd/<hash>`` layout. Per-upload ``uploads/<file_id>.meta``
+objects reference the blob, and a blob is removed when its last reference
+is deleted.
+
+The global manager is created on first use (or by the application
+lifespan) from SC_STORAGE_* settings, so importing this module touches
+neither the filesystem nor the log.
 """
 
-import json
+import asyncio
+import base64
+import hashlib
+import inspect
+import itertools
+import os
 import shutil
+import threading
 import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 from typing import BinaryIO
+from typing import TypeVar
 
 import structlog
+from pydantic import BaseModel
+
+from ..config import Settings
+from ..config import settings
+from ..core import json_dumps
+from ..core import json_loads
+from ..core import register_callback
+from .backends import InstrumentedBackend
+from .backends import LocalBackend
+from .backends import StorageBackend
+from .columnar import open_columnar
+from .columnar import write_columnar
+from .datasets import detect_format
+from .datasets import iter_rows
+from .index import FileIndex
+from .runindex import INDEXED_FIELDS
+from .runindex import RunIndex
+from .runlog import RunLog
+from .s3 import S3Backend
 
 logger = structlog.get_logger(__name__)
 
+T = TypeVar("T")
+
+# Chunk size for streaming uploads to disk
+CHUNK_SIZE = 1024 * 1024
+
+# Columnar export suffixes, in lookup order, and their media types
+EXPORT_CONTENT_TYPES = {
+    ".arrow": "application/vnd.apache.arrow.file",
+    ".parquet": "application/vnd.apache.parquet",
+    ".columns": "application/octet-stream",
+}
+
+
+class Download(BaseModel):
+    """A stored object ready to be served to a client."""
+
+    key: str
+    size: int
+    etag: str
+    filename: str
+    content_type: str | None = None
+    # Local file for zero-copy serving (None for remote backends)
+    path: Path | None = None
+
+
+class RunPage(BaseModel):
+    """One page of an experiment's run listing."""
+
+    runs: list[dict[str, Any]]
+    next_cursor: str | None = None
+
 
 class StorageManager:
     """
@@ -25,16 +112,148 @@ class StorageManager:
     backends (local filesystem, S3, etc.) through configuration.
     """
 
-    def __init__(self, storage_root: str = "./storage"):
+    def __init__(
+        self,
+        storage_root: str = "./storage",
+        io_workers: int = 4,
+        backend: StorageBackend | None = None,
+        run_log_cache_size: int = 256,
+    ):
+        """
+        Initialize the storage manager.
+
+        Args:
+            storage_root: Directory for local working state (and objects, with the local backend)
+            io_workers: Threads for blocking filesystem work
+            backend: Object storage backend (defaults to the local filesystem under storage_root)
+            run_log_cache_size: Run logs kept open (least recently used are dropped)
+        """
         self.storage_root = Path(storage_root)
-        self.storage_root.mkdir(exist_ok=True)
+        (self.storage_root / "tmp").mkdir(parents=True, exist_ok=True)
+
+        # Bounded pool for blocking filesystem work
+        self._io_executor = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="storage-io")
+
+        # Instrumented for /metrics (I/O latency and bytes by operation)
+        self.backend = InstrumentedBackend(backend or LocalBackend(self.storage_root))
+        self.backend.use_executor(self._io_executor)
+
+        # file_id -> file info index, so lookups don't hit the backend
+        self.file_index = FileIndex(self.storage_root / "index.sqlite3")
+        self.run_index = RunIndex(self.storage_root / "runs.sqlite3")
+        uploads_dir = self.backend.local_path("uploads")
+        if uploads_dir is not None and self.file_index.count() == 0 and next(uploads_dir.glob("*.meta"), None):
+            self.file_index.rebuild(_read_meta_files(uploads_dir.glob("*.meta")))
+
+        # Serializes blob commit/release per content hash, so a blob can't be
+        # collected while being re-referenced
+        self._blob_locks: dict[str, list[Any]] = {}
+
+        # Per-experiment append-only run logs, least recently used first
+        self._run_logs: OrderedDict[str, RunLog] = OrderedDict()
+        self._run_logs_lock = threading.Lock()
+        self.run_log_cache_size = run_log_cache_size
+
+        # Calls currently on the I/O pool (see io_pending)
+        self._io_calls = 0
+
+        logger.info("Storage manager initialized", storage_root=str(self.storage_root), backend=self.backend.name)
+
+    @classmethod
+    def from_settings(cls, config: Settings, storage_root: str | None = None) -> "StorageManager":
+        """
+        Create a storage manager with the backend selected by SC_STORAGE_BACKEND.
+
+        Args:
+            config: Application settings
+            storage_root: Local storage root (defaults to SC_STORAGE_ROOT)
+
+        Raises:
+            ValueError: If the backend name is unknown or its settings are incomplete
+        """
+        storage_root = storage_root or config.STORAGE_ROOT
+        if config.STORAGE_BACKEND == "local":
+            return cls(storage_root)
+        if config.STORAGE_BACKEND == "s3":
+            return cls(storage_root, backend=S3Backend.from_settings(config))
+        raise ValueError(f"Unknown storage backend '{config.STORAGE_BACKEND}'. Supported: local, s3")
+
+    @property
+    def io_pending(self) -> int:
+        """Storage operations in flight (I/O pool calls and backend requests), so background work can back off."""
+        return self._io_calls + self.backend.pending
+
+    async def _run_io(self, func: Callable[..., T], *args: Any) -> T:
+        """Run a blocking filesystem call on the storage I/O pool."""
+        loop = asyncio.get_running_loop()
+        self._io_calls += 1
+        try:
+            return await loop.run_in_executor(self._io_executor, func, *args)
+        finally:
+            self._io_calls -= 1
+
+    @asynccontextmanager
+    async def _blob_guard(self, content_hash: str) -> AsyncIterator[None]:
+        """Hold the lock for one content hash."""
+        entry = self._blob_locks.setdefault(content_hash, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._blob_locks[content_hash]
+
+    @staticmethod
+    def blob_key(content_hash: str) -> str:
+        """Backend key of a content-addressed blob."""
+        return f"blobs/{content_hash[:2]}/{content_hash[2:4]}/{content_hash}"
+
+    @staticmethod
+    def _content_key(file_info: dict[str, Any]) -> str:
+        """Backend key of an upload's content."""
+        if "storage_key" in file_info:
+            return file_info["storage_key"]
+        if "content_hash" in file_info:
+            return StorageManager.blob_key(file_info["content_hash"])
+        # Uploads stored before deduplication live directly in uploads/
+        return f"uploads/{Path(file_info['file_path']).name}"
+
+    def _meta_key(self, file_info: dict[str, Any]) -> str:
+        """Backend key of an upload's metadata."""
+        if "content_hash" in file_info:
+            return f"uploads/{file_info['file_id']}.meta"
+        # Uploads stored before deduplication keep their metadata next to the file
+        return self._content_key(file_info) + ".meta"
+
+    def _local_path(self, key: str) -> Path:
+        """Local path for an object: the object itself, or its place in the download cache."""
+        return self.backend.local_path(key) or self.storage_root / "cache" / key
 
-        # Create subdirectories
-        (self.storage_root / "uploads").mkdir(exist_ok=True)
-        (self.storage_root / "experiments").mkdir(exist_ok=True)
-        (self.storage_root / "results").mkdir(exist_ok=True)
+    async def _write_stream(self, file_data: Any, file_path: Path) -> tuple[int, str]:
+        """
+        Stream a file object to disk in chunks, hashing it on the way.
+
+        Supports both blocking file objects and objects with an async
+        ``read`` (such as Starlette's UploadFile).
+
+        Returns:
+            Number of bytes written and the SHA-256 hex digest of the content
+        """
+        if not inspect.iscoroutinefunction(getattr(file_data, "read", None)):
+            return await self._run_io(_copy_to_file, file_data, file_path)
 
-        logger.info("Storage manager initialized", storage_root=str(self.storage_root))
+        size = 0
+        hasher = hashlib.sha256()
+        f = await self._run_io(open, file_path, "wb")
+        try:
+            while chunk := await file_data.read(CHUNK_SIZE):
+                await self._run_io(_write_chunk, f, hasher, chunk)
+                size += len(chunk)
+        finally:
+            await self._run_io(f.close)
+        return size, hasher.hexdigest()
 
     async def upload_file(
         self,
@@ -42,6 +261,7 @@ class StorageManager:
         filename: str,
         content_type: str | None = None,
         metadata: dict[str, Any] | None = None,
+        owner_id: str | None = None,
     ) -> dict[str, Any]:
         """
         Upload a file to storage.
@@ -51,6 +271,7 @@ class StorageManager:
             filename: Original filename
             content_type: MIME content type
             metadata: Additional file metadata
+            owner_id: ID of the uploading user, for usage accounting
 
         Returns:
             File information dictionary with ID, path, and metadata
@@ -58,68 +279,95 @@ class StorageManager:
         # Generate unique file ID
         file_id = str(uuid.uuid4())
 
-        # Preserve file extension
-        file_ext = Path(filename).suffix
-        stored_filename = f"{file_id}{file_ext}"
+        # Stream to a temporary file while hashing
+        temp_path = self.storage_root / "tmp" / f"{file_id}.part"
+        try:
+            size_bytes, content_hash = await self._write_stream(file_data, temp_path)
 
-        # Determine storage path
-        file_path = self.storage_root / "uploads" / stored_filename
+            # Create metadata
+            storage_key = self.blob_key(content_hash)
+            local_path = self.backend.local_path(storage_key)
+            file_info = {
+                "file_id": file_id,
+                "original_filename": filename,
+                "content_hash": content_hash,
+                "storage_key": storage_key,
+                "file_path": str(local_path) if local_path else None,
+                "content_type": content_type,
+                "size_bytes": size_bytes,
+                "uploaded_at": datetime.utcnow().isoformat(),
+                "metadata": metadata or {},
+                "owner_id": owner_id,
+            }
 
-        # Write file to disk
-        with open(file_path, "wb") as f:
-            shutil.copyfileobj(file_data, f)
+            # Move content into the blob store (or drop it if already stored) and save metadata
+            refcount = await self._commit_upload(temp_path, file_info)
+        finally:
+            await self._run_io(temp_path.unlink, True)
 
-        # Create metadata
-        file_info = {
-            "file_id": file_id,
-            "original_filename": filename,
-            "stored_filename": stored_filename,
-            "file_path": str(file_path),
-            "content_type": content_type,
-            "size_bytes": file_path.stat().st_size,
-            "uploaded_at": datetime.utcnow().isoformat(),
-            "metadata": metadata or {},
-        }
+        logger.info(
+            "File uploaded",
+            file_id=file_id,
+            filename=filename,
+            size_bytes=size_bytes,
+            deduplicated=refcount > 1,
+        )
 
-        # Save metadata file
-        metadata_path = file_path.with_suffix(file_path.suffix + ".meta")
-        with open(metadata_path, "w") as f:
-            json.dump(file_info, f, indent=2)
+        return file_info
 
-        logger.info("File uploaded", file_id=file_id, filename=filename, size_bytes=file_info["size_bytes"])
+    async def _commit_upload(self, temp_path: Path, file_info: dict[str, Any]) -> int:
+        """Store an upload's blob if new, write its metadata and take a reference."""
+        storage_key = file_info["storage_key"]
+        async with self._blob_guard(file_info["content_hash"]):
+            if not await self.backend.exists(storage_key):
+                await self.backend.put_file(storage_key, temp_path, move=True)
 
-        return file_info
+            await self.backend.put(self._meta_key(file_info), json_dumps(file_info))
+            return await self._run_io(self.file_index.put, file_info)
 
     async def get_file(self, file_id: str) -> dict[str, Any] | None:
         """
         Get file information and path.
 
+        Lookups are served from the local index; on a miss (e.g. a file
+        uploaded through another replica) the upload's metadata object is
+        read from the backend and cached.
+
         Args:
             file_id: Unique file identifier
 
         Returns:
             File information dictionary or None if not found
         """
-        # Search for metadata file
-        uploads_dir = self.storage_root / "uploads"
+        file_info = await self._run_io(self.file_index.get, file_id)
+        if file_info is None:
+            data = await self.backend.get(f"uploads/{file_id}.meta")
+            if data is None:
+                return None
+            file_info = json_loads(data)
+            await self._run_io(self.file_index.put, file_info)
+            return file_info
 
-        for meta_file in uploads_dir.glob(f"{file_id}*.meta"):
-            with open(meta_file) as f:
-                file_info = json.load(f)
-
-            # Check if actual file exists
-            file_path = Path(file_info["file_path"])
-            if file_path.exists():
+        if self.backend.shared:
+            # Another replica may have deleted the file since it was cached
+            if await self.backend.exists(self._meta_key(file_info)):
                 return file_info
-            logger.warning("File metadata found but file missing", file_id=file_id)
+            await self._run_io(self.file_index.discard, file_id)
             return None
 
+        # Check if actual file exists
+        if await self.backend.exists(self._content_key(file_info)):
+            return file_info
+        logger.warning("File metadata found but file missing", file_id=file_id)
         return None
 
     async def delete_file(self, file_id: str) -> bool:
         """
         Delete a file from storage.
 
+        On shared backends the local refcount only covers this replica, so
+        unreferenced blobs are left for storage maintenance to collect.
+
         Args:
             file_id: Unique file identifier
 
@@ -130,78 +378,823 @@ class StorageManager:
         if not file_info:
             return False
 
-        # Delete actual file
-        file_path = Path(file_info["file_path"])
-        if file_path.exists():
-            file_path.unlink()
+        content_key = self._content_key(file_info)
+        async with self._blob_guard(file_info.get("content_hash") or content_key):
+            await self.backend.delete(self._meta_key(file_info))
+            content_hash, refcount = await self._run_io(self.file_index.delete, file_id)
 
-        # Delete metadata file
-        meta_path = file_path.with_suffix(file_path.suffix + ".meta")
-        if meta_path.exists():
-            meta_path.unlink()
+            # Collect the content once nothing references it
+            if content_hash is None or (refcount == 0 and not self.backend.shared):
+                await self.backend.delete(content_key)
 
         logger.info("File deleted", file_id=file_id)
         return True
 
+    async def discard_file_metadata(self, file_info: dict[str, Any]) -> None:
+        """
+        Remove an upload's metadata object and index entry, leaving its content alone.
+
+        Used by storage maintenance for uploads whose content is already gone.
+        """
+        await self.backend.delete(self._meta_key(file_info))
+        await self._run_io(self.file_index.delete, file_info["file_id"])
+
+    async def delete_unreferenced_blob(self, content_hash: str) -> bool:
+        """
+        Delete a content blob unless an upload in the file index references it.
+
+        Returns:
+            True if the blob was deleted
+        """
+        async with self._blob_guard(content_hash):
+            if await self._run_io(self.file_index.refcount, content_hash):
+                return False
+            await self.backend.delete(self.blob_key(content_hash))
+            return True
+
+    async def rebuild_index(self) -> int:
+        """
+        Rebuild the file index from the metadata objects in the backend.
+
+        Returns:
+            Number of files indexed
+        """
+        file_infos = []
+        async for info in self.backend.list_objects("uploads/"):
+            if not info.key.endswith(".meta"):
+                continue
+            data = await self.backend.get(info.key)
+            try:
+                file_infos.append(json_loads(data))
+            except (TypeError, ValueError) as e:
+                logger.warning("Skipping unreadable metadata file", key=info.key, error=str(e))
+        return await self._run_io(self.file_index.rebuild, file_infos)
+
+    @asynccontextmanager
+    async def _local_copy(self, key: str) -> AsyncIterator[Path]:
+        """Local file with an object's content, downloaded to tmp/ if the backend is remote."""
+        local_path = self.backend.local_path(key)
+        if local_path is not None:
+            yield local_path
+            return
+
+        temp_path = self.storage_root / "tmp" / f"{uuid.uuid4()}.download"
+        try:
+            await self._download(key, temp_path)
+            yield temp_path
+        finally:
+            await self._run_io(temp_path.unlink, True)
+
+    async def _download(self, key: str, path: Path) -> None:
+        """Stream an object from the backend to a local file."""
+        await self._run_io(lambda: path.parent.mkdir(parents=True, exist_ok=True))
+        f = await self._run_io(open, path, "wb")
+        try:
+            async for chunk in self.backend.stream(key):
+                await self._run_io(f.write, chunk)
+        finally:
+            await self._run_io(f.close)
+
+    def _experiment_dir(self, experiment_id: str) -> Path:
+        return self.storage_root / "experiments" / experiment_id
+
+    def _run_log(self, experiment_id: str) -> RunLog:
+        """Get the (cached) run log for an experiment."""
+        with self._run_logs_lock:
+            run_log = self._run_logs.get(experiment_id)
+            if run_log is not None:
+                self._run_logs.move_to_end(experiment_id)
+                return run_log
+            run_log = RunLog(self._experiment_dir(experiment_id))
+            self._run_logs[experiment_id] = run_log
+            # Logs merging in the background are kept, so a new instance can't merge the same segments
+            for cached_id in list(self._run_logs)[:-1]:
+                if len(self._run_logs) <= self.run_log_cache_size:
+                    break
+                if not self._run_logs[cached_id].compacting:
+                    del self._run_logs[cached_id]
+            return run_log
+
+    def _release_run_log(self, experiment_id: str) -> None:
+        """Drop an experiment's run log from the cache once it's done with (unless it is merging)."""
+        with self._run_logs_lock:
+            run_log = self._run_logs.get(experiment_id)
+            if run_log is not None and not run_log.compacting:
+                del self._run_logs[experiment_id]
+
+    async def _open_run_log(self, experiment_id: str) -> RunLog:
+        """
+        Get an experiment's run log for reading.
+
+        With a remote backend, sealed segments published by another replica
+        are downloaded first if this replica has none.
+        """
+        run_log = self._run_log(experiment_id)
+        if self.backend.local_path("experiments") is None and not await self._run_io(run_log.segments):
+            async for info in self.backend.list_objects(f"experiments/{experiment_id}/segment-"):
+                await self._download(info.key, self._experiment_dir(experiment_id) / info.key.rsplit("/", 1)[1])
+            await self._run_io(run_log.reload)
+        return run_log
+
+    async def _publish_run_log(self, experiment_id: str) -> None:
+        """Copy an experiment's sealed run log segments to a remote backend."""
+        if self.backend.local_path("experiments") is not None:
+            return
+
+        run_log = self._run_log(experiment_id)
+        segments = {path.name: path for path in await self._run_io(run_log.segments)}
+        prefix = f"experiments/{experiment_id}/"
+        published = {info.key[len(prefix) :] async for info in self.backend.list_objects(prefix + "segment-")}
+        for name, path in segments.items():
+            await self.backend.put_file(prefix + name, path)
+        # Compaction merges segments, leaving stale copies behind
+        for name in published - segments.keys():
+            await self.backend.delete(prefix + name)
+
+    async def iter_dataset(
+        self,
+        file_id: str,
+        row_start: int = 0,
+        row_end: int | None = None,
+        sample_rate: float | None = None,
+        seed: int | None = None,
+        batch_size: int = 500,
+    ) -> AsyncIterator[tuple[int, dict[str, Any]]]:
+        """
+        Stream test-case rows from an uploaded CSV or JSONL dataset.
+
+        Rows are parsed incrementally on the I/O pool and handed over in
+        batches, so memory use is independent of dataset size.
+
+        Args:
+            file_id: ID of the uploaded dataset file
+            row_start: First row index to include (for sharding)
+            row_end: Row index to stop before (None for end of file)
+            sample_rate: Fraction of rows to keep (None keeps all)
+            seed: Random seed for deterministic sampling
+            batch_size: Rows parsed per I/O call
+
+        Yields:
+            (row_index, row) tuples
+
+        Raises:
+            FileNotFoundError: If the dataset file does not exist
+            ValueError: If the file is not a supported dataset format
+        """
+        file_info = await self.get_file(file_id)
+        if file_info is None:
+            raise FileNotFoundError(f"Dataset file {file_id} not found")
+
+        format = detect_format(file_info["original_filename"], file_info.get("content_type"))
+        async with self._local_copy(self._content_key(file_info)) as path:
+            rows = iter_rows(path, format, row_start, row_end, sample_rate, seed)
+            try:
+                while batch := await self._run_io(_next_batch, rows, batch_size):
+                    for row in batch:
+                        yield row
+            finally:
+                await self._run_io(rows.close)
+
+    async def count_dataset_rows(
+        self,
+        file_id: str,
+        row_start: int = 0,
+        row_end: int | None = None,
+        sample_rate: float | None = None,
+        seed: int | None = None,
+    ) -> int:
+        """
+        Count the rows iter_dataset() yields for the same arguments.
+
+        The count is exact for unsampled and seeded reads; for unseeded
+        sampling it is one draw of the (random) sample size.
+
+        Raises:
+            FileNotFoundError: If the dataset file does not exist
+            ValueError: If the file is not a supported dataset format
+        """
+        file_info = await self.get_file(file_id)
+        if file_info is None:
+            raise FileNotFoundError(f"Dataset file {file_id} not found")
+
+        format = detect_format(file_info["original_filename"], file_info.get("content_type"))
+        async with self._local_copy(self._content_key(file_info)) as path:
+            rows = iter_rows(path, format, row_start, row_end, sample_rate, seed)
+            return await self._run_io(_count_items, rows)
+
     async def save_experiment_data(self, experiment_id: str, data: dict[str, Any]) -> str:
         """
         Save experiment data to storage.
 
+        The experiment summary (everything except ``runs``) is rewritten as a
+        small JSON object. Runs are append-only: only runs beyond those already
+        in the experiment's run log are written, so repeated saves of a
+        growing experiment cost O(new runs).
+
         Args:
             experiment_id: Experiment identifier
             data: Experiment data to save
 
         Returns:
-            Path where data was saved
+            Key prefix where data was saved
         """
-        experiment_path = self.storage_root / "experiments" / f"{experiment_id}.json"
-
         # Add timestamp
         data["saved_at"] = datetime.utcnow().isoformat()
 
-        with open(experiment_path, "w") as f:
-            json.dump(data, f, indent=2, default=str)
+        summary = {key: value for key, value in data.items() if key != "runs"}
+        await self.backend.put(f"experiments/{experiment_id}/experiment.json", json_dumps(summary))
+
+        runs = data.get("runs")
+        if runs:
+            run_log = self._run_log(experiment_id)
+            await self._run_io(_append_new_runs, run_log, self.run_index, experiment_id, runs)
 
         logger.info("Experiment data saved", experiment_id=experiment_id)
-        return str(experiment_path)
+        return f"experiments/{experiment_id}"
+
+    async def append_experiment_runs(self, experiment_id: str, runs: list[dict[str, Any]]) -> int:
+        """
+        Append runs to an experiment's run log.
+
+        Args:
+            experiment_id: Experiment identifier
+            runs: Run records to append (written as one compressed frame)
+
+        Returns:
+            Total number of runs logged for the experiment
+        """
+        return await self._run_io(_append_runs, self._run_log(experiment_id), self.run_index, experiment_id, runs)
+
+    async def seal_experiment_runs(self, experiment_id: str) -> None:
+        """
+        Seal a finished experiment's run log.
 
-    async def load_experiment_data(self, experiment_id: str) -> dict[str, Any] | None:
+        With a remote backend the sealed segments are then published, so
+        other replicas can read the experiment's runs as soon as it finishes.
+        """
+        # Fetch published segments first, so publishing can't drop them
+        run_log = await self._open_run_log(experiment_id)
+        await self._run_io(run_log.seal)
+        await self._publish_run_log(experiment_id)
+        self._release_run_log(experiment_id)
+
+    async def load_experiment_data(
+        self,
+        experiment_id: str,
+        include_runs: bool = True,
+        run_offset: int = 0,
+        run_limit: int | None = None,
+    ) -> dict[str, Any] | None:
         """
         Load experiment data from storage.
 
         Args:
             experiment_id: Experiment identifier
+            include_runs: Whether to load runs from the run log
+            run_offset: Index of the first run to load
+            run_limit: Maximum number of runs to load (None for all)
 
         Returns:
             Experiment data or None if not found
         """
-        experiment_path = self.storage_root / "experiments" / f"{experiment_id}.json"
+        raw = await self.backend.get(f"experiments/{experiment_id}/experiment.json")
+        if raw is None:
+            # Experiments saved before the run log was introduced
+            raw = await self.backend.get(f"experiments/{experiment_id}.json")
+            data = json_loads(raw) if raw is not None else None
+            if data is not None and "runs" in data:
+                end = None if run_limit is None else run_offset + run_limit
+                data["runs"] = data["runs"][run_offset:end] if include_runs else []
+            return data
+
+        data = json_loads(raw)
+        if include_runs:
+            data["runs"] = await self.load_experiment_runs(experiment_id, run_offset, run_limit)
+        return data
+
+    async def get_experiment_owner(self, experiment_id: str) -> str | None:
+        """ID of the user who created a stored experiment, or None if it isn't stored."""
+        data = await self.load_experiment_data(experiment_id, include_runs=False)
+        return data.get("created_by") if data else None
+
+    async def load_experiment_runs(
+        self, experiment_id: str, offset: int = 0, limit: int | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Load a range of runs from an experiment's run log.
+
+        Only the compressed frames overlapping the range are read.
+        """
+        run_log = await self._open_run_log(experiment_id)
+        return await self._run_io(run_log.read, offset, limit)
+
+    async def list_experiment_runs(
+        self,
+        experiment_id: str,
+        cursor: str | None = None,
+        limit: int = 100,
+        fields: Iterable[str] | None = None,
+        provider: str | None = None,
+        model: str | None = None,
+        status: str | None = None,
+        min_duration_ms: int | None = None,
+        max_duration_ms: int | None = None,
+    ) -> RunPage:
+        """
+        List an experiment's runs a page at a time, filtered and projected.
+
+        Matching runs are found in the run index and paginated by position
+        (keyset pagination), so a page costs the same wherever it starts.
+        When every selected field is indexed the run log isn't read.
+
+        Args:
+            experiment_id: Experiment identifier
+            cursor: ``next_cursor`` of the previous page
+            limit: Maximum runs per page
+            fields: Run fields to return (None for all)
+            provider, model, status: Exact-match filters
+            min_duration_ms, max_duration_ms: Inclusive duration range
+
+        Returns:
+            The page, with a cursor for the next one if more runs may match
+
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        after = _decode_cursor(cursor) if cursor else -1
+        run_log = await self._open_run_log(experiment_id)
+        await self._run_io(_sync_run_index, run_log, self.run_index, experiment_id)
+
+        rows = await self._run_io(
+            self.run_index.query,
+            experiment_id,
+            after,
+            limit + 1,
+            provider,
+            model,
+            status,
+            min_duration_ms,
+            max_duration_ms,
+        )
+        next_cursor = _encode_cursor(rows[limit - 1]["position"]) if len(rows) > limit else None
+        rows = rows[:limit]
+
+        fields = list(fields) if fields is not None else None
+        if fields is not None and set(fields) <= set(INDEXED_FIELDS):
+            runs = [{field: row[field] for field in fields} for row in rows]
+        else:
+            records = await self._run_io(_read_positions, run_log, [row["position"] for row in rows])
+            runs = records if fields is None else [{field: run.get(field) for field in fields} for run in records]
+        return RunPage(runs=runs, next_cursor=next_cursor)
+
+    async def compact_experiment_data(self, experiment_id: str, force: bool = False) -> int:
+        """
+        Compact an experiment's run log into large lzma-compressed frames.
+
+        With a remote backend the sealed segments are then published, so
+        other replicas can read the experiment's runs.
+
+        Returns:
+            Number of segments merged
+        """
+        # Fetch published segments first, so publishing can't drop them
+        run_log = await self._open_run_log(experiment_id)
+        await self._run_io(run_log.seal)
+        merged = await self._run_io(run_log.compact, 1000, force)
+        await self._publish_run_log(experiment_id)
+        self._release_run_log(experiment_id)
+        return merged
+
+    async def delete_experiment_data(self, experiment_id: str) -> int:
+        """
+        Delete an experiment's summary, run log and exports.
+
+        Returns:
+            Number of bytes freed in the backend
+        """
+        with self._run_logs_lock:
+            self._run_logs.pop(experiment_id, None)
+        await self._run_io(self.run_index.delete, experiment_id)
+
+        freed = await self.delete_experiment_export(experiment_id)
+        for prefix in (f"experiments/{experiment_id}/", f"experiments/{experiment_id}.json"):
+            async for info in self.backend.list_objects(prefix):
+                await self.backend.delete(info.key)
+                freed += info.size
+        # Active run log segments live on local disk with remote backends
+        await self._run_io(shutil.rmtree, self._experiment_dir(experiment_id), True)
+
+        logger.info("Experiment data deleted", experiment_id=experiment_id, bytes_freed=freed)
+        return freed
+
+    async def delete_experiment_export(self, experiment_id: str) -> int:
+        """
+        Delete an experiment's columnar exports (and cached copies).
+
+        Returns:
+            Number of bytes freed in the backend
+        """
+        freed = 0
+        async for info in self.backend.list_objects(f"results/{experiment_id}."):
+            await self.backend.delete(info.key)
+            freed += info.size
+        # Cached copies of remote exports, and directories left behind by .columns exports
+        for suffix in EXPORT_CONTENT_TYPES:
+            await self._run_io(_remove_path, self._local_path(f"results/{experiment_id}{suffix}"))
+        return freed
+
+    async def export_experiment_columnar(
+        self, experiment_id: str, runs: Iterable[Any] | None = None, format: str = "auto"
+    ) -> str:
+        """
+        Export an experiment's runs to a columnar file under ``results/``.
+
+        Args:
+            experiment_id: Experiment identifier
+            runs: Runs to export (dicts or ExperimentRun models); defaults to the
+                experiment's run log, read page by page
+            format: "arrow", "parquet", "columns" (dependency-free fallback), or "auto"
+
+        Returns:
+            Local path of the export
+        """
+        if runs is None:
+            runs = _iter_run_log(await self._open_run_log(experiment_id))
+
+        target = self._local_path(f"results/{experiment_id}")
+        await self._run_io(lambda: target.parent.mkdir(parents=True, exist_ok=True))
+        path = await self._run_io(write_columnar, runs, target, format)
+
+        # Content hashes serve as download ETags
+        files = await self._run_io(_list_files, path)
+        digests = {}
+        for file_path in files:
+            name = file_path.relative_to(target.parent).as_posix()
+            digests[name] = await self._run_io(_hash_file, file_path)
+            if self.backend.local_path("results") is None:
+                await self.backend.put_file(f"results/{name}", file_path)
+        await self.backend.put(f"results/{experiment_id}.digests.json", json_dumps(digests))
+
+        logger.info("Experiment exported", experiment_id=experiment_id, path=str(path))
+        return str(path)
+
+    async def open_experiment_columnar(self, experiment_id: str) -> Any | None:
+        """
+        Open an experiment's columnar export with memory-mapped reads.
+
+        Exports held by a remote backend are downloaded to the local cache first.
+
+        Returns:
+            A pyarrow Table or ColumnarTable, or None if no export exists
+        """
+        for suffix in EXPORT_CONTENT_TYPES:
+            key = f"results/{experiment_id}{suffix}"
+            path = self._local_path(key)
+            if not path.exists() and self.backend.local_path(key) is None:
+                await self._download_export(key, path)
+            if path.exists():
+                return await self._run_io(open_columnar, path)
+        return None
+
+    async def _download_export(self, key: str, path: Path) -> None:
+        """Download an export (a single object, or a directory of column files) into the cache."""
+        if await self.backend.exists(key):
+            await self._download(key, path)
+            return
+        async for info in self.backend.list_objects(key + "/"):
+            await self._download(info.key, path / info.key[len(key) + 1 :])
+
+    async def get_file_download(self, file_id: str) -> Download | None:
+        """
+        Describe an upload for serving, with its content hash as ETag.
+
+        Args:
+            file_id: Unique file identifier
 
-        if not experiment_path.exists():
+        Returns:
+            Download description, or None if the file doesn't exist
+        """
+        file_info = await self.get_file(file_id)
+        if file_info is None:
             return None
 
-        with open(experiment_path) as f:
-            data = json.load(f)
+        key = self._content_key(file_info)
+        etag = file_info.get("content_hash")
+        if etag is None:
+            info = await self.backend.stat(key)
+            if info is None:
+                return None
+            etag = info.etag or f"{info.size:x}"
+        return Download(
+            key=key,
+            size=file_info["size_bytes"],
+            etag=etag,
+            filename=file_info["original_filename"],
+            content_type=file_info.get("content_type"),
+            path=self.backend.local_path(key),
+        )
 
-        return data
+    async def get_export_download(self, experiment_id: str, name: str | None = None) -> Download | None:
+        """
+        Describe an experiment's columnar export for serving.
+
+        Args:
+            experiment_id: Experiment identifier
+            name: File within a ``.columns`` export (e.g. "duration_ms.i64");
+                not used for single-file exports
+
+        Returns:
+            Download description, or None if the export doesn't exist
+
+        Raises:
+            ValueError: If the export is a column directory and no file was named
+        """
+        for suffix, content_type in EXPORT_CONTENT_TYPES.items():
+            key = f"results/{experiment_id}{suffix}"
+            if suffix == ".columns":
+                if name is None:
+                    files = [info.key.rsplit("/", 1)[1] async for info in self.backend.list_objects(key + "/")]
+                    if files:
+                        raise ValueError(f"Export of {experiment_id} has one file per column; choose one of {files}")
+                    continue
+                if "/" in name or name in ("", ".", ".."):
+                    return None
+                key = f"{key}/{name}"
+                if name.endswith(".json"):
+                    content_type = "application/json"
+            elif name is not None:
+                continue
+
+            info = await self.backend.stat(key)
+            if info is None:
+                continue
+
+            digests = json_loads(await self.backend.get(f"results/{experiment_id}.digests.json") or b"{}")
+            return Download(
+                key=key,
+                size=info.size,
+                etag=digests.get(key[len("results/") :]) or info.etag or f"{info.size:x}",
+                filename=key.rsplit("/", 1)[1],
+                content_type=content_type,
+                path=self.backend.local_path(key),
+            )
+        return None
+
+    def stream_download(self, download: Download, start: int = 0, end: int | None = None) -> AsyncIterator[bytes]:
+        """
+        Stream a download (or an inclusive byte range of it) from the backend in chunks.
+
+        Used for remote backends; local files should be served from ``download.path``.
+        """
+        return self.backend.stream(download.key, start, end)
 
+    async def close(self) -> None:
+        """Release the backend, I/O pool and index connection."""
+        with self._run_logs_lock:
+            run_logs = list(self._run_logs.values())
+        for run_log in run_logs:
+            await self._run_io(run_log.wait_for_compaction)
+        await self.backend.close()
+        self._io_executor.shutdown(wait=True)
+        self.file_index.close()
+        self.run_index.close()
 
-# Global storage manager instance
-_storage_manager = StorageManager()
+
+def _copy_to_file(file_data: BinaryIO, file_path: Path) -> tuple[int, str]:
+    """Copy a blocking stream to a file in chunks, returning the byte count and SHA-256."""
+    size = 0
+    hasher = hashlib.sha256()
+    with open(file_path, "wb") as f:
+        while chunk := file_data.read(CHUNK_SIZE):
+            _write_chunk(f, hasher, chunk)
+            size += len(chunk)
+    return size, hasher.hexdigest()
+
+
+def _write_chunk(f: BinaryIO, hasher: Any, chunk: bytes) -> None:
+    """Hash and write one chunk."""
+    hasher.update(chunk)
+    f.write(chunk)
+
+
+def _count_items(items: Iterator[Any]) -> int:
+    return sum(1 for _ in items)
+
+
+def _next_batch(rows: Iterator[Any], batch_size: int) -> list[Any]:
+    """Pull up to batch_size items from a blocking iterator."""
+    return list(itertools.islice(rows, batch_size))
+
+
+def _iter_run_log(run_log: RunLog, page_size: int = 10_000) -> Iterator[dict[str, Any]]:
+    """Iterate over a run log a page at a time."""
+    offset = 0
+    while page := run_log.read(offset, page_size):
+        yield from page
+        offset += len(page)
+
+
+def _append_runs(run_log: RunLog, run_index: RunIndex, experiment_id: str, runs: list[Any]) -> int:
+    """Append runs to the log and index them."""
+    total = run_log.append(runs)
+    run_index.add(experiment_id, total - len(runs), runs)
+    return total
+
+
+def _append_new_runs(run_log: RunLog, run_index: RunIndex, experiment_id: str, runs: list[Any]) -> int:
+    """Append the runs not yet in the log."""
+    logged = run_log.count()
+    return _append_runs(run_log, run_index, experiment_id, list(runs[logged:]))
+
+
+def _sync_run_index(run_log: RunLog, run_index: RunIndex, experiment_id: str, page_size: int = 10_000) -> None:
+    """Index runs in the log that aren't indexed yet (e.g. written by another replica)."""
+    position = run_index.count(experiment_id)
+    while position < run_log.count() and (page := run_log.read(position, page_size)):
+        run_index.add(experiment_id, position, page)
+        position += len(page)
+
+
+def _read_positions(run_log: RunLog, positions: list[int]) -> list[dict[str, Any]]:
+    """Read runs at ascending log positions, one read per contiguous range."""
+    records: list[dict[str, Any]] = []
+    start = 0
+    for i in range(1, len(positions) + 1):
+        if i == len(positions) or positions[i] != positions[i - 1] + 1:
+            records.extend(run_log.read(positions[start], i - start))
+            start = i
+    return records
+
+
+def _encode_cursor(position: int) -> str:
+    """Opaque pagination cursor for the run after ``position``."""
+    return base64.urlsafe_b64encode(f"run:{position}".encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> int:
+    try:
+        kind, _, position = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().partition(":")
+        if kind != "run":
+            raise ValueError(kind)
+        return int(position)
+    except ValueError as e:
+        raise ValueError(f"Invalid cursor {cursor!r}") from e
+
+
+def _read_meta_files(paths: Iterable[Path]) -> Iterator[dict[str, Any]]:
+    """Parse upload metadata files, skipping unreadable ones."""
+    for path in paths:
+        try:
+            yield json_loads(path.read_bytes())
+        except (OSError, ValueError) as e:
+            logger.warning("Skipping unreadable metadata file", path=str(path), error=str(e))
+
+
+def _remove_path(path: Path) -> None:
+    """Remove a file or directory tree if it exists."""
+    if path.is_dir():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        path.unlink(missing_ok=True)
+
+
+def _hash_file(path: Path) -> str:
+    """SHA-256 of a file, read in chunks."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _list_files(path: Path) -> list[Path]:
+    """A file, or all files below a directory."""
+    if path.is_file():
+        return [path]
+    return sorted(Path(dirpath) / name for dirpath, _, names in os.walk(path) for name in names)
+
+
+# Global storage manager instance, created on first use
+_storage_manager: StorageManager | None = None
+
+
+def get_storage_manager() -> StorageManager:
+    """Get the global storage manager, creating it from settings on first use."""
+    global _storage_manager
+    if _storage_manager is None:
+        _storage_manager = StorageManager.from_settings(settings)
+    return _storage_manager
+
+
+def _io_pending() -> int:
+    manager = _storage_manager
+    return manager.io_pending if manager is not None else 0
+
+
+register_callback("storage_io_pending", "Storage operations in flight (I/O pool and backend)", _io_pending)
+
+# Callbacks naming uploads that queued or running work still reads
+_file_users: list[Callable[[], Iterable[str]]] = []
+
+
+def register_file_user(callback: Callable[[], Iterable[str]]) -> None:
+    """Register a callback returning the IDs of uploads still in use (maintenance never expires them)."""
+    _file_users.append(callback)
+
+
+def files_in_use() -> set[str]:
+    """IDs of uploads some registered user still reads."""
+    return {file_id for callback in _file_users for file_id in callback()}
+
+
+async def close_storage_manager() -> None:
+    """Close the global storage manager (the next use creates a new one)."""
+    global _storage_manager
+    if _storage_manager is not None:
+        manager, _storage_manager = _storage_manager, None
+        await manager.close()
 
 
 async def upload_file(
-    file_data: BinaryIO, filename: str, content_type: str | None = None, metadata: dict[str, Any] | None = None
+    file_data: BinaryIO,
+    filename: str,
+    content_type: str | None = None,
+    metadata: dict[str, Any] | None = None,
+    owner_id: str | None = None,
 ) -> dict[str, Any]:
     """Upload a file using the global storage manager."""
-    return await _storage_manager.upload_file(file_data, filename, content_type, metadata)
+    return await get_storage_manager().upload_file(file_data, filename, content_type, metadata, owner_id)
 
 
 async def get_file(file_id: str) -> dict[str, Any] | None:
     """Get file information using the global storage manager."""
-    return await _storage_manager.get_file(file_id)
+    return await get_storage_manager().get_file(file_id)
 
 
 async def delete_file(file_id: str) -> bool:
     """Delete a file using the global storage manager."""
-    return await _storage_manager.delete_file(file_id)
+    return await get_storage_manager().delete_file(file_id)
+
+
+async def save_experiment_data(experiment_id: str, data: dict[str, Any]) -> str:
+    """Save experiment data using the global storage manager."""
+    return await get_storage_manager().save_experiment_data(experiment_id, data)
+
+
+async def append_experiment_runs(experiment_id: str, runs: list[dict[str, Any]]) -> int:
+    """Append runs to an experiment's run log using the global storage manager."""
+    return await get_storage_manager().append_experiment_runs(experiment_id, runs)
+
+
+async def seal_experiment_runs(experiment_id: str) -> None:
+    """Seal (and publish) a finished experiment's run log using the global storage manager."""
+    await get_storage_manager().seal_experiment_runs(experiment_id)
+
+
+async def list_experiment_runs(
+    experiment_id: str, cursor: str | None = None, limit: int = 100, **filters: Any
+) -> RunPage:
+    """List an experiment's runs using the global storage manager."""
+    return await get_storage_manager().list_experiment_runs(experiment_id, cursor, limit, **filters)
+
+
+def iter_dataset(
+    file_id: str,
+    row_start: int = 0,
+    row_end: int | None = None,
+    sample_rate: float | None = None,
+    seed: int | None = None,
+) -> AsyncIterator[tuple[int, dict[str, Any]]]:
+    """Stream dataset rows using the global storage manager."""
+    return get_storage_manager().iter_dataset(file_id, row_start, row_end, sample_rate, seed)
+
+
+async def count_dataset_rows(
+    file_id: str,
+    row_start: int = 0,
+    row_end: int | None = None,
+    sample_rate: float | None = None,
+    seed: int | None = None,
+) -> int:
+    """Count dataset rows using the global storage manager."""
+    return await get_storage_manager().count_dataset_rows(file_id, row_start, row_end, sample_rate, seed)
+
+
+async def get_experiment_owner(experiment_id: str) -> str | None:
+    """Look up a stored experiment's creator using the global storage manager."""
+    return await get_storage_manager().get_experiment_owner(experiment_id)
+
+
+async def get_file_download(file_id: str) -> Download | None:
+    """Describe an upload for serving using the global storage manager."""
+    return await get_storage_manager().get_file_download(file_id)
+
+
+async def get_export_download(experiment_id: str, name: str | None = None) -> Download | None:
+    """Describe an experiment export for serving using the global storage manager."""
+    return await get_storage_manager().get_export_download(experiment_id, name)
+
+
+def stream_download(download: Download, start: int = 0, end: int | None = None) -> AsyncIterator[bytes]:
+    """Stream a download from the backend using the global storage manager."""
+    return get_storage_manager().stream_download(download, start, end)
@@ -0,0 +1,131 @@
+"""
+Index of experiment runs for filtered, paginated listings.
+
+Each run appended to an experiment's run log gets a row keyed by
+(experiment_id, position), where position is the run's index in the log.
+The row holds the columns runs are filtered by (provider, model, status,
+duration) plus a few small identifying fields, so listings are an indexed
+range read rather than a scan, and pages that only need indexed fields
+don't touch the run log at all. Pages are keyset-paginated on position.
+
+The run logs remain the source of truth; rows missing from the index (for
+example runs appended by another replica) are indexed on the next read.
+"""
+
+import sqlite3
+import threading
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+# Run fields stored in the index (listings selecting only these skip the run log)
+INDEXED_FIELDS = ("run_id", "provider", "model", "status", "duration_ms", "test_case_index")
+
+
+class RunIndex:
+    """SQLite-backed index of run records by experiment and position."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "experiment_id TEXT NOT NULL, position INTEGER NOT NULL, run_id TEXT, provider TEXT, model TEXT, "
+            "status TEXT, duration_ms INTEGER, test_case_index INTEGER, "
+            "PRIMARY KEY (experiment_id, position)) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS runs_by_target ON runs (experiment_id, provider, model, position)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS runs_by_status ON runs (experiment_id, status, position)")
+
+    def add(self, experiment_id: str, start: int, runs: Iterable[dict[str, Any]]) -> None:
+        """
+        Index runs appended to an experiment's run log.
+
+        Args:
+            experiment_id: Experiment identifier
+            start: Run log position of the first run
+            runs: Run records, in log order
+        """
+        rows = [
+            (experiment_id, position, *(run.get(field) for field in INDEXED_FIELDS))
+            for position, run in enumerate(runs, start)
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO runs (experiment_id, position, run_id, provider, model, status, "
+                    "duration_ms, test_case_index) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def count(self, experiment_id: str) -> int:
+        """Number of indexed runs of an experiment (the next position to index)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(position) FROM runs WHERE experiment_id = ?", (experiment_id,)
+            ).fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def query(
+        self,
+        experiment_id: str,
+        after: int = -1,
+        limit: int = 100,
+        provider: str | None = None,
+        model: str | None = None,
+        status: str | None = None,
+        min_duration_ms: int | None = None,
+        max_duration_ms: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Read a page of matching runs, in log order.
+
+        Args:
+            experiment_id: Experiment identifier
+            after: Only runs after this position (the previous page's last position)
+            limit: Maximum number of runs
+            provider, model, status: Exact-match filters
+            min_duration_ms, max_duration_ms: Inclusive duration range
+
+        Returns:
+            Index rows (``position`` plus INDEXED_FIELDS)
+        """
+        clauses = ["experiment_id = ?", "position > ?"]
+        params: list[Any] = [experiment_id, after]
+        for column, value in (("provider", provider), ("model", model), ("status", status)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if min_duration_ms is not None:
+            clauses.append("duration_ms >= ?")
+            params.append(min_duration_ms)
+        if max_duration_ms is not None:
+            clauses.append("duration_ms <= ?")
+            params.append(max_duration_ms)
+        params.append(limit)
+
+        columns = ("position", *INDEXED_FIELDS)
+        sql = f"SELECT {', '.join(columns)} FROM runs WHERE {' AND '.join(clauses)} ORDER BY position LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(zip(columns, row, strict=True)) for row in rows]
+
+    def delete(self, experiment_id: str) -> None:
+        """Remove an experiment's runs from the index."""
+        with self._lock:
+            self._conn.execute("DELETE FROM runs WHERE experiment_id = ?", (experiment_id,))
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
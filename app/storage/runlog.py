@@ -0,0 +1,412 @@
+"""
+Append-only, compressed run log for experiment results.
+
+Each experiment gets a directory of numbered segment files. A segment is a
+sequence of frames, each holding a compressed NDJSON batch of run records:
+
+    frame   := header(>IIB: payload_length, record_count, codec) payload
+    payload := >I crc32(data) data   (codec flagged CHECKSUMMED)
+             | data                  (frames written before checksums)
+    footer  := compressed JSON {"frames": [[offset, record_count], ...], "level": n}
+    trailer := >I4s (footer_length, b"SCRL")
+
+Only the active (last) segment is written to; once it grows past the size
+limit it is sealed with an index footer, so readers can locate frames
+without scanning. A crash mid-append can leave a torn frame at the end of
+the active segment; the first access after reopening truncates the
+segment back to its last complete, checksum-verified frame.
+
+Sealed segments are compacted size-tiered: whenever ``compact_after``
+segments of one level have accumulated at the tail, a background thread
+merges them into one segment of the next level, so each record is
+rewritten O(log n) times and appends never wait for a merge. compact()
+merges everything into large lzma frames for cold storage.
+"""
+
+import lzma
+import os
+import struct
+import threading
+import zlib
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import structlog
+
+from ..core import json_dumps
+from ..core import json_loads
+
+logger = structlog.get_logger(__name__)
+
+FRAME_HEADER = struct.Struct(">IIB")
+TRAILER = struct.Struct(">I4s")
+TRAILER_MAGIC = b"SCRL"
+
+CODEC_ZLIB = 1
+CODEC_LZMA = 2
+# Flag on the codec byte: the payload starts with a CRC32 of the compressed data
+CHECKSUMMED = 0x80
+CHECKSUM = struct.Struct(">I")
+
+_COMPRESS = {
+    CODEC_ZLIB: lambda data: zlib.compress(data, 6),
+    CODEC_LZMA: lambda data: lzma.compress(data, preset=6),
+}
+_DECOMPRESS = {
+    CODEC_ZLIB: zlib.decompress,
+    CODEC_LZMA: lzma.decompress,
+}
+
+
+def _encode_records(records: list[dict[str, Any]], codec: int) -> bytes:
+    data = _COMPRESS[codec](b"\n".join(json_dumps(record) for record in records))
+    payload = CHECKSUM.pack(zlib.crc32(data)) + data
+    return FRAME_HEADER.pack(len(payload), len(records), codec | CHECKSUMMED) + payload
+
+
+def _payload_data(payload: bytes, codec: int) -> bytes | None:
+    """Compressed data of a frame payload, or None if its checksum doesn't match."""
+    if not codec & CHECKSUMMED:
+        return payload
+    data = payload[CHECKSUM.size :]
+    if len(payload) < CHECKSUM.size or CHECKSUM.unpack_from(payload)[0] != zlib.crc32(data):
+        return None
+    return data
+
+
+def _decode_payload(payload: bytes, codec: int) -> list[dict[str, Any]]:
+    data = _payload_data(payload, codec)
+    if data is None:
+        raise ValueError("Corrupt run log frame (checksum mismatch)")
+    return [json_loads(line) for line in _DECOMPRESS[codec & ~CHECKSUMMED](data).split(b"\n")]
+
+
+def _valid_codec(codec: int) -> bool:
+    return codec & ~CHECKSUMMED in _COMPRESS
+
+
+class RunLog:
+    """
+    Segmented append-only log of run records for one experiment.
+
+    Methods are blocking and thread-safe; callers on the event loop should
+    run them on an I/O thread.
+    """
+
+    def __init__(self, directory: Path, segment_size: int = 8 * 1024 * 1024, compact_after: int = 16):
+        """
+        Initialize the log.
+
+        Args:
+            directory: Directory of the log's segment files
+            segment_size: Size at which the active segment is sealed
+            compact_after: Sealed segments of one level merged into the next level
+        """
+        self.directory = directory
+        self.segment_size = segment_size
+        self.compact_after = compact_after
+        self._lock = threading.RLock()
+        # Held for a whole merge; the append lock only for swapping files in
+        self._compact_lock = threading.Lock()
+        self._compactor: threading.Thread | None = None
+
+        # Cached state so appends don't re-scan segments
+        self._count: int | None = None
+        self._active: Path | None = None
+        self._recovered = False
+
+    # -- Segment helpers -------------------------------------------------
+
+    def _segments(self) -> list[Path]:
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob("segment-*.log"))
+
+    def _segment_path(self, number: int) -> Path:
+        return self.directory / f"segment-{number:06d}.log"
+
+    @staticmethod
+    def _read_footer_data(f: Any, size: int) -> dict[str, Any] | None:
+        if size < TRAILER.size:
+            return None
+        f.seek(size - TRAILER.size)
+        footer_length, magic = TRAILER.unpack(f.read(TRAILER.size))
+        if magic != TRAILER_MAGIC:
+            return None
+        f.seek(size - TRAILER.size - footer_length)
+        return json_loads(zlib.decompress(f.read(footer_length)))
+
+    @classmethod
+    def _read_footer(cls, f: Any, size: int) -> list[list[int]] | None:
+        """Read a sealed segment's frame index, or None if the segment is still active."""
+        footer = cls._read_footer_data(f, size)
+        return footer["frames"] if footer is not None else None
+
+    def _level(self, path: Path) -> int | None:
+        """Compaction level of a sealed segment (None if it is still active)."""
+        with open(path, "rb") as f:
+            footer = self._read_footer_data(f, os.fstat(f.fileno()).st_size)
+        return footer.get("level", 0) if footer is not None else None
+
+    @staticmethod
+    def _scan_frames(f: Any, size: int) -> list[list[int]]:
+        """Build a frame index by walking frame headers (skipping payloads)."""
+        frames = []
+        offset = 0
+        while offset + FRAME_HEADER.size <= size:
+            f.seek(offset)
+            payload_length, record_count, codec = FRAME_HEADER.unpack(f.read(FRAME_HEADER.size))
+            if not _valid_codec(codec) or offset + FRAME_HEADER.size + payload_length > size:
+                # Torn write at the tail of the active segment
+                break
+            frames.append([offset, record_count])
+            offset += FRAME_HEADER.size + payload_length
+        return frames
+
+    def _frame_index(self, path: Path) -> list[list[int]]:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            frames = self._read_footer(f, size)
+            return frames if frames is not None else self._scan_frames(f, size)
+
+    @staticmethod
+    def _is_sealed(path: Path) -> bool:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < TRAILER.size:
+                return False
+            f.seek(size - TRAILER.size)
+            return TRAILER.unpack(f.read(TRAILER.size))[1] == TRAILER_MAGIC
+
+    def _seal(self, path: Path, level: int = 0) -> None:
+        frames = self._frame_index(path)
+        footer = zlib.compress(json_dumps({"frames": frames, "level": level}))
+        with open(path, "ab") as f:
+            f.write(footer)
+            f.write(TRAILER.pack(len(footer), TRAILER_MAGIC))
+
+    def _recover(self) -> None:
+        """Truncate a torn or corrupt tail off the active segment (once, on first access)."""
+        if self._recovered:
+            return
+        self._recovered = True
+        segments = self._segments()
+        if not segments or self._is_sealed(segments[-1]):
+            return
+
+        path = segments[-1]
+        with open(path, "r+b") as f:
+            size = os.fstat(f.fileno()).st_size
+            end = 0
+            for frame_offset, _ in self._scan_frames(f, size):
+                f.seek(frame_offset)
+                payload_length, _, codec = FRAME_HEADER.unpack(f.read(FRAME_HEADER.size))
+                if _payload_data(f.read(payload_length), codec) is None:
+                    break
+                end = frame_offset + FRAME_HEADER.size + payload_length
+            if end < size:
+                f.truncate(end)
+                logger.warning("Run log torn tail truncated", segment=str(path), bytes=size - end)
+
+    # -- Public API ------------------------------------------------------
+
+    def append(self, records: list[dict[str, Any]]) -> int:
+        """
+        Append a batch of records as one compressed frame.
+
+        Returns:
+            Total number of records in the log after the append
+        """
+        if not records:
+            return self.count()
+
+        frame = _encode_records(records, CODEC_ZLIB)
+        with self._lock:
+            active = self._active_segment()
+            count = self.count()
+
+            with open(active, "ab") as f:
+                f.write(frame)
+                size = f.tell()
+            self._count = count + len(records)
+
+            if size >= self.segment_size:
+                self._seal(active)
+                self._active = None
+                self._start_compaction()
+
+            return self._count
+
+    def _active_segment(self) -> Path:
+        """Get the segment open for appends, starting a new one after a sealed segment."""
+        if self._active is None:
+            self._recover()
+            self.directory.mkdir(parents=True, exist_ok=True)
+            segments = self._segments()
+            if segments and not self._is_sealed(segments[-1]):
+                self._active = segments[-1]
+            else:
+                self._active = self._segment_path(int(segments[-1].stem[8:]) + 1 if segments else 1)
+        return self._active
+
+    def count(self) -> int:
+        """Total number of records in the log."""
+        with self._lock:
+            self._recover()
+            if self._count is None:
+                self._count = sum(count for path in self._segments() for _, count in self._frame_index(path))
+            return self._count
+
+    def read(self, offset: int = 0, limit: int | None = None) -> list[dict[str, Any]]:
+        """
+        Read a range of records, decompressing only the frames that overlap it.
+
+        Args:
+            offset: Index of the first record to return
+            limit: Maximum number of records to return (None for all)
+        """
+        records: list[dict[str, Any]] = []
+        end = None if limit is None else offset + limit
+        position = 0
+
+        with self._lock:
+            self._recover()
+            for path in self._segments():
+                with open(path, "rb") as f:
+                    size = os.fstat(f.fileno()).st_size
+                    frames = self._read_footer(f, size)
+                    if frames is None:
+                        frames = self._scan_frames(f, size)
+
+                    for frame_offset, record_count in frames:
+                        if end is not None and position >= end:
+                            return records
+                        if position + record_count <= offset:
+                            position += record_count
+                            continue
+
+                        f.seek(frame_offset)
+                        payload_length, _, codec = FRAME_HEADER.unpack(f.read(FRAME_HEADER.size))
+                        batch = _decode_payload(f.read(payload_length), codec)
+                        start = max(offset - position, 0)
+                        stop = record_count if end is None else min(record_count, end - position)
+                        records.extend(batch[start:stop])
+                        position += record_count
+
+        return records
+
+    def compact(self, frame_records: int = 1000, force: bool = False) -> int:
+        """
+        Merge all sealed segments into one segment of large lzma frames.
+
+        The active segment is left alone so appends can continue; they only
+        wait while the merged segment is swapped in.
+
+        Args:
+            frame_records: Records per frame in the merged segment
+            force: Recompress even a single sealed segment (for cold data)
+
+        Returns:
+            Number of segments merged
+        """
+        with self._compact_lock:
+            with self._lock:
+                self._recover()
+                sealed = [(path, level) for path in self._segments() if (level := self._level(path)) is not None]
+            if len(sealed) < (1 if force else 2):
+                return 0
+            self._merge([path for path, _ in sealed], CODEC_LZMA, frame_records, max(level for _, level in sealed) + 1)
+
+        logger.info("Run log compacted", directory=str(self.directory), segments=len(sealed))
+        return len(sealed)
+
+    def _start_compaction(self) -> None:
+        """Merge full tiers of sealed segments on a background thread (one at a time)."""
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self._compact_tiers, name="run-log-compaction", daemon=True)
+        self._compactor.start()
+
+    def _compact_tiers(self) -> None:
+        try:
+            with self._compact_lock:
+                while True:
+                    with self._lock:
+                        sealed = [
+                            (path, level) for path in self._segments() if (level := self._level(path)) is not None
+                        ]
+                    if not sealed:
+                        return
+                    # Newest segments sharing the newest segment's level
+                    level = sealed[-1][1]
+                    tier = 0
+                    while tier < len(sealed) and sealed[-1 - tier][1] == level:
+                        tier += 1
+                    if tier < self.compact_after:
+                        return
+                    self._merge([path for path, _ in sealed[-tier:]], CODEC_ZLIB, 1000, level + 1)
+        except Exception:
+            # E.g. the experiment's data was deleted meanwhile; merging is retried after the next seal
+            logger.exception("Run log compaction failed", directory=str(self.directory))
+
+    @property
+    def compacting(self) -> bool:
+        """Whether a background compaction is running."""
+        compactor = self._compactor
+        return compactor is not None and compactor.is_alive()
+
+    def wait_for_compaction(self, timeout: float | None = None) -> None:
+        """Wait for a background compaction to finish."""
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join(timeout)
+
+    def _merge(self, segments: list[Path], codec: int, frame_records: int, level: int) -> None:
+        """Merge consecutive sealed segments into one (under the compaction lock)."""
+        # Sealed segments are immutable, so they are read without blocking appends
+        target = segments[-1].with_suffix(".compact")
+        with open(target, "wb") as out:
+            batch: list[dict[str, Any]] = []
+            for record in self._read_segments(segments):
+                batch.append(record)
+                if len(batch) >= frame_records:
+                    out.write(_encode_records(batch, codec))
+                    batch = []
+            if batch:
+                out.write(_encode_records(batch, codec))
+        self._seal(target, level)
+
+        # The merged segment takes the last merged number so ordering is preserved
+        with self._lock:
+            os.replace(target, segments[-1])
+            for path in segments[:-1]:
+                path.unlink()
+
+    def _read_segments(self, segments: list[Path]) -> Iterator[dict[str, Any]]:
+        for path in segments:
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                for frame_offset, _ in self._read_footer(f, size) or self._scan_frames(f, size):
+                    f.seek(frame_offset)
+                    payload_length, _, codec = FRAME_HEADER.unpack(f.read(FRAME_HEADER.size))
+                    yield from _decode_payload(f.read(payload_length), codec)
+
+    def segments(self) -> list[Path]:
+        """Segment files, oldest first."""
+        with self._lock:
+            return self._segments()
+
+    def reload(self) -> None:
+        """Drop cached state after segment files were added or replaced externally."""
+        with self._lock:
+            self._count = None
+            self._active = None
+
+    def seal(self) -> None:
+        """Seal the active segment (e.g. when an experiment finishes)."""
+        with self._lock:
+            segments = self._segments()
+            if segments and not self._is_sealed(segments[-1]):
+                self._seal(segments[-1])
+            self._active = None
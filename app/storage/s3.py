@@ -0,0 +1,403 @@
+"""
+S3-compatible storage backend.
+
+Talks to AWS S3, MinIO, R2 and other S3-compatible services over a single
+pooled httpx client, signing requests with AWS Signature Version 4.
+Large objects are uploaded with multipart uploads, several parts at a
+time, so memory use stays bounded by ``part_size * multipart_concurrency``.
+"""
+
+import asyncio
+import hashlib
+import hmac
+from collections.abc import AsyncIterable
+from collections.abc import AsyncIterator
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from datetime import UTC
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any
+from typing import TypeVar
+from urllib.parse import quote
+from xml.etree import ElementTree
+
+import httpx
+import structlog
+
+from .backends import STREAM_CHUNK_SIZE
+from .backends import ObjectInfo
+from .backends import StorageBackend
+from .backends import StorageError
+
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+# S3 rejects multipart parts smaller than 5 MiB (except the last one)
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+EMPTY_PAYLOAD_HASH = hashlib.sha256(b"").hexdigest()
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode(), hashlib.sha256).digest()
+
+
+def _query_string(params: dict[str, str]) -> str:
+    """Canonical (sorted, RFC 3986-encoded) query string."""
+    return "&".join(f"{quote(name, safe='-_.~')}={quote(value, safe='-_.~')}" for name, value in sorted(params.items()))
+
+
+def _find_text(element: ElementTree.Element, name: str) -> str | None:
+    """Find a child element's text, ignoring the S3 XML namespace."""
+    for child in element:
+        if child.tag.rsplit("}", 1)[-1] == name:
+            return child.text
+    return None
+
+
+def _find_all(element: ElementTree.Element, name: str) -> list[ElementTree.Element]:
+    return [child for child in element if child.tag.rsplit("}", 1)[-1] == name]
+
+
+class S3Backend(StorageBackend):
+    """Object storage backend for S3-compatible services."""
+
+    name = "s3"
+    shared = True
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: str = "https://s3.amazonaws.com",
+        region: str = "us-east-1",
+        access_key_id: str | None = None,
+        secret_access_key: str | None = None,
+        prefix: str = "",
+        max_connections: int = 32,
+        part_size: int = 8 * 1024 * 1024,
+        multipart_threshold: int | None = None,
+        multipart_concurrency: int = 4,
+        timeout: float = 60.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+        executor: ThreadPoolExecutor | None = None,
+    ):
+        """
+        Initialize the backend.
+
+        Args:
+            bucket: Bucket name
+            endpoint_url: Service endpoint (path-style addressing is used)
+            region: Region used for request signing
+            access_key_id: Access key (requests are unsigned if not set)
+            secret_access_key: Secret key
+            prefix: Key prefix, so several deployments can share a bucket
+            max_connections: Size of the HTTP connection pool
+            part_size: Multipart part size in bytes
+            multipart_threshold: Objects larger than this use multipart uploads
+                (defaults to part_size)
+            multipart_concurrency: Parts uploaded in parallel
+            timeout: Request timeout in seconds
+            transport: Custom httpx transport (e.g. the in-memory stand-in)
+            executor: Thread pool for reading local files being uploaded
+                (StorageManager passes its bounded I/O pool if None)
+        """
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.region = region
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.part_size = part_size
+        self.multipart_threshold = multipart_threshold or part_size
+        self.multipart_concurrency = multipart_concurrency
+        self._executor = executor
+
+        # One pooled client for all requests, so connections are reused
+        self._client = httpx.AsyncClient(
+            transport=transport,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(timeout),
+        )
+
+    def use_executor(self, executor: ThreadPoolExecutor) -> None:
+        self._executor = self._executor or executor
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    # -- Requests --------------------------------------------------------
+
+    def _path(self, key: str) -> str:
+        return "/" + quote(f"{self.bucket}/{self.prefix}{key}" if key else self.bucket, safe="/-_.~")
+
+    def _sign(self, method: str, path: str, query: str, headers: dict[str, str], payload_hash: str) -> None:
+        """Add AWS Signature Version 4 headers to a request."""
+        now = datetime.now(UTC)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        date = now.strftime("%Y%m%d")
+
+        headers["host"] = httpx.URL(self.endpoint_url).netloc.decode()
+        headers["x-amz-date"] = amz_date
+        headers["x-amz-content-sha256"] = payload_hash
+        if not self.access_key_id or not self.secret_access_key:
+            return
+
+        signed = sorted(name.lower() for name in headers)
+        lowered = {name.lower(): value for name, value in headers.items()}
+        canonical_headers = "".join(f"{name}:{lowered[name].strip()}\n" for name in signed)
+        signed_headers = ";".join(signed)
+        canonical_request = "\n".join([method, path, query, canonical_headers, signed_headers, payload_hash])
+
+        scope = f"{date}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join(
+            ["AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest()]
+        )
+        signing_key = _hmac(
+            _hmac(_hmac(_hmac(f"AWS4{self.secret_access_key}".encode(), date), self.region), "s3"), "aws4_request"
+        )
+        signature = hmac.new(signing_key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+        headers["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key_id}/{scope}, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+
+    def _build_request(
+        self,
+        method: str,
+        key: str,
+        params: dict[str, str] | None = None,
+        headers: dict[str, str] | None = None,
+        content: bytes = b"",
+    ) -> httpx.Request:
+        path = self._path(key)
+        query = _query_string(params or {})
+        headers = dict(headers or {})
+        payload_hash = hashlib.sha256(content).hexdigest() if content else EMPTY_PAYLOAD_HASH
+        self._sign(method, path, query, headers, payload_hash)
+        url = f"{self.endpoint_url}{path}" + (f"?{query}" if query else "")
+        return self._client.build_request(method, url, headers=headers, content=content)
+
+    async def _request(
+        self,
+        method: str,
+        key: str,
+        params: dict[str, str] | None = None,
+        headers: dict[str, str] | None = None,
+        content: bytes = b"",
+        allowed: tuple[int, ...] = (),
+    ) -> httpx.Response:
+        """Send a signed request, raising StorageError on unexpected responses."""
+        response = await self._client.send(self._build_request(method, key, params, headers, content))
+        if response.is_success or response.status_code in allowed:
+            return response
+        raise self._error(method, key, response)
+
+    @staticmethod
+    def _error(method: str, key: str, response: httpx.Response) -> StorageError:
+        code = None
+        if response.content:
+            with suppress(ElementTree.ParseError):
+                code = _find_text(ElementTree.fromstring(response.content), "Code")
+        return StorageError(f"S3 {method} '{key}' failed with {response.status_code} {code or ''}".strip())
+
+    # -- Writes ----------------------------------------------------------
+
+    async def put(self, key: str, data: bytes) -> None:
+        await self._request("PUT", key, content=data)
+
+    async def put_file(self, key: str, path: Path, move: bool = False) -> int:
+        size = (await self._run(path.stat)).st_size
+        if size <= self.multipart_threshold:
+            await self.put(key, await self._run(path.read_bytes))
+        else:
+            size = await self._upload_multipart(key, self._file_parts(path))
+        if move:
+            await self._run(path.unlink)
+        return size
+
+    async def put_stream(self, key: str, chunks: AsyncIterable[bytes]) -> int:
+        parts = _rechunk(chunks, self.part_size)
+        first = await anext(parts, None)
+        if first is None:
+            await self.put(key, b"")
+            return 0
+        second = await anext(parts, None)
+        if second is None:
+            await self.put(key, first)
+            return len(first)
+        return await self._upload_multipart(key, _prepend([first, second], parts))
+
+    async def _file_parts(self, path: Path) -> AsyncIterator[bytes]:
+        f = await self._run(open, path, "rb")
+        try:
+            while part := await self._run(f.read, self.part_size):
+                yield part
+        finally:
+            await self._run(f.close)
+
+    async def _upload_multipart(self, key: str, parts: AsyncIterator[bytes]) -> int:
+        """
+        Upload an object in parts, several at a time.
+
+        The upload is aborted if any part fails, so no orphaned parts are billed.
+
+        Returns:
+            Number of bytes uploaded
+        """
+        response = await self._request("POST", key, {"uploads": ""})
+        upload_id = _find_text(ElementTree.fromstring(response.content), "UploadId")
+        if not upload_id:
+            raise StorageError(f"S3 did not return an upload ID for '{key}'")
+
+        semaphore = asyncio.Semaphore(self.multipart_concurrency)
+        etags: dict[int, str] = {}
+        tasks: list[asyncio.Task] = []
+        size = 0
+
+        async def upload_part(number: int, data: bytes) -> None:
+            try:
+                part = await self._request("PUT", key, {"partNumber": str(number), "uploadId": upload_id}, content=data)
+                etag = part.headers.get("etag")
+                if not etag:
+                    raise StorageError(f"S3 returned no ETag for part {number} of '{key}'")
+                etags[number] = etag
+            finally:
+                semaphore.release()
+
+        try:
+            async for data in parts:
+                await semaphore.acquire()
+                size += len(data)
+                tasks.append(asyncio.create_task(upload_part(len(tasks) + 1, data)))
+            await asyncio.gather(*tasks)
+
+            body = "".join(
+                f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>"
+                for number, etag in sorted(etags.items())
+            )
+            response = await self._request(
+                "POST",
+                key,
+                {"uploadId": upload_id},
+                content=f"<CompleteMultipartUpload>{body}</CompleteMultipartUpload>".encode(),
+            )
+            # S3 can report a failed completion inside a 200 response
+            if b"<Error>" in response.content:
+                raise self._error("POST", key, response)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            try:
+                await self._request("DELETE", key, {"uploadId": upload_id}, allowed=(404,))
+            except Exception as e:
+                logger.warning("Failed to abort multipart upload", key=key, upload_id=upload_id, error=str(e))
+            raise
+
+        logger.debug("Multipart upload completed", key=key, parts=len(tasks), size_bytes=size)
+        return size
+
+    # -- Reads -----------------------------------------------------------
+
+    async def get(self, key: str) -> bytes | None:
+        response = await self._request("GET", key, allowed=(404,))
+        return None if response.status_code == 404 else response.content
+
+    async def get_range(self, key: str, start: int, end: int) -> bytes:
+        response = await self._request("GET", key, headers={"range": f"bytes={start}-{end}"})
+        if response.status_code == 200:
+            # Server ignored the range
+            return response.content[start : end + 1]
+        return response.content
+
+    async def stream(
+        self, key: str, start: int = 0, end: int | None = None, chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[bytes]:
+        headers = {}
+        if start or end is not None:
+            headers["range"] = f"bytes={start}-{'' if end is None else end}"
+        response = await self._client.send(self._build_request("GET", key, headers=headers), stream=True)
+        try:
+            if not response.is_success:
+                await response.aread()
+                raise self._error("GET", key, response)
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+        finally:
+            await response.aclose()
+
+    async def stat(self, key: str) -> ObjectInfo | None:
+        response = await self._request("HEAD", key, allowed=(404,))
+        if response.status_code == 404:
+            return None
+        last_modified = response.headers.get("last-modified")
+        return ObjectInfo(
+            key=key,
+            size=int(response.headers.get("content-length", 0)),
+            etag=response.headers.get("etag", "").strip('"') or None,
+            modified_at=parsedate_to_datetime(last_modified) if last_modified else None,
+        )
+
+    async def delete(self, key: str) -> None:
+        await self._request("DELETE", key, allowed=(404,))
+
+    async def list_objects(self, prefix: str = "") -> AsyncIterator[ObjectInfo]:
+        params = {"list-type": "2", "prefix": f"{self.prefix}{prefix}"}
+        while True:
+            response = await self._request("GET", "", params)
+            root = ElementTree.fromstring(response.content)
+            for contents in _find_all(root, "Contents"):
+                key = _find_text(contents, "Key") or ""
+                last_modified = _find_text(contents, "LastModified")
+                yield ObjectInfo(
+                    key=key[len(self.prefix) :],
+                    size=int(_find_text(contents, "Size") or 0),
+                    etag=(_find_text(contents, "ETag") or "").strip('"') or None,
+                    modified_at=datetime.fromisoformat(last_modified.replace("Z", "+00:00")) if last_modified else None,
+                )
+            token = _find_text(root, "NextContinuationToken")
+            if _find_text(root, "IsTruncated") != "true" or not token:
+                return
+            params["continuation-token"] = token
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> "S3Backend":
+        """Create a backend from application settings (SC_S3_* variables)."""
+        if not settings.S3_BUCKET:
+            raise ValueError("SC_S3_BUCKET is required for the s3 storage backend")
+        return cls(
+            bucket=settings.S3_BUCKET,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            prefix=settings.S3_PREFIX,
+            max_connections=settings.S3_MAX_CONNECTIONS,
+        )
+
+
+async def _rechunk(chunks: AsyncIterable[bytes], size: int) -> AsyncIterator[bytes]:
+    """Regroup a chunk stream into pieces of exactly ``size`` bytes (the last may be shorter)."""
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= size:
+            yield bytes(buffer[:size])
+            del buffer[:size]
+    if buffer:
+        yield bytes(buffer)
+
+
+async def _prepend(items: list[bytes], rest: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    for item in items:
+        yield item
+    async for item in rest:
+        yield item
@@ -0,0 +1,189 @@
+"""
+In-memory S3 stand-in.
+
+An httpx transport that implements the subset of the S3 REST API used by
+S3Backend (objects, ranged GETs, ListObjectsV2 and multipart uploads), so
+tests and local development can exercise the S3 code path without a
+network or a real service:
+
+    backend = S3Backend("bucket", endpoint_url="http://s3.local", transport=InMemoryS3())
+"""
+
+import hashlib
+import uuid
+from collections import Counter
+from datetime import UTC
+from datetime import datetime
+from email.utils import format_datetime
+from urllib.parse import parse_qsl
+from urllib.parse import unquote
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+import httpx
+
+from .s3 import MIN_PART_SIZE
+
+
+class StoredObject:
+    """An object held by the stand-in."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.etag = f'"{hashlib.md5(data, usedforsecurity=False).hexdigest()}"'
+        self.modified_at = datetime.now(UTC)
+
+
+class InMemoryS3(httpx.AsyncBaseTransport):
+    """S3-compatible object store living in a dict."""
+
+    def __init__(self, min_part_size: int = MIN_PART_SIZE, page_size: int = 1000):
+        """
+        Initialize the stand-in.
+
+        Args:
+            min_part_size: Smallest allowed multipart part (except the last)
+            page_size: Maximum keys per ListObjectsV2 page
+        """
+        self.min_part_size = min_part_size
+        self.page_size = page_size
+        self.objects: dict[tuple[str, str], StoredObject] = {}
+        self.uploads: dict[str, dict[int, bytes]] = {}
+
+        # Requests served, keyed by (method, operation), for assertions in tests
+        self.operations: Counter[tuple[str, str]] = Counter()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        bucket, _, key = unquote(request.url.path).lstrip("/").partition("/")
+        params = dict(parse_qsl(request.url.query.decode(), keep_blank_values=True))
+
+        content_hash = request.headers.get("x-amz-content-sha256")
+        if content_hash and content_hash != "UNSIGNED-PAYLOAD" and content_hash != hashlib.sha256(body).hexdigest():
+            return _error(400, "XAmzContentSHA256Mismatch")
+
+        method = request.method
+        if not key:
+            self.operations[(method, "list")] += 1
+            return self._list(bucket, params) if method == "GET" else _error(405, "MethodNotAllowed")
+        if "uploads" in params and method == "POST":
+            self.operations[(method, "create-multipart")] += 1
+            return self._create_multipart(bucket, key)
+        if "uploadId" in params:
+            self.operations[(method, "multipart")] += 1
+            return self._multipart(method, bucket, key, params, body)
+
+        self.operations[(method, "object")] += 1
+        if method == "PUT":
+            stored = self.objects[(bucket, key)] = StoredObject(body)
+            return httpx.Response(200, headers={"etag": stored.etag})
+        if method == "DELETE":
+            self.objects.pop((bucket, key), None)
+            return httpx.Response(204)
+        if method in ("GET", "HEAD"):
+            return self._get(method, bucket, key, request.headers.get("range"))
+        return _error(405, "MethodNotAllowed")
+
+    def _get(self, method: str, bucket: str, key: str, range_header: str | None) -> httpx.Response:
+        stored = self.objects.get((bucket, key))
+        if stored is None:
+            return _error(404, "NoSuchKey", head=method == "HEAD")
+
+        headers = {
+            "etag": stored.etag,
+            "last-modified": format_datetime(stored.modified_at, usegmt=True),
+            "accept-ranges": "bytes",
+        }
+        data = stored.data
+        status = 200
+        if range_header:
+            span = _parse_range(range_header, len(data))
+            if span is None:
+                return _error(416, "InvalidRange", head=method == "HEAD")
+            start, end = span
+            headers["content-range"] = f"bytes {start}-{end}/{len(data)}"
+            data = data[start : end + 1]
+            status = 206
+
+        headers["content-length"] = str(len(data))
+        return httpx.Response(status, headers=headers, content=b"" if method == "HEAD" else data)
+
+    def _list(self, bucket: str, params: dict[str, str]) -> httpx.Response:
+        prefix = params.get("prefix", "")
+        after = params.get("continuation-token", "")
+        keys = sorted(key for (b, key) in self.objects if b == bucket and key.startswith(prefix) and key > after)
+        page, truncated = keys[: self.page_size], len(keys) > self.page_size
+
+        contents = "".join(
+            f"<Contents><Key>{escape(key)}</Key><Size>{len(self.objects[(bucket, key)].data)}</Size>"
+            f"<ETag>{escape(self.objects[(bucket, key)].etag)}</ETag>"
+            f"<LastModified>{self.objects[(bucket, key)].modified_at.isoformat().replace('+00:00', 'Z')}</LastModified>"
+            "</Contents>"
+            for key in page
+        )
+        token = f"<NextContinuationToken>{escape(page[-1])}</NextContinuationToken>" if truncated else ""
+        return _xml(
+            f"<ListBucketResult><Name>{escape(bucket)}</Name><Prefix>{escape(prefix)}</Prefix>"
+            f"<KeyCount>{len(page)}</KeyCount><IsTruncated>{str(truncated).lower()}</IsTruncated>"
+            f"{token}{contents}</ListBucketResult>"
+        )
+
+    def _create_multipart(self, bucket: str, key: str) -> httpx.Response:
+        upload_id = uuid.uuid4().hex
+        self.uploads[upload_id] = {}
+        return _xml(
+            f"<InitiateMultipartUploadResult><Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key>"
+            f"<UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>"
+        )
+
+    def _multipart(self, method: str, bucket: str, key: str, params: dict[str, str], body: bytes) -> httpx.Response:
+        parts = self.uploads.get(params["uploadId"])
+        if parts is None:
+            return _error(404, "NoSuchUpload")
+
+        if method == "PUT":
+            parts[int(params["partNumber"])] = body
+            return httpx.Response(200, headers={"etag": StoredObject(body).etag})
+        if method == "DELETE":
+            del self.uploads[params["uploadId"]]
+            return httpx.Response(204)
+        if method != "POST":
+            return _error(405, "MethodNotAllowed")
+
+        numbers = [int(element.text or 0) for element in ElementTree.fromstring(body).iter("PartNumber")]
+        if not numbers or numbers != sorted(numbers) or any(number not in parts for number in numbers):
+            return _error(400, "InvalidPart")
+        if any(len(parts[number]) < self.min_part_size for number in numbers[:-1]):
+            return _error(400, "EntityTooSmall")
+
+        stored = self.objects[(bucket, key)] = StoredObject(b"".join(parts[number] for number in numbers))
+        del self.uploads[params["uploadId"]]
+        return _xml(
+            f"<CompleteMultipartUploadResult><Key>{escape(key)}</Key><ETag>{escape(stored.etag)}</ETag>"
+            "</CompleteMultipartUploadResult>"
+        )
+
+
+def _parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """Parse a single ``bytes=`` range into inclusive offsets, or None if unsatisfiable."""
+    unit, _, spec = header.partition("=")
+    start_text, _, end_text = spec.partition("-")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    if not start_text:
+        start, end = max(size - int(end_text), 0), size - 1
+    else:
+        start = int(start_text)
+        end = min(int(end_text), size - 1) if end_text else size - 1
+    return (start, end) if start <= end and start < size else None
+
+
+def _xml(body: str) -> httpx.Response:
+    return httpx.Response(
+        200, headers={"content-type": "application/xml"}, content=f'<?xml version="1.0"?>{body}'.encode()
+    )
+
+
+def _error(status: int, code: str, head: bool = False) -> httpx.Response:
+    content = b"" if head else f"<Error><Code>{code}</Code></Error>".encode()
+    return httpx.Response(status, headers={"content-type": "application/xml"}, content=content)
@@ -0,0 +1,15 @@
+"""
+Provider module whose import fails, used through a stub entry point in the provider tests.
+
+Stands in for a plugin whose vendor SDK isn't installed.
+"""
+
+import shadow_cauldron_missing_vendor_sdk  # noqa: F401
+
+from app.providers.base import BaseProvider
+
+
+class BrokenProvider(BaseProvider):
+    """Provider that can never be imported."""
+
+    PROVIDER_NAME = "broken"
@@ -9,9 +9,55 @@ from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from app.config import settings
+from app.core import limits as limits_module
+from app.experiments import ExperimentEngine
+from app.experiments import engine as engine_module
 from app.main import app
 from app.models.database import Base
 from app.models.database import get_db
+from app.providers import ProviderRegistry
+from app.providers import registry as registry_module
+from app.providers.base import BaseProvider
+from app.providers.base import CompletionRequest
+from app.providers.base import CompletionResponse
+from app.providers.base import ProviderConfig
+from app.storage import manager as storage_manager_module
+
+
+class EchoProvider(BaseProvider):
+    """Offline provider that echoes the prompt back, for tests."""
+
+    PROVIDER_NAME = "echo"
+
+    async def complete(self, request: CompletionRequest) -> CompletionResponse:
+        return CompletionResponse(
+            text=request.prompt,
+            model=request.model,
+            provider=self.name,
+            usage={"prompt_tokens": len(request.prompt.split()), "completion_tokens": 0},
+        )
+
+    async def list_models(self) -> list[str]:
+        return ["echo-1"]
+
+    async def health_check(self) -> bool:
+        return True
+
+
+@pytest.fixture(autouse=True)
+def isolated_storage(tmp_path, monkeypatch):
+    """Point the lazily created global storage manager at a temporary root."""
+    monkeypatch.setattr(settings, "STORAGE_ROOT", str(tmp_path / "global-storage"))
+    monkeypatch.setattr(settings, "STORAGE_MAINTENANCE_INTERVAL_SECONDS", 0)
+    monkeypatch.setattr(storage_manager_module, "_storage_manager", None)
+
+
+@pytest.fixture(autouse=True)
+def isolated_limits(monkeypatch):
+    """Fresh in-memory limits per test, with request rate limiting off unless a test enables it."""
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_SECOND", 0)
+    monkeypatch.setattr(limits_module, "_limit_store", limits_module.MemoryLimitStore())
 
 
 @pytest.fixture
@@ -46,3 +92,21 @@ def client(test_db):
 def sample_user():
     """Sample user data for tests."""
     return {"username": "testuser", "email": "test@example.com", "password": "testpassword123"}
+
+
+@pytest.fixture
+def provider_registry(monkeypatch):
+    """Isolated global provider registry with the echo provider created."""
+    registry = ProviderRegistry(entry_point_group=None)
+    monkeypatch.setattr(registry_module, "_registry", registry)
+    registry.register_provider(EchoProvider)
+    registry.create_provider("echo", ProviderConfig(name="echo"))
+    return registry
+
+
+@pytest.fixture
+def experiment_engine(monkeypatch):
+    """Isolated global experiment engine."""
+    engine = ExperimentEngine(max_running=1)
+    monkeypatch.setattr(engine_module, "_engine", engine)
+    return engine
@@ -0,0 +1,25 @@
+"""
+Provider module imported only through lazy registration in the provider tests.
+
+Stands in for a vendor SDK integration whose import should be deferred
+until the provider is first requested.
+"""
+
+from app.providers.base import BaseProvider
+from app.providers.base import CompletionRequest
+from app.providers.base import CompletionResponse
+
+
+class StubProvider(BaseProvider):
+    """Offline provider answering every prompt with a fixed text."""
+
+    PROVIDER_NAME = "stub"
+
+    async def complete(self, request: CompletionRequest) -> CompletionResponse:
+        return CompletionResponse(text="stub", model=request.model, provider=self.name)
+
+    async def list_models(self) -> list[str]:
+        return ["stub-1"]
+
+    async def health_check(self) -> bool:
+        return True
@@ -0,0 +1,494 @@
+"""
+Tests for the API brick.
+
+Tests download serving (ranges, ETags, conditional requests, zero-copy sends)
+the experiment job API, and per-user rate limits and quotas.
+"""
+
+import asyncio
+import io
+import time
+
+import pytest
+from starlette.websockets import WebSocket
+from starlette.websockets import WebSocketDisconnect
+
+from app.api.downloads import ZeroCopyFileResponse
+from app.api.experiments import experiment_events_websocket
+from app.config import settings
+from app.core import get_limit_store
+from app.core.auth import create_access_token
+from app.experiments import engine as engine_module
+from app.experiments.models import ExperimentConfig
+from app.storage import S3Backend
+from app.storage import StorageManager
+from app.storage import manager as storage_manager_module
+from app.storage.s3_standin import InMemoryS3
+
+
+@pytest.fixture
+def auth_headers():
+    """Bearer token headers for a test user."""
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'user-1', 'username': 'ada'})}"}
+
+
+def other_user_headers():
+    """Authorization headers of a second, non-admin user."""
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'user-2', 'username': 'bob'})}"}
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    """Global storage manager replaced by one in a temporary directory."""
+    storage = StorageManager(str(tmp_path / "storage"))
+    monkeypatch.setattr(storage_manager_module, "_storage_manager", storage)
+    return storage
+
+
+@pytest.fixture
+def s3_storage(tmp_path, monkeypatch):
+    """Global storage manager backed by the in-memory S3 stand-in."""
+    backend = S3Backend("bucket", endpoint_url="http://s3.test", transport=InMemoryS3())
+    storage = StorageManager(str(tmp_path / "storage"), backend=backend)
+    monkeypatch.setattr(storage_manager_module, "_storage_manager", storage)
+    return storage
+
+
+@pytest.mark.asyncio
+async def test_download_local_file(client, storage, auth_headers):
+    """Test full, ranged and conditional downloads of a local upload."""
+    file_info = await storage.upload_file(io.BytesIO(b"0123456789"), "digits.txt", "text/plain", owner_id="user-1")
+    url = f"/api/v1/files/{file_info['file_id']}/download"
+
+    response = client.get(url, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.content == b"0123456789"
+    assert response.headers["etag"] == f'"{file_info["content_hash"]}"'
+    assert response.headers["content-disposition"] == 'attachment; filename="digits.txt"'
+
+    response = client.get(url, headers={**auth_headers, "Range": "bytes=2-5"})
+    assert response.status_code == 206
+    assert response.content == b"2345"
+    assert response.headers["content-range"] == "bytes 2-5/10"
+
+    response = client.get(url, headers={**auth_headers, "If-None-Match": f'"{file_info["content_hash"]}"'})
+    assert response.status_code == 304
+
+    assert client.get(url).status_code in (401, 403)
+    assert client.get("/api/v1/files/missing/download", headers=auth_headers).status_code == 404
+    assert client.get(url, headers=other_user_headers()).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_download_streams_from_remote_backend(client, s3_storage, auth_headers):
+    """Test ranged downloads are streamed from a remote backend."""
+    file_info = await s3_storage.upload_file(io.BytesIO(b"0123456789"), "digits.txt", owner_id="user-1")
+    url = f"/api/v1/files/{file_info['file_id']}/download"
+
+    response = client.get(url, headers={**auth_headers, "Range": "bytes=-3"})
+    assert response.status_code == 206
+    assert response.content == b"789"
+    assert response.headers["content-range"] == "bytes 7-9/10"
+    assert response.headers["etag"] == f'"{file_info["content_hash"]}"'
+
+    response = client.get(url, headers={**auth_headers, "Range": "bytes=20-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */10"
+
+    response = client.head(url, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-length"] == "10"
+
+
+@pytest.mark.asyncio
+async def test_download_columnar_export(client, storage, auth_headers):
+    """Test column files of a fallback export are served individually."""
+    await storage.save_experiment_data("exp-1", {"experiment_id": "exp-1", "created_by": "user-1"})
+    await storage.export_experiment_columnar("exp-1", [{"run_id": "run-0", "duration_ms": 5}], format="columns")
+    url = "/api/v1/experiments/exp-1/export"
+
+    assert client.get(url, headers=auth_headers).status_code == 400
+
+    response = client.get(url, params={"file": "manifest.json"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["num_rows"] == 1
+    assert len(response.headers["etag"]) == 66
+
+    assert client.get(url, params={"file": "../index.sqlite3"}, headers=auth_headers).status_code == 404
+    assert client.get(url, params={"file": "manifest.json"}, headers=other_user_headers()).status_code == 404
+    assert client.get("/api/v1/experiments/missing/export", headers=auth_headers).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_zero_copy_range_send(tmp_path):
+    """Test single ranges are handed to servers offering the zero-copy extension."""
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"0123456789")
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "headers": [(b"range", b"bytes=3-6")],
+        "extensions": {"http.response.zerocopysend": {}},
+        "asgi": {"spec_version": "2.4"},
+    }
+    messages = []
+
+    async def send(message):
+        if message["type"] == "http.response.zerocopysend":
+            message = {**message, "file": message["file"].name}
+        messages.append(message)
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    await ZeroCopyFileResponse(path)(scope, receive, send)
+
+    assert messages[0]["status"] == 206
+    assert messages[1] == {
+        "type": "http.response.zerocopysend",
+        "file": str(path),
+        "offset": 3,
+        "count": 4,
+        "more_body": False,
+    }
+
+    messages.clear()
+    await ZeroCopyFileResponse(path)({**scope, "headers": [(b"range", b"bytes=20-")]}, receive, send)
+    assert messages[0]["status"] == 416
+    assert (b"content-range", b"bytes */10") in messages[0]["headers"]
+
+
+def wait_for_status(client, url, headers, statuses, timeout=5.0):
+    """Poll a job until it reaches one of the given statuses."""
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(url, headers=headers).json()
+        if job["status"] in statuses or time.monotonic() > deadline:
+            return job
+        time.sleep(0.01)
+
+
+def test_experiment_job_lifecycle(client, provider_registry, experiment_engine, auth_headers):
+    """Test experiments are submitted, started in the background, polled and cancelled."""
+    config = {
+        "name": "greeting",
+        "prompt_template": "Hello {name}",
+        "providers": ["echo"],
+        "models": {"echo": ["echo-1"]},
+        "test_cases": [{"name": "Ada"}, {"name": "Grace"}],
+    }
+
+    response = client.post("/api/v1/experiments", json=config, headers=auth_headers)
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "pending"
+    assert job["progress"]["total_runs"] == 2
+    url = f"/api/v1/experiments/{job['experiment_id']}"
+
+    assert client.post(f"{url}/start", headers=auth_headers).status_code == 202
+    job = wait_for_status(client, url, auth_headers, {"completed", "failed"})
+    assert job["status"] == "completed"
+    assert job["progress"]["completed_runs"] == 2
+    assert job["successful_runs"] == 2
+    assert client.post(f"{url}/start", headers=auth_headers).status_code == 409
+
+    response = client.get(f"{url}/runs", params={"limit": 1, "fields": "run_id,status"}, headers=auth_headers)
+    page = response.json()
+    assert page["runs"][0].keys() == {"run_id", "status"}
+    page = client.get(f"{url}/runs", params={"cursor": page["next_cursor"]}, headers=auth_headers).json()
+    assert page["runs"][0]["response_text"] == "Hello Grace"
+    assert page["next_cursor"] is None
+    assert client.get(f"{url}/runs", params={"fields": "secret"}, headers=auth_headers).status_code == 400
+    assert client.post(f"{url}/cancel", headers=auth_headers).status_code == 409
+
+    pending = client.post("/api/v1/experiments", json=config, headers=auth_headers).json()
+    response = client.post(f"/api/v1/experiments/{pending['experiment_id']}/cancel", headers=auth_headers)
+    assert response.json()["status"] == "cancelled"
+
+    jobs = client.get("/api/v1/experiments", headers=auth_headers).json()
+    assert [job["experiment_id"] for job in jobs] == [pending["experiment_id"], job["experiment_id"]]
+
+    assert client.get(url, headers=other_user_headers()).status_code == 404
+
+
+def test_experiment_conditional_and_compressed_reads(client, provider_registry, experiment_engine, auth_headers):
+    """Test unchanged experiments return 304 and large results are compressed."""
+    config = {
+        "name": "greeting",
+        "prompt_template": "Hello {name}",
+        "providers": ["echo"],
+        "models": {"echo": ["echo-1"]},
+        "test_cases": [{"name": f"user {i}"} for i in range(20)],
+    }
+    job = client.post("/api/v1/experiments", json=config, headers=auth_headers).json()
+    url = f"/api/v1/experiments/{job['experiment_id']}"
+    pending_etag = client.get(url, headers=auth_headers).headers["etag"]
+
+    client.post(f"{url}/start", headers=auth_headers)
+    wait_for_status(client, url, auth_headers, {"completed"})
+    response = client.get(url, headers={**auth_headers, "If-None-Match": pending_etag})
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert etag != pending_etag
+    assert client.get(url, headers={**auth_headers, "If-None-Match": etag}).status_code == 304
+
+    response = client.get(f"{url}/runs", headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert len(response.json()["runs"]) == 20
+    runs_etag = response.headers["etag"]
+    assert runs_etag.startswith('W/"')
+    response = client.get(f"{url}/runs", headers={**auth_headers, "If-None-Match": runs_etag})
+    assert response.status_code == 304
+    response = client.get(f"{url}/runs", params={"limit": 5}, headers={**auth_headers, "If-None-Match": runs_etag})
+    assert response.status_code == 200
+
+    response = client.get(f"{url}/runs", headers={**auth_headers, "Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+
+
+def test_failed_experiment_runs_are_tagged_once_saved(
+    client, provider_registry, experiment_engine, auth_headers, monkeypatch
+):
+    """Test run pages of a failed experiment only get an ETag once its final state is saved."""
+
+    async def broken_warmup(config):
+        raise RuntimeError("provider setup failed")
+
+    saves = []
+    save_experiment_data = engine_module.save_experiment_data
+
+    async def flaky_save(experiment_id, data):
+        saves.append(experiment_id)
+        if len(saves) == 1:
+            raise OSError("storage unavailable")
+        return await save_experiment_data(experiment_id, data)
+
+    monkeypatch.setattr(experiment_engine, "_warmup_providers", broken_warmup)
+    monkeypatch.setattr(engine_module, "save_experiment_data", flaky_save)
+    config = {
+        "name": "greeting",
+        "prompt_template": "Hello {name}",
+        "providers": ["echo"],
+        "models": {"echo": ["echo-1"]},
+        "test_cases": [{"name": "Ada"}],
+    }
+
+    def run_failing_experiment():
+        job = client.post("/api/v1/experiments", json=config, headers=auth_headers).json()
+        url = f"/api/v1/experiments/{job['experiment_id']}"
+        client.post(f"{url}/start", headers=auth_headers)
+        assert wait_for_status(client, url, auth_headers, {"failed"})["status"] == "failed"
+        return url
+
+    def runs_etag(url, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            etag = client.get(f"{url}/runs", headers=auth_headers).headers.get("etag")
+            if etag is not None or time.monotonic() > deadline:
+                return etag
+            time.sleep(0.01)
+
+    # The first save fails, so its pages stay untagged; the second is saved
+    assert runs_etag(run_failing_experiment(), timeout=0.2) is None
+    assert runs_etag(run_failing_experiment(), timeout=5.0) is not None
+    assert len(saves) == 2
+
+
+def test_rate_limits_and_quotas(client, provider_registry, experiment_engine, auth_headers, monkeypatch):
+    """Test per-user request rate limits and run quotas."""
+    config = {
+        "name": "greeting",
+        "prompt_template": "Hello {name}",
+        "providers": ["echo"],
+        "models": {"echo": ["echo-1"]},
+        "test_cases": [{"name": "Ada"}, {"name": "Grace"}],
+    }
+    monkeypatch.setattr(settings, "QUOTA_MAX_QUEUED_RUNS", 1)
+    response = client.post("/api/v1/experiments", params={"start": True}, json=config, headers=auth_headers)
+    assert response.status_code == 429
+    assert "queued runs" in response.json()["detail"]
+    pending = client.get("/api/v1/experiments", headers=auth_headers).json()[0]
+    assert pending["status"] == "pending"
+
+    monkeypatch.setattr(settings, "QUOTA_MAX_QUEUED_RUNS", 2)
+    url = f"/api/v1/experiments/{pending['experiment_id']}"
+    assert client.post(f"{url}/start", headers=auth_headers).status_code == 202
+    assert wait_for_status(client, url, auth_headers, {"completed"})["status"] == "completed"
+    # The finished experiment's lease was released
+    assert asyncio.run(get_limit_store().usage("user-1")) == (0, 0)
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_SECOND", 0.01)
+    monkeypatch.setattr(settings, "RATE_LIMIT_BURST", 2)
+    assert client.get(url, headers=auth_headers).status_code == 200
+    assert client.get(url, headers=auth_headers).status_code == 200
+    response = client.get(url, headers=auth_headers)
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) > 1
+    assert client.get("/api/v1/experiments", headers=other_user_headers()).status_code == 200
+
+
+def test_sweep_submission(client, provider_registry, experiment_engine, auth_headers, monkeypatch):
+    """Test a sweep is expanded into experiments created and started together."""
+    sweep = {
+        "base": {
+            "name": "greeting",
+            "prompt_template": "Hello {name}",
+            "providers": ["echo"],
+            "models": {"echo": ["echo-1"]},
+            "test_cases": [{"name": "Ada"}],
+        },
+        "grid": {"temperature": [0.0, 0.7], "system_prompt": ["terse", "chatty", None]},
+    }
+
+    response = client.post("/api/v1/experiments/sweeps", params={"start": True}, json=sweep, headers=auth_headers)
+    assert response.status_code == 202
+    submitted = response.json()
+    experiments = submitted["experiments"]
+    assert len(experiments) == 6
+    assert experiments[1]["name"] == "greeting [2/6]"
+    assert experiments[1]["sweep_params"] == {"temperature": 0.0, "system_prompt": "chatty"}
+    assert all(experiment["status"] == "queued" for experiment in experiments)
+
+    for experiment in experiments:
+        job = wait_for_status(client, f"/api/v1/experiments/{experiment['experiment_id']}", auth_headers, {"completed"})
+        assert job["status"] == "completed"
+    jobs = client.get("/api/v1/experiments", params={"sweep_id": submitted["sweep_id"]}, headers=auth_headers).json()
+    assert len(jobs) == 6
+
+    response = client.post(
+        "/api/v1/experiments/sweeps", json={**sweep, "grid": {"temperature": [5.0]}}, headers=auth_headers
+    )
+    assert response.status_code == 422
+
+    # All or nothing: a sweep over the quota creates no experiments
+    monkeypatch.setattr(settings, "QUOTA_MAX_ACTIVE_EXPERIMENTS", 4)
+    response = client.post("/api/v1/experiments/sweeps", params={"start": True}, json=sweep, headers=auth_headers)
+    assert response.status_code == 429
+    assert len(client.get("/api/v1/experiments", headers=auth_headers).json()) == 6
+
+
+def test_experiment_event_streams(client, provider_registry, experiment_engine, auth_headers):
+    """Test live events are streamed as SSE and over a WebSocket until the final status."""
+    config = {
+        "name": "greeting",
+        "prompt_template": "Hello {name}",
+        "providers": ["echo"],
+        "models": {"echo": ["echo-1"]},
+        "test_cases": [{"name": "Ada"}, {"name": "Grace"}],
+    }
+    job = client.post("/api/v1/experiments", json=config, headers=auth_headers).json()
+    url = f"/api/v1/experiments/{job['experiment_id']}/events"
+    token = auth_headers["Authorization"].removeprefix("Bearer ")
+
+    with client.websocket_connect(f"{url}?token={token}") as websocket:
+        assert websocket.receive_json()["data"]["status"] == "pending"
+        client.post(f"/api/v1/experiments/{job['experiment_id']}/start", headers=auth_headers)
+        events = [websocket.receive_json() for _ in range(5)]
+    assert [event["type"] for event in events] == ["status", "status", "run", "run", "status"]
+    assert events[-1]["data"]["status"] == "completed"
+
+    with client.stream("GET", url, headers=auth_headers) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = response.read().decode()
+    assert body.startswith("id: ")
+    assert "event: status" in body
+    assert '"status":"completed"' in body.replace(" ", "")
+
+
+def test_experiment_websocket_is_rate_limited(client, provider_registry, experiment_engine, auth_headers, monkeypatch):
+    """Test WebSocket event streams count against the user's rate limit."""
+    config = {
+        "name": "greeting",
+        "prompt_template": "Hello {name}",
+        "providers": ["echo"],
+        "models": {"echo": ["echo-1"]},
+        "test_cases": [{"name": "Ada"}],
+    }
+    job = client.post("/api/v1/experiments", json=config, headers=auth_headers).json()
+    url = f"/api/v1/experiments/{job['experiment_id']}/events?token={auth_headers['Authorization'][7:]}"
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_SECOND", 0.01)
+    monkeypatch.setattr(settings, "RATE_LIMIT_BURST", 1)
+
+    with client.websocket_connect(url) as websocket:
+        assert websocket.receive_json()["data"]["status"] == "pending"
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with client.websocket_connect(url):
+            pass
+    assert closed.value.code == 1013
+
+
+@pytest.mark.asyncio
+async def test_idle_websocket_unsubscribes_on_disconnect(provider_registry, experiment_engine, auth_headers):
+    """Test an idle WebSocket event stream ends as soon as the client disconnects."""
+    config = ExperimentConfig(
+        name="greeting",
+        prompt_template="Hello {name}",
+        providers=["echo"],
+        models={"echo": ["echo-1"]},
+        test_cases=[{"name": "Ada"}],
+    )
+    experiment = await experiment_engine.create_experiment(config, created_by="user-1")
+    incoming = asyncio.Queue()
+    await incoming.put({"type": "websocket.connect"})
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    websocket = WebSocket({"type": "websocket", "path": "/", "headers": [], "query_string": b""}, incoming.get, send)
+    token = auth_headers["Authorization"].removeprefix("Bearer ")
+    handler = asyncio.create_task(experiment_events_websocket(websocket, experiment.experiment_id, token))
+    await asyncio.sleep(0.05)
+    assert experiment_engine.events.subscriber_count(experiment.experiment_id) == 1
+
+    await incoming.put({"type": "websocket.disconnect", "code": 1001})
+    await asyncio.wait_for(handler, 1)
+    assert experiment_engine.events.subscriber_count(experiment.experiment_id) == 0
+    assert [message["type"] for message in sent] == ["websocket.accept", "websocket.send"]
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client, s3_storage, provider_registry, experiment_engine, auth_headers, monkeypatch):
+    """Test /metrics reports HTTP, engine, provider, cache and storage metrics."""
+    file_info = await s3_storage.upload_file(io.BytesIO(b"0123456789"), "digits.txt", owner_id="user-1")
+    assert client.get(f"/api/v1/files/{file_info['file_id']}/download", headers=auth_headers).content == b"0123456789"
+
+    config = {
+        "name": "greeting",
+        "prompt_template": "Hello {name}",
+        "providers": ["echo"],
+        "models": {"echo": ["echo-1"]},
+        "test_cases": [{"name": "Ada"}],
+    }
+    job = client.post("/api/v1/experiments?start=true", json=config, headers=auth_headers).json()
+    wait_for_status(client, f"/api/v1/experiments/{job['experiment_id']}", auth_headers, {"completed", "failed"})
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers=auth_headers).status_code == 403
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    admin_token = create_access_token({"sub": "admin-1", "username": "root", "is_admin": True})
+    assert client.get("/metrics", headers={"Authorization": f"Bearer {admin_token}"}).status_code == 200
+
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = {}
+    for line in response.text.splitlines():
+        if not line.startswith("#"):
+            name, _, value = line.rpartition(" ")
+            samples[name] = float(value)
+
+    route = 'method="GET",route="/api/v1/experiments/{experiment_id}"'
+    assert samples[f'http_requests_total{{{route},status="200"}}'] >= 1
+    assert samples[f"http_request_duration_seconds_count{{{route}}}"] >= 1
+    assert samples['experiments_active{status="running"}'] == 0
+    assert samples["experiment_runs_in_flight"] == 0
+    assert samples['provider_requests_total{provider="echo",outcome="ok"}'] >= 1
+    assert samples['provider_request_duration_seconds_count{provider="echo"}'] >= 1
+    assert samples['experiment_runs_total{status="completed"}'] >= 1
+    assert samples['auth_token_cache_requests_total{result="hit"}'] >= 1
+    assert samples['storage_bytes_total{backend="s3",direction="read"}'] >= 10
+    assert samples['storage_bytes_total{backend="s3",direction="write"}'] >= 10
+    assert samples['storage_operation_duration_seconds_count{backend="s3",operation="stream"}'] >= 1
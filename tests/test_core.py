@@ -0,0 +1,289 @@
+"""
+Tests for the core brick.
+
+Tests JSON serialization helpers, token verification caching, rate limits
+and quotas, the logging pipeline and the request logging middleware.
+"""
+
+import io
+import threading
+import time
+from datetime import date
+
+import pytest
+import structlog
+from fastapi import FastAPI
+from fastapi import HTTPException
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from app.config import Settings
+from app.config import settings
+from app.core import QuotaExceededError
+from app.core import auth as auth_module
+from app.core import authenticate_token
+from app.core import invalidate_token
+from app.core import json_dumps
+from app.core import json_loads
+from app.core import limits as limits_module
+from app.core import logging as logging_module
+from app.core import metrics as metrics_module
+from app.core import serialization
+from app.core import setup_logging
+from app.core import setup_middleware
+from app.core import token_cache_stats
+from app.experiments.models import ExperimentStatus
+
+
+@pytest.fixture(params=["json", "auto"])
+def json_backend(request, monkeypatch):
+    """Run a test against the stdlib backend and the fastest installed one."""
+    monkeypatch.setattr(serialization, "_backend", None)
+    return serialization.set_json_backend(request.param)
+
+
+def test_json_round_trip(json_backend):
+    """Test encoding of dates, enums and nested data."""
+    payload = {
+        "created_at": date(2025, 1, 2),
+        "status": ExperimentStatus.COMPLETED,
+        "usage": {"prompt_tokens": 12, "text": "naïve"},
+    }
+
+    data = json_dumps(payload)
+
+    assert isinstance(data, bytes)
+    assert json_loads(data) == {
+        "created_at": "2025-01-02",
+        "status": "completed",
+        "usage": {"prompt_tokens": 12, "text": "naïve"},
+    }
+    assert json_loads(json_dumps(payload, indent=True)) == json_loads(data)
+
+
+def test_unknown_json_backend():
+    """Test unknown backends are rejected."""
+    with pytest.raises(ValueError, match="Unknown JSON backend"):
+        serialization.set_json_backend("yaml")
+
+
+def test_request_logging_middleware():
+    """Test correlation IDs on plain, streaming and failed responses."""
+    app = FastAPI()
+    setup_middleware(app)
+
+    @app.get("/state")
+    async def state(request: Request):
+        return {"correlation_id": request.state.correlation_id}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk {i}\n".encode()
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    client = TestClient(app, raise_server_exceptions=False)
+
+    response = client.get("/state")
+    assert response.status_code == 200
+    assert response.json()["correlation_id"] == response.headers["X-Correlation-ID"]
+
+    response = client.get("/stream")
+    assert response.text == "chunk 0\nchunk 1\nchunk 2\n"
+    assert response.headers["X-Correlation-ID"]
+
+    response = client.get("/boom")
+    assert response.status_code == 500
+    assert response.json() == {
+        "error": "Internal server error",
+        "correlation_id": response.headers["X-Correlation-ID"],
+    }
+
+
+def test_logging_sampling_and_queue(monkeypatch):
+    """Test per-event sampling and the background writer."""
+    monkeypatch.setattr(settings, "LOG_FORMAT", "json")
+    monkeypatch.setattr(settings, "LOG_QUEUE_SIZE", 1000)
+    monkeypatch.setattr(settings, "LOG_SAMPLE_RATES", {"Noisy": 0.0, "Sampled": 0.5})
+    stream = io.BytesIO()
+    setup_logging(stream)
+    try:
+        logger = structlog.get_logger("test")
+        for i in range(10):
+            logger.info("Noisy", i=i)
+        for i in range(200):
+            logger.info("Sampled", i=i)
+        logger.warning("Noisy", i=-1)
+        logger.info("Kept", user_id="u1")
+        logging_module._writer.close()
+    finally:
+        structlog.reset_defaults()
+
+    lines = [json_loads(line) for line in stream.getvalue().splitlines()]
+    events = [line["event"] for line in lines]
+    # Warnings bypass sampling; rate 0 drops everything else
+    assert [line["level"] for line in lines if line["event"] == "Noisy"] == ["warning"]
+    assert 50 < events.count("Sampled") < 150
+    assert all(line["sample_rate"] == 0.5 for line in lines if line["event"] == "Sampled")
+    assert lines[-1]["event"] == "Kept" and lines[-1]["user_id"] == "u1" and "sample_rate" not in lines[-1]
+
+
+def test_log_writer_drops_when_full():
+    """Test that a full queue drops lines instead of blocking."""
+    stream = io.BytesIO()
+    writer = logging_module.QueueLogWriter(stream, max_queued=1)
+    writer.start()
+    for i in range(1000):
+        writer.write(b"line %d" % i)
+    writer.close()
+
+    lines = stream.getvalue().splitlines()
+    if writer.dropped:
+        assert json_loads(lines[-1]) == {"event": "Log lines dropped", "level": "warning", "count": writer.dropped}
+    assert len(lines) - (1 if writer.dropped else 0) + writer.dropped == 1000
+
+
+def test_log_writer_lifecycle():
+    """Test the writer thread starts on demand and no line is lost around close()."""
+    stream = io.BytesIO()
+    writer = logging_module.QueueLogWriter(stream)
+    writer.write(b"queued")
+    assert writer._thread.ident is None
+    assert stream.getvalue() == b""
+
+    writer.close()
+    writer.write(b"after close")
+    writer.start()
+
+    assert stream.getvalue().splitlines() == [b"queued", b"after close"]
+    assert not writer._thread.is_alive()
+
+
+def test_log_level_is_validated():
+    """Test log levels are normalized and unknown ones rejected."""
+    assert Settings(LOG_LEVEL="debug").LOG_LEVEL == "DEBUG"
+    with pytest.raises(ValidationError, match="Unknown log level"):
+        Settings(LOG_LEVEL="verbose")
+
+
+def test_metrics_registry():
+    """Test per-thread counters and histograms are summed and rendered in the Prometheus format."""
+    registry = metrics_module.MetricsRegistry()
+    requests = registry.register(metrics_module.Counter("requests", "Requests", ("route",)))
+    latency = registry.register(metrics_module.Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0)))
+    registry.register(metrics_module.CallbackMetric("queued", "Queued", lambda: 3))
+    assert registry.register(metrics_module.Counter("requests", "Again")) is requests
+
+    def record():
+        for _ in range(1000):
+            requests.inc('/a"b')
+        latency.observe(0.5)
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latency.observe(0.05)
+    latency.observe(5)
+
+    assert requests.value('/a"b') == 4000
+    lines = registry.render().splitlines()
+    assert "# TYPE requests counter" in lines
+    assert 'requests_total{route="/a\\"b"} 4000' in lines
+    assert [line for line in lines if line.startswith("latency_seconds")] == [
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 5',
+        'latency_seconds_bucket{le="+Inf"} 6',
+        "latency_seconds_sum 7.05",
+        "latency_seconds_count 6",
+    ]
+    assert "queued 3" in lines
+
+
+def test_token_cache(monkeypatch):
+    """Test cached token verification, expiry, invalidation and eviction."""
+    monkeypatch.setattr(auth_module, "_token_cache", auth_module.TokenCache(max_size=2))
+    token = auth_module.create_access_token({"sub": "user-1", "username": "ada"})
+
+    user = authenticate_token(token)
+    assert authenticate_token(token) is user
+    assert authenticate_token(token, use_cache=False) == user
+    assert token_cache_stats()["hits"] == 1
+
+    assert invalidate_token(token)
+    authenticate_token(token)
+    assert token_cache_stats()["misses"] == 2
+
+    for i in range(2):
+        authenticate_token(auth_module.create_access_token({"sub": f"user-{i + 2}"}))
+    assert token_cache_stats()["size"] == 2
+    assert token_cache_stats()["evictions"] == 1
+
+    # An expired cached token is verified again, and rejected
+    expired = auth_module.jwt.encode(
+        {"sub": "user-1", "exp": int(time.time()) - 1}, settings.SECRET_KEY, algorithm="HS256"
+    )
+    auth_module._token_cache.put(expired, auth_module._VerifiedToken({"sub": "user-1"}, 0.0))
+    with pytest.raises(HTTPException):
+        authenticate_token(expired)
+
+
+@pytest.fixture(params=["memory", "sql"])
+def limit_store(request, tmp_path):
+    """Run a test against the in-memory and the shared SQL limit stores."""
+    if request.param == "memory":
+        return limits_module.MemoryLimitStore()
+    return limits_module.SQLLimitStore(f"sqlite:///{tmp_path / 'limits.sqlite3'}")
+
+
+@pytest.mark.asyncio
+async def test_limit_store(limit_store):
+    """Test token buckets and quota leases."""
+    for _ in range(3):
+        assert await limit_store.take("user:1", capacity=3, rate=1) == 0
+    assert 0 < await limit_store.take("user:1", capacity=3, rate=1) <= 1
+    assert await limit_store.take("user:2", capacity=3, rate=1) == 0
+
+    await limit_store.acquire("user-1", "exp-1", 60, max_leases=2, max_units=100, ttl=60)
+    with pytest.raises(QuotaExceededError, match="queued runs"):
+        await limit_store.acquire("user-1", "exp-2", 50, max_leases=2, max_units=100, ttl=60)
+    await limit_store.acquire("user-1", "exp-2", 40, max_leases=2, max_units=100, ttl=60)
+    with pytest.raises(QuotaExceededError, match="active experiments"):
+        await limit_store.acquire("user-1", "exp-3", 0, max_leases=2, max_units=100, ttl=60)
+    # Other users and expired leases don't count
+    await limit_store.acquire("user-2", "exp-4", 100, max_leases=2, max_units=100, ttl=60)
+    await limit_store.acquire("user-2", "exp-5", 100, max_leases=None, max_units=None, ttl=-1)
+    assert await limit_store.usage("user-2") == (1, 100)
+
+    await limit_store.release("exp-1")
+    assert await limit_store.usage("user-1") == (1, 40)
+
+    # Renewal extends a live lease, but doesn't revive a released or expired one
+    assert await limit_store.renew("exp-2", ttl=120) is True
+    assert await limit_store.renew("exp-1", ttl=120) is False
+    assert await limit_store.renew("exp-5", ttl=120) is False
+    await limit_store.close()
+
+
+@pytest.mark.asyncio
+async def test_memory_limit_store_drops_idle_buckets(monkeypatch):
+    """Test buckets that have refilled are swept from the in-memory store."""
+    store = limits_module.MemoryLimitStore()
+    for user in range(100):
+        await store.take(f"user:{user}", capacity=3, rate=1)
+    await store.take("user:busy", capacity=3, rate=0.001)
+    assert len(store._buckets) == 101
+
+    now = time.time() + limits_module._BUCKET_SWEEP_SECONDS
+    monkeypatch.setattr(limits_module.time, "time", lambda: now)
+    assert await store.take("user:busy", capacity=3, rate=0.001) == 0
+    assert set(store._buckets) == {"user:busy"}
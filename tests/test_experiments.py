@@ -0,0 +1,372 @@
+"""
+Tests for the experiments brick.
+
+Tests run generation, execution, dataset streaming, provider fallback handling
+and sweep expansion.
+"""
+
+import asyncio
+import io
+
+import pytest
+from pydantic import ValidationError
+
+from app.config import settings
+from app.core import get_limit_store
+from app.experiments import ExperimentEngine
+from app.experiments import engine as engine_module
+from app.experiments.models import ExperimentConfig
+from app.experiments.models import ExperimentStatus
+from app.experiments.models import SweepConfig
+from app.providers.base import BaseProvider
+from app.providers.base import CompletionRequest
+from app.providers.base import CompletionResponse
+from app.providers.base import ProviderConfig
+from app.providers.base import RateLimitError
+from app.storage import S3Backend
+from app.storage import StorageManager
+from app.storage import get_storage_manager
+from app.storage import manager as storage_manager_module
+from app.storage.s3_standin import InMemoryS3
+
+
+class ThrottledProvider(BaseProvider):
+    """Provider that always rejects requests with a rate limit error."""
+
+    PROVIDER_NAME = "throttled"
+
+    async def complete(self, request: CompletionRequest) -> CompletionResponse:
+        raise RateLimitError("429 Too Many Requests")
+
+    async def list_models(self) -> list[str]:
+        return ["busy-1"]
+
+    async def health_check(self) -> bool:
+        return False
+
+
+class SlowProvider(BaseProvider):
+    """Provider that takes a while to answer."""
+
+    PROVIDER_NAME = "slow"
+
+    async def complete(self, request: CompletionRequest) -> CompletionResponse:
+        await asyncio.sleep(10)
+        return CompletionResponse(text=request.prompt, model=request.model, provider=self.name)
+
+    async def list_models(self) -> list[str]:
+        return ["slow-1"]
+
+    async def health_check(self) -> bool:
+        return True
+
+
+def make_config(**overrides) -> ExperimentConfig:
+    """Build a small experiment configuration."""
+    values = {
+        "name": "greeting",
+        "prompt_template": "Hello {name}",
+        "providers": ["echo"],
+        "models": {"echo": ["echo-1"]},
+        "test_cases": [{"name": "Ada"}, {"name": "Grace"}],
+    }
+    values.update(overrides)
+    return ExperimentConfig(**values)
+
+
+@pytest.mark.asyncio
+async def test_run_experiment(provider_registry):
+    """Test a simple experiment completes with formatted prompts."""
+    engine = ExperimentEngine()
+    experiment = await engine.create_experiment(make_config(), created_by="user-1")
+
+    result = await engine.run_experiment(experiment.experiment_id)
+
+    assert result.total_runs == 2
+    assert result.successful_runs == 2
+    assert sorted(run.response_text for run in result.runs) == ["Hello Ada", "Hello Grace"]
+    assert all(run.served_by == "echo/echo-1" for run in result.runs)
+    assert all(run.prompt_tokens_estimate for run in result.runs)
+
+
+@pytest.mark.asyncio
+async def test_fallback_chain_serves_throttled_runs(provider_registry):
+    """Test retryable failures move along the fallback chain."""
+    provider_registry.register_provider(ThrottledProvider)
+    provider_registry.create_provider("throttled", ProviderConfig(name="throttled"))
+
+    config = make_config(
+        providers=["throttled"],
+        models={"throttled": ["busy-1"]},
+        fallbacks={
+            "throttled/busy-1": [
+                {"provider": "offline-replica", "model": "busy-1"},
+                {"provider": "echo", "model": "echo-1"},
+            ]
+        },
+    )
+    engine = ExperimentEngine()
+    experiment = await engine.create_experiment(config, created_by="user-1")
+
+    result = await engine.run_experiment(experiment.experiment_id)
+
+    assert result.successful_runs == 2
+    for run in result.runs:
+        assert run.provider == "throttled"
+        assert run.served_by == "echo/echo-1"
+        assert run.attempts == 3
+
+
+@pytest.mark.asyncio
+async def test_run_fails_without_fallback(provider_registry):
+    """Test retryable failures are recorded when no fallback remains."""
+    provider_registry.register_provider(ThrottledProvider)
+    provider_registry.create_provider("throttled", ProviderConfig(name="throttled"))
+
+    config = make_config(providers=["throttled"], models={"throttled": ["busy-1"]})
+    engine = ExperimentEngine()
+    experiment = await engine.create_experiment(config, created_by="user-1")
+
+    result = await engine.run_experiment(experiment.experiment_id)
+
+    assert result.failed_runs == 2
+    assert all(run.status == ExperimentStatus.FAILED for run in result.runs)
+    assert all("429" in run.error_message for run in result.runs)
+
+
+@pytest.mark.asyncio
+async def test_token_budget_wait_is_not_timed(provider_registry, monkeypatch):
+    """Test waiting for a provider's token budget isn't counted in run durations."""
+
+    async def slow_budget(tokens: int) -> None:
+        await asyncio.sleep(0.3)
+
+    monkeypatch.setattr(provider_registry.get_provider("echo"), "acquire_token_budget", slow_budget)
+    engine = ExperimentEngine()
+    experiment = await engine.create_experiment(make_config(), created_by="user-1")
+
+    result = await engine.run_experiment(experiment.experiment_id)
+
+    assert result.successful_runs == 2
+    assert all(run.duration_ms < 300 for run in result.runs)
+
+
+@pytest.mark.asyncio
+async def test_warmup_is_reported_separately(provider_registry):
+    """Test warmup probes run before the experiment and are timed separately."""
+    engine = ExperimentEngine()
+    experiment = await engine.create_experiment(make_config(warmup_probe=True), created_by="user-1")
+
+    result = await engine.run_experiment(experiment.experiment_id)
+
+    assert set(result.warmup_ms) == {"echo"}
+    assert result.total_runs == 2
+
+
+@pytest.mark.asyncio
+async def test_dataset_test_cases_are_streamed(provider_registry, tmp_path, monkeypatch):
+    """Test experiments can stream a sampled shard of an uploaded dataset."""
+    storage = StorageManager(str(tmp_path / "storage"))
+    monkeypatch.setattr(storage_manager_module, "_storage_manager", storage)
+    rows = "".join(f'{{"name": "user-{i}"}}\n' for i in range(10))
+    file_info = await storage.upload_file(io.BytesIO(rows.encode()), "names.jsonl", owner_id="user-1")
+
+    config = make_config(test_cases=[], dataset={"file_id": file_info["file_id"], "row_start": 2, "row_end": 6})
+    engine = ExperimentEngine()
+    experiment = await engine.create_experiment(config, created_by="user-1")
+    # Sized up front, so dataset experiments count against the queued runs quota
+    assert experiment.progress.total_runs == 4
+    with pytest.raises(FileNotFoundError):
+        await engine.create_experiment(config, created_by="user-2")
+
+    result = await engine.run_experiment(experiment.experiment_id)
+
+    assert [run.test_case_index for run in result.runs] == [2, 3, 4, 5]
+    assert [run.response_text for run in result.runs] == [
+        "Hello user-2",
+        "Hello user-3",
+        "Hello user-4",
+        "Hello user-5",
+    ]
+
+
+def test_config_requires_test_data():
+    """Test experiments need inline test cases or a dataset."""
+    with pytest.raises(ValidationError, match="test_cases or dataset"):
+        make_config(test_cases=[])
+
+
+@pytest.mark.asyncio
+async def test_scheduler_runs_and_cancels_in_background(provider_registry):
+    """Test scheduled experiments queue for a slot, report progress, persist, and can be cancelled."""
+    provider_registry.register_provider(SlowProvider)
+    provider_registry.create_provider("slow", ProviderConfig(name="slow"))
+    engine = ExperimentEngine(max_running=1)
+    slow = await engine.create_experiment(
+        make_config(providers=["slow"], models={"slow": ["slow-1"]}), created_by="user-1"
+    )
+    quick = await engine.create_experiment(make_config(), created_by="user-1")
+
+    engine.start_experiment(slow.experiment_id)
+    engine.start_experiment(quick.experiment_id)
+    await asyncio.sleep(0.05)
+
+    assert slow.status == ExperimentStatus.RUNNING
+    assert slow.progress.started_runs == 2
+    assert quick.status == ExperimentStatus.QUEUED
+    with pytest.raises(ValueError, match="not pending"):
+        engine.start_experiment(quick.experiment_id)
+
+    await engine.cancel_experiment(slow.experiment_id)
+    assert slow.status == ExperimentStatus.CANCELLED
+    assert slow.progress.finished_runs == 0
+
+    for _ in range(100):
+        if quick.experiment_id not in engine._jobs:
+            break
+        await asyncio.sleep(0.01)
+    assert quick.status == ExperimentStatus.COMPLETED
+    assert (quick.progress.total_runs, quick.progress.completed_runs, quick.progress.failed_runs) == (2, 2, 0)
+    saved = await get_storage_manager().load_experiment_data(quick.experiment_id)
+    assert saved["status"] == "completed"
+    assert len(saved["runs"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_runs_are_counted_as_cancelled(provider_registry):
+    """Test runs cut short by cancellation aren't counted as finished with status running."""
+    provider_registry.register_provider(SlowProvider)
+    provider_registry.create_provider("slow", ProviderConfig(name="slow"))
+    running, cancelled = engine_module.RUNS.value("running"), engine_module.RUNS.value("cancelled")
+    engine = ExperimentEngine()
+    experiment = await engine.create_experiment(
+        make_config(providers=["slow"], models={"slow": ["slow-1"]}), created_by="user-1"
+    )
+
+    engine.start_experiment(experiment.experiment_id)
+    await asyncio.sleep(0.05)
+    await engine.cancel_experiment(experiment.experiment_id)
+
+    assert engine_module.RUNS.value("running") == running
+    assert engine_module.RUNS.value("cancelled") == cancelled + 2
+
+
+@pytest.mark.asyncio
+async def test_scheduled_experiments_stream_runs_to_storage(provider_registry, monkeypatch):
+    """Test scheduled experiments write finished runs in batches instead of keeping them."""
+    monkeypatch.setattr(engine_module, "RUN_APPEND_BATCH_SIZE", 2)
+    engine = ExperimentEngine()
+    test_cases = [{"name": f"user-{i}"} for i in range(5)]
+    experiment = await engine.create_experiment(make_config(test_cases=test_cases), created_by="user-1")
+
+    await engine.enqueue_experiment(experiment.experiment_id)
+    for _ in range(100):
+        if experiment.status == ExperimentStatus.COMPLETED:
+            break
+        await asyncio.sleep(0.01)
+
+    assert experiment.status == ExperimentStatus.COMPLETED
+    assert experiment.result.runs == []
+    assert (experiment.result.total_runs, experiment.result.successful_runs) == (5, 5)
+    saved = await get_storage_manager().load_experiment_data(experiment.experiment_id)
+    assert sorted(run["response_text"] for run in saved["runs"]) == [f"Hello user-{i}" for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_finished_experiment_runs_are_readable_from_other_replicas(provider_registry, tmp_path, monkeypatch):
+    """Test a scheduled experiment's runs are published to a shared S3 bucket when it finishes."""
+    transport = InMemoryS3()
+    writer = StorageManager(str(tmp_path / "replica-1"), backend=S3Backend("bucket", transport=transport))
+    reader = StorageManager(str(tmp_path / "replica-2"), backend=S3Backend("bucket", transport=transport))
+    monkeypatch.setattr(storage_manager_module, "_storage_manager", writer)
+    engine = ExperimentEngine()
+    experiment = await engine.create_experiment(make_config(), created_by="user-1")
+
+    await engine.enqueue_experiment(experiment.experiment_id)
+    for _ in range(100):
+        if experiment.experiment_id not in engine._jobs:
+            break
+        await asyncio.sleep(0.01)
+
+    assert experiment.status == ExperimentStatus.COMPLETED
+    saved = await reader.load_experiment_data(experiment.experiment_id)
+    assert sorted(run["response_text"] for run in saved["runs"]) == ["Hello Ada", "Hello Grace"]
+    page = await reader.list_experiment_runs(experiment.experiment_id, fields=["status"])
+    assert page.runs == [{"status": "completed"}] * 2
+    await writer.close()
+    await reader.close()
+
+
+@pytest.mark.asyncio
+async def test_running_jobs_renew_their_quota_leases(provider_registry, monkeypatch):
+    """Test a job's quota lease outlives its TTL while the job runs, and is released when it ends."""
+    provider_registry.register_provider(SlowProvider)
+    provider_registry.create_provider("slow", ProviderConfig(name="slow"))
+    monkeypatch.setattr(settings, "QUOTA_MAX_ACTIVE_EXPERIMENTS", 1)
+    monkeypatch.setattr(settings, "LIMITS_LEASE_SECONDS", 0.15)
+    engine = ExperimentEngine()
+    experiment = await engine.create_experiment(
+        make_config(providers=["slow"], models={"slow": ["slow-1"]}), created_by="user-1"
+    )
+
+    await engine.enqueue_experiment(experiment.experiment_id)
+    await asyncio.sleep(0.4)
+    assert await get_limit_store().usage("user-1") == (1, 2)
+
+    await engine.cancel_experiment(experiment.experiment_id)
+    assert await get_limit_store().usage("user-1") == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_event_stream_reports_runs_and_bounds_slow_subscribers(provider_registry):
+    """Test subscribers get a status snapshot, run events and a final status; slow ones lag instead of growing."""
+    engine = ExperimentEngine()
+    engine.events.buffer_size = 3
+    config = make_config(test_cases=[{"name": f"user-{i}"} for i in range(5)])
+    experiment = await engine.create_experiment(config, created_by="user-1")
+    subscription = engine.subscribe(experiment.experiment_id)
+
+    await engine.run_experiment(experiment.experiment_id)
+
+    events = [event async for event in subscription]
+    assert [event.type for event in events] == ["lagged", "run", "run", "status"]
+    assert events[0].data == {"dropped": 5}
+    assert events[-1].data["status"] == "completed"
+    assert events[-1].data["progress"]["completed_runs"] == 5
+    assert events[-2].data["progress"]["completed_runs"] == 5
+    assert "response_text" not in events[-2].data["run"]
+    assert engine.events.subscriber_count(experiment.experiment_id) == 0
+
+    late = engine.subscribe(experiment.experiment_id)
+    assert [event.data["status"] async for event in late] == ["completed"]
+
+
+def test_sweep_expansion():
+    """Test sweep grids expand to configs sharing the validated base."""
+    base = ExperimentConfig(
+        name="sweep",
+        prompt_template="Hi {name}",
+        providers=["openai"],
+        models={"openai": ["gpt-4"]},
+        test_cases=[{"name": "Ada"}],
+    )
+    sweep = SweepConfig(
+        base=base,
+        grid={
+            "max_tokens": ["16", 64],
+            "models": [{"openai": ["gpt-4"]}, {"openai": ["gpt-4"], "anthropic": ["claude"]}],
+        },
+    )
+    expanded = sweep.expand()
+
+    assert [params["max_tokens"] for params, _ in expanded] == [16, 16, 64, 64]
+    params, config = expanded[1]
+    assert config.providers == ["openai", "anthropic"]
+    assert config.max_tokens == 16
+    assert config.name == "sweep [2/4]"
+    assert config.test_cases is base.test_cases
+
+    with pytest.raises(ValidationError, match="can't be swept"):
+        SweepConfig(base=base, grid={"test_cases": [[{"name": "Grace"}]]})
+    with pytest.raises(ValidationError, match="max_tokens"):
+        SweepConfig(base=base, grid={"max_tokens": [0]})
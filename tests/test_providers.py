@@ -0,0 +1,150 @@
+"""
+Tests for the providers brick.
+
+Tests provider registration, lazy discovery, instantiation, and token estimation.
+"""
+
+import sys
+from importlib.metadata import EntryPoint
+
+import httpx
+import pytest
+
+from app.providers import HeuristicTokenizer
+from app.providers import ProviderRegistry
+from app.providers import RateLimitError
+from app.providers import is_retryable_error
+from app.providers import registry as registry_module
+from app.providers.base import CompletionRequest
+from app.providers.base import ProviderConfig
+from app.providers.registry import ENTRY_POINT_GROUP
+from app.providers.tokens import TokenCounter
+from tests.conftest import EchoProvider
+
+
+def test_register_and_create_provider():
+    """Test direct registration and instance reuse."""
+    registry = ProviderRegistry(entry_point_group=None)
+    registry.register_provider(EchoProvider)
+
+    provider = registry.create_provider("echo", ProviderConfig(name="echo"))
+    assert registry.get_provider("echo") is provider
+    assert registry.list_providers() == ["echo"]
+
+
+def test_lazy_provider_imported_on_first_use(monkeypatch):
+    """Test lazy providers are not imported until requested."""
+    monkeypatch.delitem(sys.modules, "tests.lazy_provider_stub", raising=False)
+    registry = ProviderRegistry(entry_point_group=None)
+    registry.register_lazy_provider("echo", "tests.conftest:EchoProvider")
+    registry.register_lazy_provider("stub", "tests.lazy_provider_stub:StubProvider")
+
+    assert set(registry.list_providers()) == {"echo", "stub"}
+    report = {entry["provider"]: entry for entry in registry.import_report()}
+    assert report["echo"]["imported"] is False
+
+    assert "tests.lazy_provider_stub" not in sys.modules
+
+    provider = registry.get_provider("echo")
+    assert isinstance(provider, EchoProvider)
+    report = {entry["provider"]: entry for entry in registry.import_report()}
+    assert report["echo"]["imported"] is True
+    assert report["echo"]["import_ms"] is not None
+    assert "tests.lazy_provider_stub" not in sys.modules
+
+    stub = registry.get_provider("stub")
+    assert "tests.lazy_provider_stub" in sys.modules
+    assert type(stub).__name__ == "StubProvider"
+    assert type(stub).__module__ == "tests.lazy_provider_stub"
+
+
+def test_broken_entry_point_provider_is_unavailable(monkeypatch):
+    """Test a plugin that fails to import is reported instead of breaking provider lookups."""
+    broken = EntryPoint(name="broken", value="tests.broken_provider_stub:BrokenProvider", group=ENTRY_POINT_GROUP)
+    monkeypatch.setattr(registry_module, "entry_points", lambda group: [broken] if group == ENTRY_POINT_GROUP else [])
+    registry = ProviderRegistry()
+
+    assert registry.get_provider("broken") is None
+    assert registry.get_provider("broken") is None
+    report = {entry["provider"]: entry for entry in registry.import_report()}
+    assert report["broken"]["imported"] is False
+    assert "shadow_cauldron_missing_vendor_sdk" in report["broken"]["error"]
+
+    with pytest.raises(ImportError, match="broken"):
+        registry.create_provider("broken", ProviderConfig(name="broken"))
+
+
+def test_unknown_provider():
+    """Test missing providers return None and raise on create."""
+    registry = ProviderRegistry(entry_point_group=None)
+    assert registry.get_provider("missing") is None
+
+    with pytest.raises(KeyError, match="missing"):
+        registry.create_provider("missing", ProviderConfig(name="missing"))
+
+
+def test_count_tokens_is_cached():
+    """Test token estimates are computed once per rendered prompt."""
+    provider = EchoProvider(ProviderConfig(name="echo"))
+    provider.token_counter = TokenCounter(HeuristicTokenizer())
+    request = CompletionRequest(prompt="Summarize the following text in one sentence.", model="echo-1")
+
+    first = provider.count_tokens(request)
+    second = provider.count_tokens(request.model_copy(update={"model": "echo-2"}))
+
+    assert first == second > 0
+    assert provider.token_counter.misses == 1
+    assert provider.token_counter.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_token_budget_limits_requests():
+    """Test tokens-per-minute budgets are drawn down before requests."""
+    provider = EchoProvider(ProviderConfig(name="echo", tokens_per_minute=600))
+
+    await provider.acquire_token_budget(500)
+
+    assert provider._rate_limiter._tokens == pytest.approx(100, abs=1)
+
+
+@pytest.mark.asyncio
+async def test_warmup_probe_draws_token_budget():
+    """Test the warmup probe counts against the tokens-per-minute budget."""
+    provider = EchoProvider(ProviderConfig(name="echo", tokens_per_minute=600))
+    provider.token_counter = TokenCounter(HeuristicTokenizer())
+
+    await provider.warmup(connections=0, probe_model="echo-1")
+
+    assert provider._rate_limiter._tokens == pytest.approx(598, abs=1)
+
+
+@pytest.mark.asyncio
+async def test_registry_close_closes_provider_clients():
+    """Test closing the registry closes each provider's pooled HTTP client."""
+    registry = ProviderRegistry(entry_point_group=None)
+    registry.register_provider(EchoProvider)
+    provider = registry.create_provider("echo", ProviderConfig(name="echo", base_url="https://api.example.com"))
+    client = provider.get_http_client()
+
+    await registry.close()
+
+    assert client.is_closed
+    assert provider._http_client is None
+
+
+def test_retryable_errors():
+    """Test throttling, outages and network failures from httpx are retryable, client errors are not."""
+    request = httpx.Request("POST", "https://api.example.com/v1/complete")
+
+    def status_error(status_code):
+        response = httpx.Response(status_code, request=request)
+        return httpx.HTTPStatusError(f"HTTP {status_code}", request=request, response=response)
+
+    assert is_retryable_error(RateLimitError("429 Too Many Requests"))
+    assert is_retryable_error(httpx.ReadTimeout("timed out", request=request))
+    assert is_retryable_error(httpx.ConnectError("connection refused", request=request))
+    assert is_retryable_error(status_error(429))
+    assert is_retryable_error(status_error(503))
+    assert not is_retryable_error(status_error(400))
+    assert not is_retryable_error(httpx.UnsupportedProtocol("bad scheme", request=request))
+    assert not is_retryable_error(ValueError("bad response"))
@@ -0,0 +1,525 @@
+"""
+Tests for the storage brick.
+
+Tests file uploads, lookups, deletion, and experiment data persistence.
+"""
+
+import asyncio
+import io
+import threading
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+
+import httpx
+import pytest
+
+from app.storage import LocalBackend
+from app.storage import RetentionPolicy
+from app.storage import S3Backend
+from app.storage import StorageError
+from app.storage import StorageMaintenance
+from app.storage import StorageManager
+from app.storage import close_storage_manager
+from app.storage import get_storage_manager
+from app.storage import manager as storage_manager_module
+from app.storage.runlog import RunLog
+from app.storage.s3_standin import InMemoryS3
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """Storage manager rooted in a temporary directory."""
+    return StorageManager(str(tmp_path / "storage"))
+
+
+@pytest.fixture
+def s3_transport():
+    """In-memory S3 stand-in with a small minimum part size."""
+    return InMemoryS3(min_part_size=4)
+
+
+def make_s3_backend(transport, **overrides):
+    """S3 backend talking to the in-memory stand-in."""
+    options = {
+        "endpoint_url": "http://s3.test",
+        "access_key_id": "test-key",
+        "secret_access_key": "test-secret",
+        "prefix": "sc",
+        "transport": transport,
+    }
+    options.update(overrides)
+    return S3Backend("bucket", **options)
+
+
+@pytest.mark.asyncio
+async def test_upload_get_delete(storage):
+    """Test the upload/lookup/delete lifecycle."""
+    file_info = await storage.upload_file(io.BytesIO(b"a,b\n1,2\n"), "data.csv", "text/csv")
+
+    found = await storage.get_file(file_info["file_id"])
+    assert found["original_filename"] == "data.csv"
+    assert found["size_bytes"] == 8
+
+    assert await storage.delete_file(file_info["file_id"]) is True
+    assert await storage.get_file(file_info["file_id"]) is None
+    assert await storage.delete_file(file_info["file_id"]) is False
+
+
+@pytest.mark.asyncio
+async def test_global_manager_is_created_lazily(tmp_path):
+    """Test the global manager is only created on first use, under SC_STORAGE_ROOT."""
+    root = tmp_path / "global-storage"
+    assert storage_manager_module._storage_manager is None
+    assert not root.exists()
+
+    manager = get_storage_manager()
+
+    assert manager.storage_root == root
+    assert get_storage_manager() is manager
+    await close_storage_manager()
+    assert storage_manager_module._storage_manager is None
+
+
+@pytest.mark.asyncio
+async def test_rebuild_index_from_disk(tmp_path):
+    """Test the file index can be rebuilt from metadata files."""
+    storage = StorageManager(str(tmp_path / "storage"))
+    file_info = await storage.upload_file(io.BytesIO(b"hello"), "hello.txt")
+    storage.file_index.close()
+    (tmp_path / "storage" / "index.sqlite3").unlink()
+
+    reopened = StorageManager(str(tmp_path / "storage"))
+
+    assert reopened.file_index.count() == 1
+    assert (await reopened.get_file(file_info["file_id"]))["size_bytes"] == 5
+    assert await reopened.rebuild_index() == 1
+
+
+class AsyncReader:
+    """Minimal async file object, like Starlette's UploadFile."""
+
+    def __init__(self, data: bytes):
+        self._buffer = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._buffer.read(size)
+
+
+@pytest.mark.asyncio
+async def test_upload_from_async_reader(storage, monkeypatch):
+    """Test async file objects are streamed to disk in chunks."""
+    monkeypatch.setattr("app.storage.manager.CHUNK_SIZE", 4)
+
+    file_info = await storage.upload_file(AsyncReader(b"0123456789"), "digits.txt")
+
+    assert file_info["size_bytes"] == 10
+    assert await storage.backend.get(storage.blob_key(file_info["content_hash"])) == b"0123456789"
+
+
+@pytest.mark.asyncio
+async def test_experiment_data_round_trip(storage):
+    """Test experiment data is saved and loaded."""
+    await storage.save_experiment_data("exp-1", {"name": "greeting", "runs": [{"status": "completed"}]})
+
+    data = await storage.load_experiment_data("exp-1")
+
+    assert data["runs"] == [{"status": "completed"}]
+    assert "saved_at" in data
+    assert await storage.load_experiment_data("missing") is None
+
+
+@pytest.mark.asyncio
+async def test_duplicate_uploads_share_one_blob(storage):
+    """Test identical content is stored once and collected with its last reference."""
+    first = await storage.upload_file(io.BytesIO(b"same dataset"), "a.csv")
+    second = await storage.upload_file(io.BytesIO(b"same dataset"), "b.csv")
+    blob = storage.backend.local_path(storage.blob_key(first["content_hash"]))
+
+    assert first["file_id"] != second["file_id"]
+    assert first["content_hash"] == second["content_hash"]
+    assert storage.file_index.refcount(first["content_hash"]) == 2
+    assert not any((storage.storage_root / "tmp").iterdir())
+
+    await storage.delete_file(first["file_id"])
+    assert blob.exists()
+    assert (await storage.get_file(second["file_id"]))["original_filename"] == "b.csv"
+
+    await storage.delete_file(second["file_id"])
+    assert not blob.exists()
+    assert storage.file_index.refcount(first["content_hash"]) == 0
+
+
+@pytest.mark.asyncio
+async def test_experiment_runs_are_appended_incrementally(storage):
+    """Test repeated saves only append new runs and loads can read a range."""
+    runs = [{"run_id": f"run-{i}", "duration_ms": i} for i in range(5)]
+    await storage.save_experiment_data("exp-2", {"status": "running", "runs": runs[:3]})
+    await storage.save_experiment_data("exp-2", {"status": "completed", "runs": runs})
+
+    data = await storage.load_experiment_data("exp-2", run_offset=2, run_limit=2)
+
+    assert data["status"] == "completed"
+    assert [run["run_id"] for run in data["runs"]] == ["run-2", "run-3"]
+    assert len(await storage.load_experiment_runs("exp-2")) == 5
+    assert (await storage.load_experiment_data("exp-2", include_runs=False)).get("runs") is None
+
+
+@pytest.mark.asyncio
+async def test_run_log_cache_is_bounded(tmp_path):
+    """Test open run logs are dropped when an experiment finishes or the cache is full."""
+    storage = StorageManager(str(tmp_path / "storage"), run_log_cache_size=2)
+    for i in range(4):
+        await storage.append_experiment_runs(f"exp-{i}", [{"run_id": f"run-{i}"}])
+    assert list(storage._run_logs) == ["exp-2", "exp-3"]
+
+    await storage.seal_experiment_runs("exp-3")
+    assert list(storage._run_logs) == ["exp-2"]
+    assert [run["run_id"] for run in await storage.load_experiment_runs("exp-0")] == ["run-0"]
+    await storage.close()
+
+
+def test_run_log_segments_and_compaction(tmp_path):
+    """Test sealed segments are indexed, compacted, and read back in order."""
+    run_log = RunLog(tmp_path / "exp", segment_size=64, compact_after=100)
+    for batch in range(6):
+        run_log.append([{"i": batch * 2}, {"i": batch * 2 + 1}])
+
+    assert len(list((tmp_path / "exp").glob("segment-*.log"))) > 1
+    assert [record["i"] for record in run_log.read(3, 4)] == [3, 4, 5, 6]
+
+    assert run_log.compact() > 1
+    run_log.append([{"i": 12}])
+
+    reopened = RunLog(tmp_path / "exp")
+    assert reopened.count() == 13
+    assert [record["i"] for record in reopened.read()] == list(range(13))
+
+
+def test_run_log_tiered_compaction(tmp_path):
+    """Test sealed segments are merged a tier at a time in the background."""
+    run_log = RunLog(tmp_path / "exp", segment_size=64, compact_after=2)
+    for i in range(40):
+        run_log.append([{"i": i, "padding": "x" * 40}])
+        run_log.wait_for_compaction()
+
+    # Like a binary counter: at most one sealed segment per level, plus the active one
+    levels = [run_log._level(path) for path in run_log.segments()]
+    sealed = [level for level in levels if level is not None]
+    assert len(sealed) == len(set(sealed)) and max(sealed) >= 3
+    assert [record["i"] for record in RunLog(tmp_path / "exp").read()] == list(range(40))
+
+
+def test_run_log_truncates_torn_tail(tmp_path):
+    """Test a torn or garbled frame left by a crash is cut off before new appends."""
+    RunLog(tmp_path / "exp").append([{"i": 0}, {"i": 1}])
+    segment = next((tmp_path / "exp").glob("segment-*.log"))
+    valid = segment.read_bytes()
+
+    for garbage in (valid[:20], valid[:-3] + b"xyz"):
+        segment.write_bytes(valid + garbage)
+        run_log = RunLog(tmp_path / "exp")
+        assert run_log.count() == 2
+        run_log.append([{"i": 2}])
+        assert [record["i"] for record in RunLog(tmp_path / "exp").read()] == [0, 1, 2]
+        segment.write_bytes(valid)
+
+
+@pytest.mark.asyncio
+async def test_columnar_export_round_trip(storage):
+    """Test runs export to typed, memory-mapped columns."""
+    runs = [
+        {
+            "run_id": f"run-{i}",
+            "provider": "echo" if i % 2 else "mock",
+            "model": "m-1",
+            "test_case_index": i,
+            "status": "completed" if i < 3 else "failed",
+            "duration_ms": 10 * i if i < 3 else None,
+            "usage_stats": {"prompt_tokens": i, "completion_tokens": 1} if i < 3 else None,
+        }
+        for i in range(4)
+    ]
+    await storage.append_experiment_runs("exp-3", runs)
+
+    path = await storage.export_experiment_columnar("exp-3", format="columns")
+    table = await storage.open_experiment_columnar("exp-3")
+
+    assert path.endswith("exp-3.columns")
+    assert table.num_rows == 4
+    assert list(table["duration_ms"]) == [0, 10, 20, -1]
+    data = table.to_pydict()
+    assert data["provider"] == ["mock", "echo", "mock", "echo"]
+    assert data["total_tokens"] == [1, 2, 3, None]
+    assert data["run_id"][3] == "run-3"
+    table.close()
+
+
+@pytest.mark.asyncio
+async def test_local_backend_concurrent_writes_of_one_key(tmp_path):
+    """Test concurrent writes of the same key each use their own temp file and leave one whole object."""
+    backend = LocalBackend(tmp_path / "objects")
+    source = tmp_path / "source.bin"
+    source.write_bytes(b"f" * 4096)
+    payloads = [bytes([ord("a") + i]) * 4096 for i in range(8)]
+
+    sizes = await asyncio.gather(
+        *(backend.put("key.bin", payload) for payload in payloads),
+        backend.put_file("key.bin", source),
+    )
+
+    assert sizes[-1] == 4096
+    assert await backend.get("key.bin") in [*payloads, b"f" * 4096]
+    assert [path.name for path in (tmp_path / "objects").iterdir()] == ["key.bin"]
+
+
+@pytest.mark.asyncio
+async def test_s3_backend_objects(s3_transport):
+    """Test put/get/range/list/delete against the S3 stand-in."""
+    backend = make_s3_backend(s3_transport)
+    await backend.put("a/one.txt", b"0123456789")
+    await backend.put("a/two.txt", b"x")
+    await backend.put("b/three.txt", b"y")
+
+    assert await backend.get("a/one.txt") == b"0123456789"
+    assert await backend.get("missing") is None
+    assert await backend.get_range("a/one.txt", 2, 5) == b"2345"
+    assert b"".join([chunk async for chunk in backend.stream("a/one.txt", 7)]) == b"789"
+    assert (await backend.stat("a/one.txt")).size == 10
+    assert [info.key async for info in backend.list_objects("a/")] == ["a/one.txt", "a/two.txt"]
+    assert ("bucket", "sc/a/one.txt") in s3_transport.objects
+
+    await backend.delete("a/one.txt")
+    assert await backend.stat("a/one.txt") is None
+    await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_s3_backend_multipart_upload(s3_transport, tmp_path):
+    """Test large objects are uploaded in parts and reassembled in order."""
+    backend = make_s3_backend(s3_transport, part_size=4, multipart_concurrency=2)
+    source = tmp_path / "big.bin"
+    source.write_bytes(b"abcdefghij")
+
+    assert await backend.put_file("big.bin", source) == 10
+
+    async def chunks():
+        for chunk in (b"12", b"345", b"6789", b"0"):
+            yield chunk
+
+    assert await backend.put_stream("streamed.bin", chunks()) == 10
+    assert await backend.get("big.bin") == b"abcdefghij"
+    assert await backend.get("streamed.bin") == b"1234567890"
+    assert s3_transport.operations[("PUT", "multipart")] == 6
+    assert not s3_transport.uploads
+    await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_s3_multipart_upload_without_part_etag_is_aborted(tmp_path):
+    """Test a part response missing its ETag fails the upload with a StorageError and aborts it."""
+
+    class EtaglessParts(InMemoryS3):
+        async def handle_async_request(self, request):
+            response = await super().handle_async_request(request)
+            if request.method == "PUT" and b"partNumber" in request.url.query:
+                return httpx.Response(200)
+            return response
+
+    transport = EtaglessParts(min_part_size=4)
+    backend = make_s3_backend(transport, part_size=4)
+    source = tmp_path / "big.bin"
+    source.write_bytes(b"abcdefghij")
+
+    with pytest.raises(StorageError, match="no ETag for part"):
+        await backend.put_file("big.bin", source)
+    assert not transport.uploads
+    assert await backend.get("big.bin") is None
+    await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_s3_file_uploads_read_on_the_storage_io_pool(s3_transport, tmp_path):
+    """Test S3 uploads read local files on the manager's bounded I/O pool, not the loop's default executor."""
+    threads = []
+
+    class RecordingPath(type(tmp_path)):
+        def read_bytes(self):
+            threads.append(threading.current_thread().name)
+            return super().read_bytes()
+
+    storage = StorageManager(str(tmp_path / "storage"), backend=make_s3_backend(s3_transport))
+    source = RecordingPath(tmp_path / "small.bin")
+    source.write_bytes(b"data")
+
+    assert await storage.backend.put_file("small.bin", source) == 4
+    assert threads and all(name.startswith("storage-io") for name in threads)
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_replicas_share_uploads_through_s3(s3_transport, tmp_path):
+    """Test an upload made through one replica is visible to and deletable by another."""
+    first = StorageManager(str(tmp_path / "replica-1"), backend=make_s3_backend(s3_transport))
+    second = StorageManager(str(tmp_path / "replica-2"), backend=make_s3_backend(s3_transport))
+
+    file_info = await first.upload_file(io.BytesIO(b'{"name": "Ada"}\n'), "cases.jsonl")
+
+    assert (await second.get_file(file_info["file_id"]))["content_hash"] == file_info["content_hash"]
+    assert [row async for row in second.iter_dataset(file_info["file_id"])] == [(0, {"name": "Ada"})]
+
+    assert await second.delete_file(file_info["file_id"]) is True
+    assert await first.get_file(file_info["file_id"]) is None
+    await first.close()
+    await second.close()
+
+
+@pytest.mark.asyncio
+async def test_maintenance_cleans_orphans_and_accounts_usage(storage):
+    """Test orphaned metadata and blobs are removed and usage is tallied per user."""
+    kept = await storage.upload_file(io.BytesIO(b"kept"), "kept.txt", owner_id="user-1")
+    await storage.upload_file(io.BytesIO(b"other"), "other.txt", metadata={"user_id": "user-2"})
+    broken = await storage.upload_file(io.BytesIO(b"broken"), "broken.txt", owner_id="user-1")
+    await storage.backend.delete(storage.blob_key(broken["content_hash"]))
+    await storage.backend.put(storage.blob_key("0" * 64), b"orphan")
+
+    maintenance = StorageMaintenance(storage, RetentionPolicy(orphan_grace_seconds=0), batch_size=2, pause=0)
+    report = await maintenance.run_once()
+
+    assert report.orphan_metadata_removed == 1
+    assert report.orphan_blobs_removed == 1
+    assert report.bytes_freed == len(b"orphan")
+    assert await storage.get_file(broken["file_id"]) is None
+    assert not await storage.backend.exists(storage.blob_key("0" * 64))
+    assert await storage.get_file(kept["file_id"]) is not None
+    assert report.usage["user-1"].upload_bytes == len(b"kept")
+    assert report.usage["user-2"].uploads == 1
+    assert (await maintenance.load_report()).orphan_blobs_removed == 1
+
+
+@pytest.mark.asyncio
+async def test_maintenance_retention_and_cold_recompression(storage):
+    """Test old experiments expire, cold ones are recompressed and the size cap evicts exports."""
+    now = datetime.now(UTC)
+    runs = [{"run_id": f"run-{i}", "output": "x" * 50} for i in range(20)]
+    await storage.save_experiment_data(
+        "exp-old",
+        {"status": "completed", "created_by": "user-1", "completed_at": (now - timedelta(days=400)).isoformat()},
+    )
+    await storage.save_experiment_data(
+        "exp-cold",
+        {
+            "status": "completed",
+            "created_by": "user-1",
+            "completed_at": (now - timedelta(days=10)).isoformat(),
+            "runs": runs,
+        },
+    )
+    await storage.export_experiment_columnar("exp-cold", runs, format="columns")
+
+    policy = RetentionPolicy(experiment_max_age_days=365, cold_after_days=7)
+    report = await StorageMaintenance(storage, policy, batch_size=3, pause=0).run_once()
+
+    assert report.experiments_expired == 1
+    assert await storage.load_experiment_data("exp-old") is None
+    assert report.experiments_recompressed == 1
+    data = await storage.load_experiment_data("exp-cold")
+    assert data["storage_tier"] == "cold"
+    assert data["runs"] == runs
+
+    report = await StorageMaintenance(storage, RetentionPolicy(max_total_bytes=1), pause=0).run_once()
+
+    assert report.experiments_recompressed == 0
+    assert (report.exports_evicted, report.experiments_evicted) == (1, 1)
+    assert report.total_bytes == 0
+    assert report.usage["user-1"].total_bytes == 0
+    assert await storage.open_experiment_columnar("exp-cold") is None
+
+
+@pytest.mark.asyncio
+async def test_maintenance_keeps_unfinished_experiments_and_datasets_in_use(storage, monkeypatch):
+    """Test retention and the size cap skip running experiments and uploads an experiment still reads."""
+    old = (datetime.now(UTC) - timedelta(days=400)).isoformat()
+    await storage.save_experiment_data("exp-running", {"status": "running", "created_by": "user-1", "created_at": old})
+    await storage.append_experiment_runs("exp-queued", [{"run_id": "run-0"}])
+    dataset = await storage.upload_file(io.BytesIO(b"name\nAda\n"), "dataset.csv", owner_id="user-1")
+    stale = await storage.upload_file(io.BytesIO(b"stale"), "stale.txt", owner_id="user-1")
+    monkeypatch.setattr(storage_manager_module, "_file_users", [lambda: {dataset["file_id"]}])
+
+    policy = RetentionPolicy(upload_max_age_days=-1, experiment_max_age_days=1, max_total_bytes=1)
+    maintenance = StorageMaintenance(storage, policy, pause=0)
+    report = await maintenance.run_once()
+
+    assert report.uploads_expired == 1
+    assert await storage.get_file(stale["file_id"]) is None
+    assert await storage.get_file(dataset["file_id"]) is not None
+    assert (report.experiments_expired, report.experiments_evicted) == (0, 0)
+    assert await storage.load_experiment_data("exp-running") is not None
+    assert await storage.load_experiment_runs("exp-queued") == [{"run_id": "run-0"}]
+
+    await storage.delete_experiment_data("exp-queued")
+    await maintenance.run_once()
+    assert list(maintenance._experiments) == ["exp-running"]
+
+
+@pytest.mark.asyncio
+async def test_maintenance_checks_uploads_in_use_once_per_batch(storage, monkeypatch):
+    """Test files in use are looked up per pass and batch, and expired uploads are rechecked before deletion."""
+    uploads = [await storage.upload_file(io.BytesIO(f"row {i}".encode()), f"{i}.txt") for i in range(5)]
+    lookups = []
+
+    def datasets_in_use():
+        lookups.append(1)
+        # An experiment starts reading the last upload while the pass runs
+        return {uploads[-1]["file_id"]} if len(lookups) > 1 else set()
+
+    monkeypatch.setattr(storage_manager_module, "_file_users", [datasets_in_use])
+    maintenance = StorageMaintenance(
+        storage, RetentionPolicy(upload_max_age_days=-1, orphan_grace_seconds=0), batch_size=10, pause=0
+    )
+    report = await maintenance.run_once()
+
+    assert len(lookups) == 2
+    assert report.uploads_expired == 4
+    assert await storage.get_file(uploads[-1]["file_id"]) is not None
+    assert await storage.backend.exists(storage.blob_key(uploads[-1]["content_hash"]))
+
+
+@pytest.mark.asyncio
+async def test_run_listing_is_paginated_filtered_and_projected(storage):
+    """Test run listings page by cursor, filter through the index and select fields."""
+    runs = [
+        {
+            "run_id": f"run-{i}",
+            "provider": "echo",
+            "model": "echo-1" if i % 2 else "echo-2",
+            "status": "failed" if i == 3 else "completed",
+            "duration_ms": i * 10,
+            "response_text": "x" * 100,
+        }
+        for i in range(10)
+    ]
+    await storage.save_experiment_data("exp-1", {"status": "completed", "runs": runs[:6]})
+    await storage.append_experiment_runs("exp-1", runs[6:])
+
+    first = await storage.list_experiment_runs("exp-1", limit=4, fields=["run_id", "duration_ms"])
+    second = await storage.list_experiment_runs("exp-1", first.next_cursor, limit=4, fields=["run_id"])
+    last = await storage.list_experiment_runs("exp-1", second.next_cursor, limit=4)
+
+    assert first.runs[0] == {"run_id": "run-0", "duration_ms": 0}
+    assert [run["run_id"] for run in second.runs] == ["run-4", "run-5", "run-6", "run-7"]
+    assert last.runs[-1] == runs[-1]
+    assert last.next_cursor is None
+
+    page = await storage.list_experiment_runs(
+        "exp-1", model="echo-1", status="completed", min_duration_ms=20, max_duration_ms=70, fields=["run_id"]
+    )
+    assert page.runs == [{"run_id": "run-5"}, {"run_id": "run-7"}]
+
+    # Runs the index hasn't seen (e.g. logged by another replica) are indexed on read
+    await storage._run_io(storage.run_index.delete, "exp-1")
+    page = await storage.list_experiment_runs("exp-1", status="failed", fields=["run_id", "response_text"])
+    assert page.runs == [{"run_id": "run-3", "response_text": "x" * 100}]
+
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        await storage.list_experiment_runs("exp-1", "bogus")
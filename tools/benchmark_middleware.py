@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark the request logging middleware.
+
+Compares the previous BaseHTTPMiddleware implementation
+(``@app.middleware("http")``) with the pure ASGI RequestLoggingMiddleware
+on a small JSON endpoint and a streaming endpoint, driving the app
+in-process through httpx's ASGI transport. Log output is discarded so the
+numbers reflect middleware overhead rather than log I/O.
+
+Usage:
+    python tools/benchmark_middleware.py [--requests 5000] [--concurrency 20]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+import structlog
+from fastapi import FastAPI
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.middleware import RequestLoggingMiddleware  # noqa: E402
+
+logger = structlog.get_logger(__name__)
+
+
+def add_legacy_middleware(app: FastAPI) -> None:
+    """The request logging middleware as it was before the ASGI rewrite."""
+
+    @app.middleware("http")
+    async def request_logging_middleware(request: Request, call_next):
+        correlation_id = str(uuid.uuid4())
+        request.state.correlation_id = correlation_id
+        start_time = time.time()
+        logger.info(
+            "Request started",
+            correlation_id=correlation_id,
+            method=request.method,
+            url=str(request.url),
+            client_ip=request.client.host if request.client else None,
+        )
+        try:
+            response = await call_next(request)
+            process_time = time.time() - start_time
+            response.headers["X-Correlation-ID"] = correlation_id
+            logger.info(
+                "Request completed",
+                correlation_id=correlation_id,
+                status_code=response.status_code,
+                process_time=round(process_time * 1000, 2),
+            )
+            return response
+        except Exception as e:
+            logger.error("Request failed", correlation_id=correlation_id, error=str(e), exc_info=True)
+            return JSONResponse(
+                status_code=500,
+                content={"error": "Internal server error", "correlation_id": correlation_id},
+                headers={"X-Correlation-ID": correlation_id},
+            )
+
+
+def build_app(middleware: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"status": "ok"}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(16):
+                yield b"x" * 1024
+
+        return StreamingResponse(chunks(), media_type="application/octet-stream")
+
+    if middleware == "legacy":
+        add_legacy_middleware(app)
+    else:
+        app.add_middleware(RequestLoggingMiddleware)
+    return app
+
+
+async def measure(app: FastAPI, path: str, requests: int, concurrency: int) -> float:
+    """Requests per second for ``requests`` GETs of ``path``."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up (route compilation, middleware stack build)
+        for _ in range(50):
+            (await client.get(path)).raise_for_status()
+
+        remaining = iter(range(requests))
+
+        async def worker():
+            for _ in remaining:
+                (await client.get(path)).raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - start)
+
+
+async def main(requests: int, concurrency: int, rounds: int) -> None:
+    structlog.configure(logger_factory=structlog.ReturnLoggerFactory(), cache_logger_on_first_use=True)
+
+    print(f"{requests} requests x {rounds} rounds, concurrency {concurrency} (best round)\n")
+    print(f"{'endpoint':<10} {'legacy req/s':>14} {'asgi req/s':>14} {'gain':>8}")
+    for path in ("/ping", "/stream"):
+        results = {}
+        for middleware in ("legacy", "asgi"):
+            app = build_app(middleware)
+            results[middleware] = max([await measure(app, path, requests, concurrency) for _ in range(rounds)])
+        gain = results["asgi"] / results["legacy"] - 1
+        print(f"{path:<10} {results['legacy']:>14.0f} {results['asgi']:>14.0f} {gain:>+8.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the request logging middleware")
+    parser.add_argument("--requests", type=int, default=5000, help="Requests per round")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent clients")
+    parser.add_argument("--rounds", type=int, default=3, help="Rounds per configuration")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.rounds))